@@ -8,7 +8,7 @@ from pprint import PrettyPrinter
 from src.core.core import reset_model
 from src.core.non_elastic_task import generate_non_elastic_tasks
 from src.extra.io import parse_args, results_filename
-from src.extra.model import AlibabaModelDist, generate_evaluation_model
+from src.extra.model import AlibabaModelDist, generate_evaluation_model, SERVER_STREAM, TASK_STREAM
 from src.greedy.greedy import greedy_permutations
 from src.optimal.elastic_optimal import elastic_optimal
 from src.optimal.non_elastic_optimal import non_elastic_optimal
@@ -17,10 +17,11 @@ from src.optimal.non_elastic_optimal import non_elastic_optimal
 def foreknowledge_evaluation(model_dist: AlibabaModelDist, repeats: int = 50, run_elastic: bool = False):
     filename = results_filename('foreknowledge', model_dist)
     model_results = []
-    for _ in range(repeats):
-        servers = [model_dist.generate_server(server_id) for server_id in range(model_dist.num_servers)]
+    for repeat in range(repeats):
+        server_rng = model_dist.rng(repeat, SERVER_STREAM)
+        servers = [model_dist.generate_server(server_id, server_rng) for server_id in range(model_dist.num_servers)]
         foreknowledge_tasks, requested_tasks = model_dist.generate_foreknowledge_requested_tasks(
-            servers, model_dist.num_tasks)
+            servers, model_dist.num_tasks, model_dist.rng(repeat, TASK_STREAM))
         non_elastic_foreknowledge_tasks = generate_non_elastic_tasks(foreknowledge_tasks)
         non_elastic_requested_tasks = generate_non_elastic_tasks(requested_tasks)
 
@@ -103,8 +104,9 @@ def server_sizing(repeats: int = 20):
             "bandwidth mean": mean_bandwidth, "bandwidth std": 15
         }]
         model_results = []
-        for _ in range(repeats):
-            tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(model_dist, pretty_printer)
+        for repeat in range(repeats):
+            tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(
+                model_dist, pretty_printer, repeat)
 
             non_elastic_results = non_elastic_optimal(non_elastic_tasks, servers, time_limit=60)
             algorithm_results[non_elastic_results.algorithm] = non_elastic_results.store()
@@ -124,9 +126,11 @@ if __name__ == "__main__":
     args = parse_args()
 
     if args.extra == 'foreknowledge elastic':
-        foreknowledge_evaluation(AlibabaModelDist(args.tasks, args.servers), run_elastic=True)
+        foreknowledge_evaluation(AlibabaModelDist(args.tasks, args.servers, seed=args.seed, first_repeat=args.repeat),
+                                 run_elastic=True)
     elif args.extra == 'foreknowledge non-elastic':
-        foreknowledge_evaluation(AlibabaModelDist(args.tasks, args.servers), run_elastic=False)
+        foreknowledge_evaluation(AlibabaModelDist(args.tasks, args.servers, seed=args.seed, first_repeat=args.repeat),
+                                 run_elastic=False)
     elif args.extra == 'task sizing':
         task_sizing()
     if args.extra == 'server sizing':
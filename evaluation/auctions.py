@@ -36,7 +36,8 @@ def auction_evaluation(model_dist: ModelDist, repeats: int = 50, dia_time_limit:
 
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
-        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(model_dist, pretty_printer)
+        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(
+            model_dist, pretty_printer, repeat)
 
         if run_elastic:
             # Elastic VCG Auctions
@@ -79,10 +80,11 @@ def auction_evaluation(model_dist: ModelDist, repeats: int = 50, dia_time_limit:
 
 if __name__ == "__main__":
     args = parse_args()
+    model_dist = get_model(args.model, args.tasks, args.servers, args.seed, args.repeat, args.instances)
 
     if args.extra == '' or args.extra == 'elastic optimal':
-        auction_evaluation(get_model(args.model, args.tasks, args.servers), run_elastic=True, run_non_elastic=True)
+        auction_evaluation(model_dist, run_elastic=True, run_non_elastic=True)
     elif args.extra == 'non-elastic optimal':
-        auction_evaluation(get_model(args.model, args.tasks, args.servers), run_elastic=False, run_non_elastic=True)
+        auction_evaluation(model_dist, run_elastic=False, run_non_elastic=True)
     elif args.extra == 'greedy':
-        auction_evaluation(get_model(args.model, args.tasks, args.servers), run_elastic=False, run_non_elastic=False)
+        auction_evaluation(model_dist, run_elastic=False, run_non_elastic=False)
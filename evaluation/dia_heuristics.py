@@ -38,7 +38,8 @@ def dia_heuristic_grid_search(model_dist: ModelDist, repeats: int = 50, time_lim
 
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
-        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(model_dist, pretty_printer)
+        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(
+            model_dist, pretty_printer, repeat)
 
         for initial_price in initial_prices:
             for price_change in price_changes:
@@ -83,7 +84,8 @@ def non_uniform_server_heuristics(model_dist: ModelDist, repeats: int = 20,
 
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
-        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(model_dist, pretty_printer)
+        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(
+            model_dist, pretty_printer, repeat)
 
         set_server_heuristics(servers, price_change=price_change_mean, initial_price=initial_price_mean)
         dia_result = optimal_decentralised_iterative_auction(tasks, servers, time_limit)
@@ -110,10 +112,11 @@ def non_uniform_server_heuristics(model_dist: ModelDist, repeats: int = 20,
 
 if __name__ == "__main__":
     args = parse_args()
+    model_dist = get_model(args.model, args.tasks, args.servers, args.seed, args.repeat, args.instances)
 
     if args.extra == '' or args.extra == 'heuristic grid search':
-        dia_heuristic_grid_search(get_model(args.model, args.tasks, args.servers))
+        dia_heuristic_grid_search(model_dist)
     elif args.extra == 'non uniform heuristics':
-        non_uniform_server_heuristics(get_model(args.model, args.tasks, args.servers))
+        non_uniform_server_heuristics(model_dist)
     else:
         raise Exception(f'Unknown extra argument: {args.extra}')
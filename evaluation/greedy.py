@@ -38,7 +38,8 @@ def greedy_evaluation(model_dist: ModelDist, repeats: int = 50, run_elastic_opti
 
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
-        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(model_dist, pretty_printer)
+        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(
+            model_dist, pretty_printer, repeat)
 
         if run_elastic_optimal:
             # Find the optimal solution
@@ -89,7 +90,8 @@ def lower_bound_testing(model_dist: ModelDist, repeats: int = 50):
     lb_task_functions = task_priority_functions + [ValuePriority()]
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
-        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(model_dist, pretty_printer)
+        tasks, servers, non_elastic_tasks, algorithm_results = generate_evaluation_model(
+            model_dist, pretty_printer, repeat)
 
         # Loop over all of the greedy policies permutations
         for task_priority in lb_task_functions:
@@ -127,8 +129,8 @@ def algorithm_sizes(model_dist: ModelDist, repeats: int = 30):
         model_dist.num_servers = num_servers
 
         model_results = []
-        for _ in range(repeats):
-            tasks, servers = model_dist.generate_oneshot()
+        for repeat in range(repeats):
+            tasks, servers = model_dist.generate_oneshot(repeat)
             results = greedy_algorithm(tasks, servers,
                                        task_priority=UtilityDeadlinePerResourcePriority(ResourceSumPriority()),
                                        server_selection=ProductResources(), resource_allocation=SumPowPercentage())
@@ -143,20 +145,21 @@ def algorithm_sizes(model_dist: ModelDist, repeats: int = 30):
 
 if __name__ == "__main__":
     args = parse_args()
+    model_dist = get_model(args.model, args.tasks, args.servers, args.seed, args.repeat, args.instances)
 
     if args.extra == '' or args.extra == 'elastic optimal':
-        greedy_evaluation(get_model(args.model, args.tasks, args.servers),
+        greedy_evaluation(model_dist,
                           run_elastic_optimal=True, run_non_elastic_optimal=True, run_server_relaxed_optimal=True)
     elif args.extra == 'relaxed optimal':
-        greedy_evaluation(get_model(args.model, args.tasks, args.servers),
+        greedy_evaluation(model_dist,
                           run_elastic_optimal=False, run_server_relaxed_optimal=True, run_non_elastic_optimal=True)
     elif args.extra == 'non-elastic optimal':
-        greedy_evaluation(get_model(args.model, args.tasks, args.servers),
+        greedy_evaluation(model_dist,
                           run_elastic_optimal=False, run_server_relaxed_optimal=False, run_non_elastic_optimal=True)
     elif args.extra == 'greedy':
-        greedy_evaluation(get_model(args.model, args.tasks, args.servers),
+        greedy_evaluation(model_dist,
                           run_elastic_optimal=False, run_non_elastic_optimal=False, run_server_relaxed_optimal=False)
     elif args.extra == 'lower bound':
-        lower_bound_testing(get_model(args.model, args.tasks, args.servers))
+        lower_bound_testing(model_dist)
     elif args.extra == 'model size':
-        algorithm_sizes(get_model(args.model, args.tasks, args.servers))
+        algorithm_sizes(model_dist)
@@ -16,7 +16,7 @@ from src.auctions.decentralised_iterative_auction import optimal_decentralised_i
 from src.core.core import reset_model, set_server_heuristics
 from src.core.elastic_task import ElasticTask
 from src.extra.io import parse_args, results_filename
-from src.extra.model import ModelDist, get_model, generate_evaluation_model
+from src.extra.model import ModelDist, get_model, generate_evaluation_model, MUTATION_STREAM
 
 if TYPE_CHECKING:
     from typing import TypeVar, List
@@ -58,7 +58,7 @@ def full_task_mutation(model_dist: ModelDist, repeats: int = 25, time_limit: int
 
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
-        tasks, servers = model_dist.generate_oneshot()
+        tasks, servers = model_dist.generate_oneshot(repeat)
         set_server_heuristics(servers, price_change=price_change, initial_price=initial_price)
 
         mutation_results = {'model': {
@@ -78,10 +78,13 @@ def full_task_mutation(model_dist: ModelDist, repeats: int = 25, time_limit: int
         reset_model(tasks, servers)
 
         # Loop each time mutating a task or server and find the auction results and compare to the unmutated result
+        mutation_rng = model_dist.rng(repeat, MUTATION_STREAM)
         for model_mutation in range(min(model_mutations, len(to_mutate_tasks))):
             # Choice a random task and mutate it
-            task: ElasticTask = to_mutate_tasks.pop(rnd.randint(0, len(to_mutate_tasks) - 1))
-            mutant_task = task.mutate(mutate_percent)
+            mutation_pos = rnd.randint(0, len(to_mutate_tasks) - 1) if mutation_rng is None else \
+                int(mutation_rng.integers(len(to_mutate_tasks)))
+            task: ElasticTask = to_mutate_tasks.pop(mutation_pos)
+            mutant_task = task.mutate(mutate_percent, mutation_rng)
 
             # Replace the task with the mutant task in the task list
             list_item_replacement(tasks, task, mutant_task)
@@ -211,7 +214,7 @@ def value_only_mutation(model_dist: ModelDist, repeats: int = 25, time_limit: in
 
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
-        tasks, servers = model_dist.generate_oneshot()
+        tasks, servers = model_dist.generate_oneshot(repeat)
         set_server_heuristics(servers, price_change=price_change, initial_price=initial_price)
 
         mutation_results = {'model': {
@@ -229,6 +232,7 @@ def value_only_mutation(model_dist: ModelDist, repeats: int = 25, time_limit: in
         reset_model(tasks, servers)
 
         # Loop each time mutating a task or server and find the auction results and compare to the unmutated result
+        mutation_rng = model_dist.rng(repeat, MUTATION_STREAM)
         for model_mutation in range(min(model_mutations, len(to_mutate_tasks))):
             # Choice a random task and mutate it
             task: ElasticTask = to_mutate_tasks.pop(rnd.randint(0, len(to_mutate_tasks) - 1))
@@ -278,7 +282,8 @@ def dia_repeat(model_dist: ModelDist, repeats: int = 25, auction_repeats: int =
 
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
-        tasks, servers, non_elastic_tasks, repeat_results = generate_evaluation_model(model_dist, pretty_printer)
+        tasks, servers, non_elastic_tasks, repeat_results = generate_evaluation_model(
+            model_dist, pretty_printer, repeat)
         set_server_heuristics(servers, price_change=price_change, initial_price=initial_price)
 
         for auction_repeat in range(auction_repeats):
@@ -296,14 +301,15 @@ def dia_repeat(model_dist: ModelDist, repeats: int = 25, auction_repeats: int =
 
 if __name__ == "__main__":
     args = parse_args()
+    model_dist = get_model(args.model, args.tasks, args.servers, args.seed, args.repeat, args.instances)
 
     if args.extra == '' or args.extra == 'task mutation':
-        full_task_mutation(get_model(args.model, args.tasks, args.servers))
+        full_task_mutation(model_dist)
     elif args.extra == 'mutation grid search':
-        mutation_grid_search(get_model(args.model, args.tasks, args.servers))
+        mutation_grid_search(model_dist)
     elif args.extra == 'value only':
-        value_only_mutation(get_model(args.model, args.tasks, args.servers))
+        value_only_mutation(model_dist)
     elif args.extra == 'dia repeat':
-        dia_repeat(get_model(args.model, args.tasks, args.servers))
+        dia_repeat(model_dist)
     else:
         raise Exception(f'Unknown extra argument: {args.extra}')
@@ -6,25 +6,52 @@ All of the other evaluation scripts test the algorithm within a static / one-sho
 from __future__ import annotations
 
 import json
+import os
+import re
+from typing import Optional
 
 from src.core.core import reset_model
 from src.core.non_elastic_task import generate_non_elastic_tasks
 from src.extra.io import results_filename, parse_args
+from src.extra.metrics import MetricsRecorder
 from src.extra.model import ModelDist, get_model
-from src.extra.online import online_batch_solver, generate_batch_tasks
+from src.extra.online import online_batch_solver, generate_batch_tasks, SolverChain, RollingHorizonSolver
+from src.extra.result import Result
 from src.greedy.greedy import greedy_algorithm
 from src.greedy.resource_allocation import SumPowPercentage
 from src.greedy.server_selection import ProductResources, SumResources
 from src.greedy.task_priority import UtilityDeadlinePerResourcePriority, ResourceSumPriority, ResourceProductPriority, \
     ValuePriority
-from src.optimal.elastic_optimal import elastic_optimal_solver
+from src.optimal.elastic_optimal import elastic_optimal_solver, IncrementalElasticOptimal
 from src.optimal.non_elastic_optimal import non_elastic_optimal_solver
 
 
+def store_metrics(result: Result, metrics: MetricsRecorder, filename: str, repeat: int, **kwargs) -> dict:
+    """
+    Saves the metrics of an online algorithm next to the results file and returns the results values for storage with
+        the metrics filename in place of the server usage of each batch (that the metrics already hold)
+
+    :param result: The online algorithm results
+    :param metrics: The metrics recorder of the algorithm
+    :param filename: The results filename
+    :param repeat: The repeat number
+    :param kwargs: Additional results values
+    :return: The results values
+    """
+    metrics_filename = f'{os.path.splitext(filename)[0]}_r{repeat}_' \
+                       f'{re.sub("[^a-z0-9]+", "_", result.algorithm.lower())}.npz'
+    metrics.save(metrics_filename)
+    for key in ('server storage used', 'server computation used', 'server bandwidth used',
+                'server num tasks allocated'):
+        result.data.pop(key, None)
+    return result.store(metrics=metrics_filename, **kwargs)
+
+
 def online_evaluation(model_dist: ModelDist, repeats: int = 20, time_steps: int = 200,
                       mean_arrival_rate: float = 1, std_arrival_rate: float = 2,
                       task_priority=UtilityDeadlinePerResourcePriority(ResourceSumPriority()),
-                      server_selection=ProductResources(), resource_allocation=SumPowPercentage()):
+                      server_selection=ProductResources(), resource_allocation=SumPowPercentage(),
+                      chain_time_budget: Optional[float] = None, incremental_optimal: bool = False):
     """
     Evaluates the batch online
 
@@ -36,6 +63,10 @@ def online_evaluation(model_dist: ModelDist, repeats: int = 20, time_steps: int
     :param task_priority: The task prioritisation function
     :param server_selection: Server selection policy
     :param resource_allocation: Resource allocation policy
+    :param chain_time_budget: The per-batch time budget of the greedy then elastic optimal solver chain, if None then
+        the solver chain is not run
+    :param incremental_optimal: If to use the incremental elastic optimal solver with the previous batch's allocation as
+        the starting point for the elastic optimal solution
     """
     print(f'Evaluates difference in performance between batch and online algorithm for {model_dist.name} model with '
           f'{model_dist.num_tasks} tasks and {model_dist.num_servers} servers')
@@ -49,7 +80,7 @@ def online_evaluation(model_dist: ModelDist, repeats: int = 20, time_steps: int
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
         # Generate the tasks and servers
-        tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+        tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate, repeat)
         algorithm_results = {'model': {
             'tasks': [task.save() for task in tasks], 'servers': [server.save() for server in servers]
         }}
@@ -65,25 +96,48 @@ def online_evaluation(model_dist: ModelDist, repeats: int = 20, time_steps: int
         flattened_elastic_tasks = [task for tasks in batched_elastic_tasks for task in tasks]
         flattened_non_elastic_tasks = [task for tasks in batched_non_elastic_tasks for task in tasks]
 
-        elastic_optimal_result = online_batch_solver(batched_elastic_tasks, servers, batch_length,
-                                                     'Elastic Optimal', elastic_optimal_solver, time_limit=None)
-        algorithm_results[elastic_optimal_result.algorithm] = elastic_optimal_result.store()
+        metrics = MetricsRecorder(servers, len(batched_elastic_tasks))
+        if incremental_optimal:
+            elastic_optimal_result = online_batch_solver(batched_elastic_tasks, servers, batch_length,
+                                                         'Elastic Optimal', IncrementalElasticOptimal(time_limit=None),
+                                                         metrics=metrics, skip_idle=True)
+        else:
+            elastic_optimal_result = online_batch_solver(batched_elastic_tasks, servers, batch_length,
+                                                         'Elastic Optimal', elastic_optimal_solver, metrics=metrics,
+                                                         skip_idle=True, time_limit=None)
+        algorithm_results[elastic_optimal_result.algorithm] = store_metrics(elastic_optimal_result, metrics, filename,
+                                                                            repeat)
         reset_model(flattened_elastic_tasks, servers)
 
+        metrics = MetricsRecorder(servers, len(batched_non_elastic_tasks))
         non_elastic_optimal_result = online_batch_solver(batched_non_elastic_tasks, servers, batch_length,
                                                          'Non-elastic Optimal', non_elastic_optimal_solver,
-                                                         time_limit=None)
-        algorithm_results[non_elastic_optimal_result.algorithm] = non_elastic_optimal_result.store()
+                                                         metrics=metrics, skip_idle=True, time_limit=None)
+        algorithm_results[non_elastic_optimal_result.algorithm] = store_metrics(non_elastic_optimal_result, metrics,
+                                                                                filename, repeat)
         reset_model(flattened_non_elastic_tasks, servers)
 
         # Loop over all of the greedy policies permutations
+        metrics = MetricsRecorder(servers, len(batched_elastic_tasks))
         greedy_result = online_batch_solver(batched_elastic_tasks, servers, batch_length,
-                                            greedy_name, greedy_algorithm,
+                                            greedy_name, greedy_algorithm, metrics=metrics, skip_idle=True,
                                             task_priority=task_priority, server_selection=server_selection,
                                             resource_allocation=resource_allocation)
-        algorithm_results[greedy_result.algorithm] = greedy_result.store()
+        algorithm_results[greedy_result.algorithm] = store_metrics(greedy_result, metrics, filename, repeat)
         reset_model(flattened_elastic_tasks, servers)
 
+        if chain_time_budget is not None:
+            # Greedy then elastic optimal within the per-batch time budget
+            metrics = MetricsRecorder(servers, len(batched_elastic_tasks))
+            solver_chain = SolverChain(chain_time_budget, task_priority, server_selection, resource_allocation)
+            chain_result = online_batch_solver(batched_elastic_tasks, servers, batch_length,
+                                               'Greedy Elastic Optimal Chain', solver_chain, metrics=metrics)
+            algorithm_results[chain_result.algorithm] = store_metrics(chain_result, metrics, filename, repeat, **{
+                'time budget': chain_time_budget, 'batch latency': solver_chain.batch_latencies,
+                'batch stage': solver_chain.batch_stages
+            })
+            reset_model(flattened_elastic_tasks, servers)
+
         # Add the results to the data
         model_results.append(algorithm_results)
 
@@ -113,7 +167,7 @@ def greedy_permutations(model_dist: ModelDist, repeats: int = 20, time_steps: in
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
         # Generate the tasks and servers
-        tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+        tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate, repeat)
         algorithm_results = {'model': {
             'tasks': [task.save() for task in tasks], 'servers': [server.save() for server in servers]
         }}
@@ -137,11 +191,12 @@ def greedy_permutations(model_dist: ModelDist, repeats: int = 20, time_steps: in
         ]:
             greedy_name = f'Greedy {task_priority.name}, {server_selection.name}, ' \
                           f'{resource_allocation.name}'
+            metrics = MetricsRecorder(servers, len(batched_tasks))
             greedy_result = online_batch_solver(batched_tasks, servers, batch_length, greedy_name,
-                                                greedy_algorithm, task_priority=task_priority,
-                                                server_selection=server_selection,
+                                                greedy_algorithm, metrics=metrics, skip_idle=True,
+                                                task_priority=task_priority, server_selection=server_selection,
                                                 resource_allocation=resource_allocation)
-            algorithm_results[greedy_result.algorithm] = greedy_result.store()
+            algorithm_results[greedy_result.algorithm] = store_metrics(greedy_result, metrics, filename, repeat)
             print(greedy_name)
             reset_model(flattened_tasks, servers)
 
@@ -153,23 +208,91 @@ def greedy_permutations(model_dist: ModelDist, repeats: int = 20, time_steps: in
     print('Finished running')
 
 
+def rolling_horizon_evaluation(model_dist: ModelDist, repeats: int = 20, time_steps: int = 200,
+                               mean_arrival_rate: float = 2, std_arrival_rate: float = 2, batch_length: int = 1,
+                               task_priority=UtilityDeadlinePerResourcePriority(ResourceSumPriority()),
+                               server_selection=ProductResources(), resource_allocation=SumPowPercentage()):
+    """
+    Evaluates the admission throughput of the greedy algorithm with static speeds compared to the rolling horizon
+        re-optimisation of the running task speeds
+
+    :param model_dist: The model distribution
+    :param repeats: The number of repeats
+    :param time_steps: Total number of time steps
+    :param mean_arrival_rate: Mean arrival rate of tasks
+    :param std_arrival_rate: Standard deviation arrival rate of tasks
+    :param batch_length: The batch length
+    :param task_priority: The task prioritisation function
+    :param server_selection: Server selection policy
+    :param resource_allocation: Resource allocation policy
+    """
+    print(f'Evaluates the rolling horizon re-optimisation for {model_dist.name} model')
+    model_results = []
+
+    filename = results_filename('online_rolling_horizon', model_dist)
+    for repeat in range(repeats):
+        print(f'\nRepeat: {repeat}')
+        tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate, repeat)
+        algorithm_results = {'model': {
+            'tasks': [task.save() for task in tasks], 'servers': [server.save() for server in servers]
+        }}
+
+        valid_tasks = [task for task in tasks if batch_length < task.deadline]
+        batched_tasks = generate_batch_tasks(valid_tasks, batch_length, time_steps)
+        flattened_tasks = [task for tasks in batched_tasks for task in tasks]
+
+        metrics = MetricsRecorder(servers, len(batched_tasks))
+        greedy_result = online_batch_solver(batched_tasks, servers, batch_length, 'Greedy Static Speeds',
+                                            greedy_algorithm, metrics=metrics, skip_idle=True,
+                                            task_priority=task_priority, server_selection=server_selection,
+                                            resource_allocation=resource_allocation)
+        algorithm_results[greedy_result.algorithm] = store_metrics(greedy_result, metrics, filename, repeat, **{
+            'tasks allocated': sum(task.running_server is not None for task in flattened_tasks)
+        })
+        reset_model(flattened_tasks, servers)
+
+        metrics = MetricsRecorder(servers, len(batched_tasks))
+        rolling_horizon_solver = RollingHorizonSolver(batch_length, greedy_algorithm, task_priority=task_priority,
+                                                      server_selection=server_selection,
+                                                      resource_allocation=resource_allocation)
+        rolling_horizon_result = online_batch_solver(batched_tasks, servers, batch_length, 'Greedy Rolling Horizon',
+                                                     rolling_horizon_solver, metrics=metrics)
+        algorithm_results[rolling_horizon_result.algorithm] = store_metrics(
+            rolling_horizon_result, metrics, filename, repeat, **{
+                'tasks allocated': sum(task.running_server is not None for task in flattened_tasks),
+                'batch tasks allocated': rolling_horizon_solver.batch_tasks_allocated
+            })
+        reset_model(flattened_tasks, servers)
+
+        print(f'Tasks allocated - static speeds: {algorithm_results[greedy_result.algorithm]["tasks allocated"]}, '
+              f'rolling horizon: {algorithm_results[rolling_horizon_result.algorithm]["tasks allocated"]}')
+        model_results.append(algorithm_results)
+
+        # Save the results to the file
+        with open(filename, 'w') as file:
+            json.dump(model_results, file)
+    print('Finished running')
+
+
 if __name__ == "__main__":
     args = parse_args()
 
-    if args.model == 'alibaba':
-        online_evaluation(get_model(args.model, args.tasks, args.servers),
+    if args.extra == 'rolling horizon':
+        rolling_horizon_evaluation(get_model(args.model, args.tasks, args.servers, args.seed, args.repeat))
+    elif args.model == 'alibaba':
+        online_evaluation(get_model(args.model, args.tasks, args.servers, args.seed, args.repeat),
                           time_steps=500, mean_arrival_rate=1.5, std_arrival_rate=1)
     elif args.model == 'synthetic':
-        online_evaluation(get_model(args.model, args.tasks, args.servers),
+        online_evaluation(get_model(args.model, args.tasks, args.servers, args.seed, args.repeat),
                           time_steps=250, mean_arrival_rate=3, std_arrival_rate=1)
     else:
         if args.extra == 'greedy':
             print(f'Running greedy permutations for {args.model}')
             if args.model == 'alibaba':
-                greedy_permutations(get_model(args.model, args.tasks, args.servers),
+                greedy_permutations(get_model(args.model, args.tasks, args.servers, args.seed, args.repeat),
                                     time_steps=500, mean_arrival_rate=1.5, std_arrival_rate=1)
             elif args.model == 'synthetic':
-                online_evaluation(get_model(args.model, args.tasks, args.servers),
+                online_evaluation(get_model(args.model, args.tasks, args.servers, args.seed, args.repeat),
                                   time_steps=250, mean_arrival_rate=3, std_arrival_rate=1)
         else:
-            online_evaluation(get_model(args.model, args.tasks, args.servers))
+            online_evaluation(get_model(args.model, args.tasks, args.servers, args.seed, args.repeat))
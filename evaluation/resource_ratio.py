@@ -12,8 +12,8 @@ from src.core.core import reset_model
 from src.extra.io import parse_args, results_filename
 from src.extra.model import ModelDist, get_model, generate_evaluation_model
 from src.greedy.greedy import greedy_permutations
-from src.optimal.non_elastic_optimal import non_elastic_optimal
-from src.optimal.elastic_optimal import elastic_optimal
+from src.optimal.non_elastic_optimal import ParametricNonElasticOptimal
+from src.optimal.elastic_optimal import ParametricElasticOptimal
 
 
 # noinspection DuplicatedCode
@@ -37,10 +37,14 @@ def server_resource_ratio(model_dist: ModelDist, repeats: int = 25, run_elastic:
     for repeat in range(repeats):
         print(f'\nRepeat: {repeat}')
         # Generate the tasks and servers
-        tasks, servers, non_elastic_tasks, ratio_results = generate_evaluation_model(model_dist, pretty_printer)
+        tasks, servers, non_elastic_tasks, ratio_results = generate_evaluation_model(
+            model_dist, pretty_printer, repeat)
 
         server_total_resources = {server: server.computation_capacity + server.bandwidth_capacity
                                   for server in servers}
+        # The optimal models are built once with the server capacities updated for each ratio
+        elastic_model = ParametricElasticOptimal(tasks, servers) if run_elastic else None
+        non_elastic_model = ParametricNonElasticOptimal(non_elastic_tasks, servers) if run_non_elastic else None
         for ratio in ratios:
             algorithm_results = {}
             # Update server capacities
@@ -50,14 +54,14 @@ def server_resource_ratio(model_dist: ModelDist, repeats: int = 25, run_elastic:
 
             if run_elastic:
                 # Finds the elastic optimal solution
-                elastic_optimal_results = elastic_optimal(tasks, servers, time_limit=None)
+                elastic_optimal_results = elastic_model.solve(time_limit=None)
                 algorithm_results[elastic_optimal_results.algorithm] = elastic_optimal_results.store(ratio=ratio)
                 pretty_printer.pprint(algorithm_results[elastic_optimal_results.algorithm])
                 reset_model(tasks, servers)
 
             if run_non_elastic:
                 # Find the non-elastic optimal solution
-                non_elastic_results = non_elastic_optimal(non_elastic_tasks, servers, time_limit=non_elastic_time_limit)
+                non_elastic_results = non_elastic_model.solve(time_limit=non_elastic_time_limit)
                 algorithm_results[non_elastic_results.algorithm] = non_elastic_results.store(ratio=ratio)
                 non_elastic_results.pretty_print()
                 reset_model(non_elastic_tasks, servers)
@@ -76,10 +80,10 @@ def server_resource_ratio(model_dist: ModelDist, repeats: int = 25, run_elastic:
 
 if __name__ == "__main__":
     args = parse_args()
+    model_dist = get_model(args.model, args.tasks, args.servers, args.seed, args.repeat, args.instances)
     if args.extra == '' or args.extra == 'elastic optimal':
-        server_resource_ratio(get_model(args.model, args.tasks, args.servers))
+        server_resource_ratio(model_dist)
     elif args.extra == 'non-elastic optimal':
-        server_resource_ratio(get_model(args.model, args.tasks, args.servers), run_elastic=False)
+        server_resource_ratio(model_dist, run_elastic=False)
     elif args.extra == 'time limited':
-        server_resource_ratio(get_model(args.model, args.tasks, args.servers),
-                              run_elastic=False, run_non_elastic=True, non_elastic_time_limit=60)
+        server_resource_ratio(model_dist, run_elastic=False, run_non_elastic=True, non_elastic_time_limit=60)
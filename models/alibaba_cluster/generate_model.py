@@ -1,47 +1,202 @@
 """
 Generates the alibaba model
+
+The batch instances are merged with the batch tasks in parallel, the batch tasks are hash partitioned on the merge
+    columns such that each batch instance chunk is split by the same hash and merged with only the matching batch task
+    partition in a process pool. The merged partitions are saved as typed npz files and streamed to the final csv.
+
+Run from the repository root, i.e. python -m models.alibaba_cluster.generate_model --data-dir <trace directory>
 """
 
+from __future__ import annotations
+
+import argparse
 import os
+from functools import partial
+from multiprocessing import Pool
+from typing import TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+
 batch_tasks_col_names = ['task_name', 'instance_num', 'job_name', 'task_type', 'status',
                          'start_time', 'end_time', 'plan_cpu', 'plan_mem']
-batch_tasks: pd.DataFrame = pd.read_csv('batch_task.csv', names=batch_tasks_col_names)
-print(batch_tasks)
-batch_tasks = batch_tasks[(batch_tasks['instance_num'] == 1) & (batch_tasks['status'] == 'Terminated') &
-                          (0 < batch_tasks['plan_cpu']) & (batch_tasks['plan_cpu'] < 600) &
-                          (0 < batch_tasks['plan_mem']) & (batch_tasks['plan_mem'] < 4)]
+batch_instance_col_names = ['instance_name', 'task_name', 'job_name', 'task_type', 'status', 'start_time', 'end_time',
+                            'machine_id', 'seq_no', 'total_seq_no', 'cpu_avg', 'cpu_max', 'mem_avg', 'mem_max']
+merge_col_names = ['task_name', 'job_name', 'start_time', 'end_time']
+batch_task_instance_col_names = ['task_name', 'job_name', 'time_taken', 'plan_cpu', 'plan_mem',
+                                 'cpu_avg', 'cpu_max', 'mem_avg', 'mem_max']
 
-batch_tasks = batch_tasks[['task_name', 'job_name', 'start_time', 'end_time', 'plan_cpu', 'plan_mem']]
-print('Saving')
-batch_tasks.to_csv('batch_task_reduced.csv', index=False)
-print('Saved')
+# The batch task partitions of the pool workers
+_batch_task_partitions: Dict[int, pd.DataFrame] = {}
 
-batch_tasks: pd.DataFrame = pd.read_csv('batch_task_reduced.csv')
-print(batch_tasks)
 
-chuck_size = 4000000
-batch_instance_col_names = ['instance_name', 'task_name', 'job_name', 'task_type', 'status', 'start_time', 'end_time',
-                            'machine_id', 'seq_no', 'total_seq_no', 'cpu_avg', 'cpu_max', 'mem_avg', 'mem_max']
-with pd.read_csv('batch_instance.csv',
-                 chunksize=chuck_size, names=batch_instance_col_names) as batch_instance_reader:
-    for pos, batch_instance_chunk in enumerate(batch_instance_reader):
-        print(pos)
-        batch_task_instances = pd.merge(batch_tasks, batch_instance_chunk,
-                                        on=['task_name', 'job_name', 'start_time', 'end_time'])
-        # ['task_name', 'job_name', 'start_time', 'end_time', 'plan_cpu',
-        #        'plan_mem', 'instance_name', 'task_type', 'status', 'machine_id',
-        #        'seq_no', 'total_seq_no', 'cpu_avg', 'cpu_max', 'mem_avg', 'mem_max']
-        batch_task_instances.to_csv(f'batch_task_instances/instance_{pos}.csv', index=False)
-
-batch_task_instances = [pd.read_csv(f'batch_task_instances/{filename}')
-                        for filename in os.listdir('batch_task_instances')]
-batch_task_instances = pd.concat(batch_task_instances)
-batch_task_instances['time_taken'] = batch_task_instances['end_time'] - batch_task_instances['start_time']
-batch_task_instances = batch_task_instances[10 < batch_task_instances['time_taken']]
-batch_task_instances = batch_task_instances[['task_name', 'job_name', 'time_taken', 'plan_cpu', 'plan_mem',
-                                             'cpu_avg', 'cpu_max', 'mem_avg', 'mem_max']]
-
-batch_task_instances.to_csv('batch_task_instances.csv', index=False)
+def reduce_batch_tasks(filename: str) -> pd.DataFrame:
+    """
+    Reduces the batch tasks to the terminated single instance tasks with valid cpu and memory plans
+
+    :param filename: The batch task filename
+    :return: The reduced batch tasks
+    """
+    batch_tasks: pd.DataFrame = pd.read_csv(filename, names=batch_tasks_col_names)
+    print(batch_tasks)
+    batch_tasks = batch_tasks[(batch_tasks['instance_num'] == 1) & (batch_tasks['status'] == 'Terminated') &
+                              (0 < batch_tasks['plan_cpu']) & (batch_tasks['plan_cpu'] < 600) &
+                              (0 < batch_tasks['plan_mem']) & (batch_tasks['plan_mem'] < 4)]
+    return batch_tasks[['task_name', 'job_name', 'start_time', 'end_time', 'plan_cpu', 'plan_mem']]
+
+
+def typed_merge_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Casts the merge columns to the same types for the batch tasks and instances such that the hashes are equal
+
+    :param df: The dataframe
+    :return: The dataframe with typed merge columns
+    """
+    return df.astype({'task_name': str, 'job_name': str, 'start_time': np.float64, 'end_time': np.float64})
+
+
+def hash_partitions(df: pd.DataFrame, num_partitions: int) -> np.ndarray:
+    """
+    The hash partition of each row from the merge columns
+
+    :param df: The dataframe
+    :param num_partitions: The number of partitions
+    :return: The partition of each row
+    """
+    return (pd.util.hash_pandas_object(df[merge_col_names], index=False).to_numpy() % num_partitions).astype(np.int64)
+
+
+def save_partition(df: pd.DataFrame, filename: str):
+    """
+    Saves the dataframe columns as typed arrays (strings as fixed width unicode) to a npz file
+
+    :param df: The dataframe
+    :param filename: The npz filename
+    """
+    np.savez(filename, **{column: df[column].to_numpy(dtype=None if pd.api.types.is_numeric_dtype(df[column]) else str)
+                          for column in df.columns})
+
+
+def load_partition(filename: str) -> pd.DataFrame:
+    """
+    Loads a dataframe saved with save_partition
+
+    :param filename: The npz filename
+    :return: The dataframe
+    """
+    with np.load(filename) as data:
+        return pd.DataFrame({column: data[column] for column in data.files})
+
+
+def partition_batch_tasks(batch_tasks: pd.DataFrame, partition_dir: str, num_partitions: int):
+    """
+    Hash partitions the batch tasks on the merge columns
+
+    :param batch_tasks: The batch tasks
+    :param partition_dir: The partition directory
+    :param num_partitions: The number of partitions
+    """
+    os.makedirs(partition_dir, exist_ok=True)
+    batch_tasks = typed_merge_columns(batch_tasks)
+    partitions = hash_partitions(batch_tasks, num_partitions)
+    for partition in range(num_partitions):
+        save_partition(batch_tasks[partitions == partition], os.path.join(partition_dir, f'tasks_{partition}.npz'))
+
+
+def init_merge_worker(partition_dir: str, num_partitions: int):
+    """
+    Pool worker initializer that loads the batch task partitions
+
+    :param partition_dir: The partition directory
+    :param num_partitions: The number of partitions
+    """
+    global _batch_task_partitions
+    _batch_task_partitions = {partition: load_partition(os.path.join(partition_dir, f'tasks_{partition}.npz'))
+                              for partition in range(num_partitions)}
+
+
+def merge_batch_instance_chunk(pos_chunk: Tuple[int, pd.DataFrame], output_dir: str, num_partitions: int) -> str:
+    """
+    Merges a batch instance chunk with the batch task partitions and saves the batch task instances
+
+    :param pos_chunk: The chunk position and batch instance chunk
+    :param output_dir: The output directory
+    :param num_partitions: The number of partitions
+    :return: The batch task instances filename
+    """
+    pos, batch_instance_chunk = pos_chunk
+    batch_instance_chunk = typed_merge_columns(batch_instance_chunk.dropna(subset=merge_col_names))
+    partitions = hash_partitions(batch_instance_chunk, num_partitions)
+
+    merged_partitions = []
+    for partition in np.unique(partitions):
+        batch_task_instances = pd.merge(_batch_task_partitions[partition],
+                                        batch_instance_chunk[partitions == partition], on=merge_col_names)
+        batch_task_instances['time_taken'] = (batch_task_instances['end_time'] -
+                                              batch_task_instances['start_time']).astype(np.int64)
+        merged_partitions.append(batch_task_instances[10 < batch_task_instances['time_taken']]
+                                 [batch_task_instance_col_names])
+
+    filename = os.path.join(output_dir, f'instance_{pos}.npz')
+    save_partition(pd.concat(merged_partitions) if merged_partitions
+                   else pd.DataFrame(columns=batch_task_instance_col_names), filename)
+    return filename
+
+
+def merge_batch_instances(instance_filename: str, partition_dir: str, output_dir: str, num_partitions: int,
+                          chunk_size: int = 4000000, processes: Optional[int] = None) -> List[str]:
+    """
+    Merges the batch instance chunks with the batch task partitions in a process pool
+
+    :param instance_filename: The batch instance filename
+    :param partition_dir: The batch task partition directory
+    :param output_dir: The output directory
+    :param num_partitions: The number of partitions
+    :param chunk_size: The number of batch instance rows in each chunk
+    :param processes: The number of processes, if None then the number of cpus
+    :return: List of the batch task instances filenames in order
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    merge_chunk = partial(merge_batch_instance_chunk, output_dir=output_dir, num_partitions=num_partitions)
+    with pd.read_csv(instance_filename, chunksize=chunk_size, names=batch_instance_col_names) as reader, \
+            Pool(processes, initializer=init_merge_worker, initargs=(partition_dir, num_partitions)) as pool:
+        filenames = []
+        for filename in pool.imap(merge_chunk, enumerate(reader)):
+            print(filename)
+            filenames.append(filename)
+        return filenames
+
+
+def write_batch_task_instances(filenames: List[str], filename: str):
+    """
+    Streams the batch task instances partitions to a single csv file
+
+    :param filenames: List of the batch task instances partition filenames
+    :param filename: The csv filename
+    """
+    with open(filename, 'w') as file:
+        file.write(','.join(batch_task_instance_col_names) + '\n')
+        for partition_filename in filenames:
+            load_partition(partition_filename).to_csv(file, header=False, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Alibaba cluster batch task instances')
+    parser.add_argument('-d', '--data-dir', default='.', help='The trace data directory')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='The number of processes')
+    parser.add_argument('-n', '--partitions', type=int, default=64, help='The number of batch task partitions')
+    parser.add_argument('-c', '--chunk-size', type=int, default=4000000, help='The batch instance chunk size')
+    args = parser.parse_args()
+
+    reduced_batch_tasks = reduce_batch_tasks(os.path.join(args.data_dir, 'batch_task.csv'))
+    print(reduced_batch_tasks)
+    partition_batch_tasks(reduced_batch_tasks, os.path.join(args.data_dir, 'batch_task_partitions'), args.partitions)
+
+    instance_filenames = merge_batch_instances(
+        os.path.join(args.data_dir, 'batch_instance.csv'), os.path.join(args.data_dir, 'batch_task_partitions'),
+        os.path.join(args.data_dir, 'batch_task_instances'), args.partitions, args.chunk_size, args.processes)
+    write_batch_task_instances(instance_filenames, os.path.join(args.data_dir, 'batch_task_instances.csv'))
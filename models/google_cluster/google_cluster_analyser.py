@@ -2,8 +2,42 @@
 
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
+from models.google_cluster.pipeline import SUBMIT_EVENT, SCHEDULE_EVENT, EVICT_EVENT, FAIL_EVENT, FINISH_EVENT, \
+    KILL_EVENT
+
+
+def finished_task_times(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Finds the tasks that were submitted, scheduled and finished without being evicted, failing or killed with the
+        submit, scheduled and finish time of each task. The event types of each task are found with a single group by
+        and the event times with a single merge
+
+    :param df: The task events dataframe with the task ID
+    :return: Dataframe of the first event of each finished task with the event times
+    """
+    # The event types of each task as a boolean table of task ID by event type
+    task_events = df.groupby(['task ID', 'event type']).size().unstack(fill_value=0) \
+        .reindex(columns=range(9), fill_value=0) > 0
+    finished = task_events[SUBMIT_EVENT] & task_events[SCHEDULE_EVENT] & task_events[FINISH_EVENT] & \
+        ~task_events[EVICT_EVENT] & ~task_events[FAIL_EVENT] & ~task_events[KILL_EVENT]
+    finished_df = df[df['task ID'].isin(task_events.index[finished])]
+
+    # The first submit, schedule and finish time of each task
+    event_times = finished_df[finished_df['event type'].isin([SUBMIT_EVENT, SCHEDULE_EVENT, FINISH_EVENT])] \
+        .groupby(['task ID', 'event type'])['timestamp'].min().unstack() \
+        .rename(columns={SUBMIT_EVENT: 'submit time', SCHEDULE_EVENT: 'scheduled time', FINISH_EVENT: 'finish time'})
+    event_times.columns.name = None
+
+    first_events = finished_df.sort_values('timestamp', kind='stable').drop_duplicates('task ID')
+    timestamped_df = pd.merge(first_events.drop(columns='timestamp'), event_times, left_on='task ID',
+                              right_index=True)
+    timestamped_df['task schedule time'] = timestamped_df['scheduled time'] - timestamped_df['submit time']
+    timestamped_df['task execution time'] = timestamped_df['finish time'] - timestamped_df['scheduled time']
+    return timestamped_df.reset_index(drop=True)
+
 
 def analysis():
     """
@@ -14,15 +48,13 @@ def analysis():
                                    names=['timestamp', 'missing info', 'job ID', 'task index within the job',
                                           'machine ID', 'event type', 'user name', 'scheduling class', 'priority',
                                           'resource request for CPU cores', 'resource request for RAM',
-                                          'resource request for local disk space', 'different-machine constraint'])
+                                          'resource request for local disk space', 'different-machine constraint'],
+                                   usecols=['timestamp', 'job ID', 'task index within the job', 'machine ID',
+                                            'event type', 'scheduling class', 'priority',
+                                            'resource request for CPU cores', 'resource request for RAM',
+                                            'resource request for local disk space'])
     print(f'Finished at {datetime.now()}')
-
-    print(f'\nOriginal df: {df.shape}\n{df.head(6)}')
-
-    df = df[['timestamp', 'job ID', 'task index within the job', 'machine ID', 'event type', 'scheduling class',
-             'priority', 'resource request for CPU cores', 'resource request for RAM',
-             'resource request for local disk space']]
-    print(f'\nImportant info df: {df.shape}\n')
+    print(f'\nImportant info df: {df.shape}\n{df.head(6)}')
 
     df = df[(df['resource request for CPU cores'].notnull()) &
             (df['resource request for RAM'].notnull()) &
@@ -33,64 +65,12 @@ def analysis():
     print(f'\nValid requests df: {df.shape}\n')
 
     print('\nAdding task ID\n')
-    df['task ID'] = df['job ID'].map(str) + df['task index within the job'].map(str)
-    df['task ID'] = df['task ID'].map(int)
-
-    task_ids = df['task ID'].unique()
-    print(f'Number of task ids: {task_ids.shape}')
+    df['task ID'] = (df['job ID'].astype(str) + df['task index within the job'].astype(str)).astype(np.int64)
+    print(f'Number of task ids: {df["task ID"].nunique()}')
 
     print('Finding all finished tasks')
-    df.grouped('task ID')['event type'].apply(list)
-    finished_task_ids = []
-    for task_id in task_ids:
-        task_id_events = df[df['task ID'] == task_id]['event type']
-        # Kick out all tasks that didnt finish or were stopped part of the way through
-        if 0 in task_id_events and 1 in task_id_events and 4 in task_id_events and \
-                2 not in task_id_events and 3 not in task_id_events and 5 not in task_id_events:
-            finished_task_ids.append(task_id)
-    print(f'Number of finished task is {len(finished_task_ids)}')
-
-    df = df[df['task ID'].isin(finished_task_ids)]
-    print(f'\nFinish tasks: {df.shape}\n{df.head(6)}')
-
-    timestamped_jobs_df = pd.DataFrame(columns=[
-        'job ID', 'task index within the job', 'task ID', 'machine ID', 'event type', 'user name', 'scheduling class',
-        'priority', 'resource request for CPU cores', 'resource request for RAM',
-        'resource request for local disk space',
-        'different-machine constraint', 'submit time', 'scheduled time', 'finish time', 'task schedule time',
-        'task execution time'])
-    for finished_task_id in finished_task_ids:
-        task_id_info = df[df['task ID'] == finished_task_id]
-        sorted_timestamps = task_id_info.sort_values('timestamp')
-        data = sorted_timestamps.iloc[0:3, :]
-
-        submit_time = data.iloc[0, 0]
-        scheduled_time = data.iloc[1, 0]
-        finish_time = data.iloc[2, 0]
-        task_schedule_time = scheduled_time - submit_time
-        task_execution_time = finish_time - scheduled_time
-
-        job_id = data.iloc[0, 2]
-        task_index_within_job = data.iloc[0, 3]
-        machine_id = data.iloc[0, 4]
-        event_type = data.iloc[0, 5]
-        user_name = data.iloc[0, 6]
-        scheduling_class = data.iloc[0, 7]
-        priority = data.iloc[0, 8]
-        cpu = data.iloc[0, 9]
-        ram = data.iloc[0, 10]
-        local_disk_space = data.iloc[0, 11]
-        different_machine_constraint = data.iloc[0, 12]
-
-        timestamped_jobs_df.append({'job ID': job_id, 'task index within the job': task_index_within_job,
-                                    'task ID': finished_task_id, 'machine ID': machine_id, 'event type': event_type,
-                                    'user name': user_name, 'scheduling class': scheduling_class, 'priority': priority,
-                                    'resource request for CPU cores': cpu, 'resource request for RAM': ram,
-                                    'resource request for local disk space': local_disk_space,
-                                    'different-machine constraint': different_machine_constraint,
-                                    'submit time': submit_time, 'scheduled time': scheduled_time,
-                                    'finish time': finish_time, 'task schedule time': task_schedule_time,
-                                    'task execution time': task_execution_time}, ignore_index=True)
+    timestamped_jobs_df = finished_task_times(df)
+    print(f'Number of finished task is {len(timestamped_jobs_df)}')
 
     print(f'Start saving timestamped csv at {datetime.now()}')
     timestamped_jobs_df.to_csv('timestamped_task_events.csv', index=False)
@@ -0,0 +1,288 @@
+"""
+Chunked streaming pipeline for the google cluster trace task and server models (previously the stage scripts), the
+    trace is processed in fixed-size chunks with incremental aggregations such that the full trace is never held in
+    memory. Each stage writes typed (npz) intermediate files such that each stage can be re-run independently from the
+    cached outputs of the previous stage.
+
+Run from the repository root, i.e. python -m models.google_cluster.pipeline --data-dir models/google_cluster 1 2 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from src.extra.cache import load_dataframe
+
+if TYPE_CHECKING:
+    from typing import Iterator, List, Optional
+
+TASK_EVENT_COLUMNS = ['timestamp', 'missing info', 'job ID', 'task index within the job', 'machine ID', 'event type',
+                      'user name', 'scheduling class', 'priority', 'cpu', 'ram', 'disk', 'different-machine constraint']
+MACHINE_EVENT_COLUMNS = ['timestamp', 'machine ID', 'event type', 'platform ID', 'cpu', 'memory']
+RESOURCE_COLUMNS = ['priority', 'cpu', 'ram', 'disk']
+
+# The task event types
+SUBMIT_EVENT, SCHEDULE_EVENT, EVICT_EVENT, FAIL_EVENT, FINISH_EVENT, KILL_EVENT, LOST_EVENT, UPDATE_PENDING_EVENT, \
+    UPDATE_RUNNING_EVENT = range(9)
+UNUSABLE_EVENTS = [EVICT_EVENT, FAIL_EVENT, KILL_EVENT, LOST_EVENT, UPDATE_PENDING_EVENT, UPDATE_RUNNING_EVENT]
+
+# The filename pattern of the stage partitions
+PARTITION_PATTERN = re.compile(r'part_(\d+)\.npz')
+
+
+def save_frame(df: pd.DataFrame, filename: str):
+    """
+    Saves the dataframe columns as typed arrays to a npz file
+
+    :param df: The dataframe
+    :param filename: The npz filename
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    np.savez(filename, **{column: df[column].to_numpy() for column in df.columns})
+
+
+def load_frame(filename: str) -> pd.DataFrame:
+    """
+    Loads a dataframe saved with save_frame
+
+    :param filename: The npz filename
+    :return: The dataframe
+    """
+    with np.load(filename) as data:
+        return pd.DataFrame({column: data[column] for column in data.files})
+
+
+def load_partitions(partition_dir: str) -> Iterator[pd.DataFrame]:
+    """
+    Lazily loads the partitions (part_{pos}.npz files) of a stage in order, other files in the directory are ignored
+
+    :param partition_dir: The partition directory
+    :return: Iterator of the partition dataframes
+    """
+    if not os.path.isdir(partition_dir):
+        return
+    partitions = sorted((int(match.group(1)), match.group(0)) for match in
+                        (PARTITION_PATTERN.fullmatch(filename) for filename in os.listdir(partition_dir)) if match)
+    for _, filename in partitions:
+        yield load_frame(os.path.join(partition_dir, filename))
+
+
+def read_task_events(filename: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Reads the task events trace in chunks with the task id of each event
+
+    :param filename: The task events trace filename
+    :param chunk_size: The number of rows in each chunk
+    :return: Iterator of the chunks with the task id, timestamp, event type and resource columns
+    """
+    with pd.read_csv(filename, header=None, names=TASK_EVENT_COLUMNS, chunksize=chunk_size,
+                     usecols=['timestamp', 'job ID', 'task index within the job', 'event type'] +
+                     RESOURCE_COLUMNS) as reader:
+        for chunk in reader:
+            # The task id is the job id concatenated with the task index
+            chunk['task ID'] = (chunk['job ID'].astype(str) + chunk['task index within the job'].astype(str)) \
+                .astype(np.int64)
+            yield chunk[['task ID', 'timestamp', 'event type'] + RESOURCE_COLUMNS]
+
+
+def stage_1(data_dir: str, trace_filename: str = 'combined_data.csv', chunk_size: int = 1_000_000):
+    """
+    Finds the usable task events, the tasks that finished successfully with no evict, fail, kill or lost events (or
+        events at timestamp 0), and the number of task events with each resource request
+
+    :param data_dir: The data directory
+    :param trace_filename: The task events trace filename
+    :param chunk_size: The number of rows in each chunk
+    """
+    trace_filename = os.path.join(data_dir, trace_filename)
+
+    # The first pass finds the successful and unusable task ids
+    successful_tasks, unusable_tasks = [], []
+    for chunk in read_task_events(trace_filename, chunk_size):
+        successful_tasks.append(np.unique(chunk['task ID'][chunk['event type'] == FINISH_EVENT]))
+        unusable_tasks.append(np.unique(chunk['task ID'][chunk['event type'].isin(UNUSABLE_EVENTS) |
+                                                         (chunk['timestamp'] == 0)]))
+    usable_tasks = np.setdiff1d(np.concatenate(successful_tasks + [np.empty(0, dtype=np.int64)]),
+                                np.concatenate(unusable_tasks + [np.empty(0, dtype=np.int64)]))
+    print(f'Usable tasks: {len(usable_tasks)}')
+
+    # The second pass writes the usable task events partitions with the resource count aggregated incrementally
+    partition_dir = os.path.join(data_dir, 'stage_1')
+    os.makedirs(partition_dir, exist_ok=True)
+    for filename in os.listdir(partition_dir):
+        if PARTITION_PATTERN.fullmatch(filename):
+            os.remove(os.path.join(partition_dir, filename))
+
+    resource_count: Optional[pd.Series] = None
+    for pos, chunk in enumerate(read_task_events(trace_filename, chunk_size)):
+        chunk = chunk[chunk['task ID'].isin(usable_tasks)]
+        chunk_count = chunk.groupby(RESOURCE_COLUMNS).size()
+        resource_count = chunk_count if resource_count is None else resource_count.add(chunk_count, fill_value=0)
+
+        save_frame(chunk[chunk['event type'] != SUBMIT_EVENT], os.path.join(partition_dir, f'part_{pos}.npz'))
+
+    resource_count = pd.Series(dtype=np.int64) if resource_count is None else resource_count.astype(np.int64)
+    save_frame(resource_count.reset_index(name='count'), os.path.join(data_dir, 'resource_count.npz'))
+
+
+def stage_2(data_dir: str):
+    """
+    Finds the schedule, finish and compute time (in seconds) of the usable tasks with the task resource requests
+
+    :param data_dir: The data directory
+    """
+    schedule_times, finish_times, task_resources = [], [], []
+    for partition in load_partitions(os.path.join(data_dir, 'stage_1')):
+        schedule_times.append(partition[partition['event type'] == SCHEDULE_EVENT]
+                              .groupby('task ID')['timestamp'].min())
+        finish_times.append(partition[partition['event type'] == FINISH_EVENT].groupby('task ID')['timestamp'].max())
+        task_resources.append(partition[['task ID'] + RESOURCE_COLUMNS].drop_duplicates('task ID'))
+
+    # The partition aggregates are combined for the tasks with events in multiple partitions, an empty aggregate is
+    #   added for the case of no partitions
+    empty_times = pd.Series(dtype=np.int64, index=pd.Index([], dtype=np.int64, name='task ID'), name='timestamp')
+    time_df = pd.merge(pd.concat(schedule_times + [empty_times]).groupby(level=0).min().rename('schedule time'),
+                       pd.concat(finish_times + [empty_times]).groupby(level=0).max().rename('finish time'),
+                       left_index=True, right_index=True).reset_index()
+    time_df['compute time'] = round((time_df['finish time'] - time_df['schedule time']) / (10 ** 6), 2)
+    time_df['finish time'] = round(time_df['finish time'] / (10 ** 6), 2)
+    time_df['schedule time'] = round(time_df['schedule time'] / (10 ** 6), 2)
+
+    task_df = pd.concat(task_resources).drop_duplicates('task ID') if task_resources else \
+        pd.DataFrame({'task ID': np.empty(0, dtype=np.int64), **{column: np.empty(0) for column in RESOURCE_COLUMNS}})
+    save_frame(pd.merge(task_df, time_df, on='task ID'), os.path.join(data_dir, 'task_time.npz'))
+
+
+def resource_models(resource_time_df: pd.DataFrame, probability_decimals: int) -> List[dict]:
+    """
+    The task model distributions of the resource requests
+
+    :param resource_time_df: The resource time dataframe
+    :param probability_decimals: The probability decimal places
+    :return: List of task distributions
+    """
+    return [{
+        "name": str(index),
+        "probability": round(float(probability), probability_decimals),
+        "required_storage_mean": int(disk),
+        "required_storage_std": 0,
+        "required_computation_mean": int(cpu),
+        "required_computation_std": 0,
+        "required_results_data_mean": int(ram),
+        "required_results_data_std": 0,
+        "value_mean": int(disk * cpu * ram),
+        "value_std": 0,
+        "deadline_mean": int(mean_time)
+    } for index, cpu, ram, disk, probability, mean_time in zip(
+        resource_time_df.index, resource_time_df['cpu'], resource_time_df['ram'], resource_time_df['disk'],
+        resource_time_df['probability'], resource_time_df['mean time'])]
+
+
+def stage_3(data_dir: str, min_count: int = 1000):
+    """
+    Generates the task model of the popular resource requests with the mean and std of the compute time
+
+    :param data_dir: The data directory
+    :param min_count: The minimum number of tasks with the resource request
+    """
+    resource_df = load_frame(os.path.join(data_dir, 'resource_count.npz'))
+    resource_df['count'] //= 3
+    resource_df = resource_df[(resource_df['cpu'] > 0) & (resource_df['ram'] > 0) & (resource_df['disk'] > 0)]
+    top_resource_df = resource_df[resource_df['count'] >= min_count]
+
+    task_time_df = load_frame(os.path.join(data_dir, 'task_time.npz'))
+    task_time_df['compute time'] = task_time_df['compute time'].astype(np.int64)
+    task_time_df = task_time_df[(task_time_df['cpu'] > 0) & (task_time_df['ram'] > 0) & (task_time_df['disk'] > 0)]
+    compute_times = task_time_df.groupby(RESOURCE_COLUMNS)['compute time']
+    times_df = pd.DataFrame({'mean time': compute_times.mean(), 'std time': compute_times.std(ddof=0)}).reset_index()
+
+    resource_time_df = pd.merge(top_resource_df, times_df, on=RESOURCE_COLUMNS)
+    for resource in ('cpu', 'ram', 'disk'):
+        resource_time_df[resource] = round(resource_time_df[resource] / resource_time_df[resource].min(), 0) \
+            .astype(np.int64)
+
+    resource_time_df = resource_time_df[resource_time_df['mean time'] > resource_time_df['std time'] * 4].copy()
+    resource_time_df['probability'] = resource_time_df['count'] / resource_time_df['count'].sum()
+    resource_time_df['mean time'] = resource_time_df['mean time'].astype(np.int64)
+    resource_time_df['std time'] = resource_time_df['std time'].astype(np.int64)
+    print(resource_time_df)
+
+    save_frame(resource_time_df.reset_index(), os.path.join(data_dir, 'resource_time.npz'))
+    with open(os.path.join(data_dir, 'google_model.json'), 'w') as file:
+        json.dump(resource_models(resource_time_df, 5), file)
+
+
+def stage_4(data_dir: str, min_probability: float = 0.0001):
+    """
+    Filters the task model to the resource requests with a minimum probability
+
+    :param data_dir: The data directory
+    :param min_probability: The minimum probability of the resource requests
+    """
+    resource_time_df = load_frame(os.path.join(data_dir, 'resource_time.npz')).set_index('index')
+    print(f'Total probability: {resource_time_df["probability"].sum()}')
+    resource_time_df = resource_time_df[resource_time_df['probability'] > min_probability]
+    print(f'Filtered probability: {resource_time_df["probability"].sum()}')
+
+    with open(os.path.join(data_dir, 'google_model.json'), 'w') as file:
+        json.dump(resource_models(resource_time_df, 4), file)
+
+
+def stage_5(data_dir: str, machine_events_filename: str = 'machine_events.csv', min_count: int = 100):
+    """
+    Generates the server model from the machine add events
+
+    :param data_dir: The data directory
+    :param machine_events_filename: The machine events filename
+    :param min_count: The minimum number of machines with the same resources
+    """
+    df = load_dataframe(os.path.join(data_dir, machine_events_filename), header=None, names=MACHINE_EVENT_COLUMNS)
+    df = df[df['event type'] == 0]
+    df = pd.DataFrame({'cpu': round(df['cpu'] / 0.0006247, 0), 'memory': round(df['memory'] / 0.0001554, 0)})
+
+    df = df.groupby(by=['cpu', 'memory']).size().reset_index().rename(columns={0: 'count'})
+    df = df[df['count'] > min_count].copy()
+    df['probability'] = round(df['count'] / df['count'].sum(), 4)
+    print(df)
+
+    with open(os.path.join(data_dir, 'google.model'), 'w') as file:
+        json.dump([{
+            "name": str(index),
+            "probability": float(probability),
+            "maximum_storage_mean": float(memory),
+            "maximum_storage_std": 0,
+            "maximum_computation_mean": float(cpu),
+            "maximum_computation_std": 0,
+            "maximum_bandwidth_mean": float(memory) * 1.5,
+            "maximum_bandwidth_std": 0
+        } for index, cpu, memory, probability in zip(df.index, df['cpu'], df['memory'], df['probability'])], file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Google cluster trace model pipeline')
+    parser.add_argument('stages', nargs='*', type=int, default=[1, 2, 3, 5], choices=(1, 2, 3, 4, 5),
+                        help='The stages to run, each stage uses the cached outputs of the previous stage')
+    parser.add_argument('-d', '--data-dir', default='.', help='The data directory')
+    parser.add_argument('-t', '--trace', default='combined_data.csv', help='The task events trace filename')
+    parser.add_argument('-c', '--chunk-size', type=int, default=1_000_000, help='The number of rows in each chunk')
+    args = parser.parse_args()
+
+    for stage in args.stages:
+        print(f'Stage {stage}')
+        if stage == 1:
+            stage_1(args.data_dir, args.trace, args.chunk_size)
+        elif stage == 2:
+            stage_2(args.data_dir)
+        elif stage == 3:
+            stage_3(args.data_dir)
+        elif stage == 4:
+            stage_4(args.data_dir)
+        elif stage == 5:
+            stage_5(args.data_dir)
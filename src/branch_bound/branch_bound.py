@@ -6,20 +6,33 @@ Lower bound is the current social welfare, Upper bound is the possible sum of al
 
 from __future__ import annotations
 
+import gzip
+import os
+import pickle
+from multiprocessing import Pool, Value
 from time import time
 from typing import TYPE_CHECKING
 
-from src.branch_bound.feasibility_allocations import elastic_feasible_allocation
+import numpy as np
+
+from src.branch_bound.feasibility_allocations import elastic_feasible_allocation, non_elastic_feasible_allocation
 from src.branch_bound.priority_queue import Comparison, PriorityQueue
+from src.core.non_elastic_task import NonElasticTask
 from src.extra.pprint import print_allocation
 from src.extra.result import Result
 
 if TYPE_CHECKING:
-    from typing import List, Dict, Tuple, Optional
+    from typing import List, Dict, Tuple, Optional, Callable, Any
 
     from src.core.server import Server
     from src.core.elastic_task import ElasticTask
 
+# Worker process state for the parallel feasibility evaluation, set by the pool initialiser
+_worker_lower_bound = None
+_worker_feasibility = None
+_worker_tasks = None
+_worker_servers = None
+
 
 def copy(allocation):
     """
@@ -70,22 +83,318 @@ def generate_candidates(allocation: Dict[Server, List[ElasticTask]], tasks: List
     return new_candidates
 
 
-def branch_bound_algorithm(tasks: List[ElasticTask], servers: List[Server], feasibility=elastic_feasible_allocation,
+def generate_non_elastic_candidates(encoded_allocation: Tuple[Tuple[int, ...], ...], usage: np.ndarray,
+                                    demands: np.ndarray, capacities: np.ndarray, values: List[float], pos: int,
+                                    lower_bound: float, upper_bound: float) \
+        -> List[Tuple[float, float, Tuple[Tuple[int, ...], ...], int, np.ndarray]]:
+    """
+    Generates the new non-elastic candidates of the task allocated to any server with the resources available, as the
+        task resource usage is fixed then the candidates are feasible without a feasibility function
+
+    :param encoded_allocation: Tuple of the task positions allocated to each server
+    :param usage: The storage, compute and bandwidth usage of each server
+    :param demands: The storage, compute and bandwidth demand of each task
+    :param capacities: The storage, computation and bandwidth capacity of each server
+    :param values: List of the task values
+    :param pos: Job position
+    :param lower_bound: The lower bound
+    :param upper_bound: The upper bound
+    :return: A list of tuples of the lower bound, upper bound, encoded allocation, position and server usage
+    """
+    new_candidates = []
+    for task_pos in range(pos, len(values)):
+        # The servers that the task can be allocated to with the current server usage
+        for server_pos in np.flatnonzero(np.all(usage + demands[task_pos] <= capacities, axis=1)):
+            new_usage = usage.copy()
+            new_usage[server_pos] += demands[task_pos]
+            new_allocation = encoded_allocation[:server_pos] + \
+                (encoded_allocation[server_pos] + (task_pos,),) + encoded_allocation[server_pos + 1:]
+
+            new_candidates.append((lower_bound + values[task_pos], upper_bound, new_allocation, task_pos + 1,
+                                   new_usage))
+
+        # Non-allocation of the task to a server
+        upper_bound -= values[task_pos]
+
+    return new_candidates
+
+
+def encode_allocation(allocation: Dict[Server, List[ElasticTask]], servers: List[Server],
+                      task_positions: Dict[ElasticTask, int]) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Encodes the allocation as the positions of the tasks allocated to each server
+
+    :param allocation: The allocations of tasks to servers
+    :param servers: List of the servers
+    :param task_positions: Dictionary of the task to its position in the list of tasks
+    :return: Tuple of the task positions allocated to each server
+    """
+    return tuple(tuple(task_positions[task] for task in allocation[server]) for server in servers)
+
+
+def decode_allocation(encoded_allocation: Tuple[Tuple[int, ...], ...], tasks: List[ElasticTask],
+                      servers: List[Server]) -> Dict[Server, List[ElasticTask]]:
+    """
+    Decodes the allocation from the positions of the tasks allocated to each server
+
+    :param encoded_allocation: Tuple of the task positions allocated to each server
+    :param tasks: List of the tasks
+    :param servers: List of the servers
+    :return: The allocations of tasks to servers
+    """
+    return {server: [tasks[pos] for pos in task_positions]
+            for server, task_positions in zip(servers, encoded_allocation)}
+
+
+def save_checkpoint(filename: str, tasks: List[ElasticTask], servers: List[Server],
+                    candidates: List[Tuple[float, float, Tuple[Tuple[int, ...], ...], int]], best_lower_bound: float,
+                    best_allocation: Optional[Tuple[Tuple[int, ...], ...]],
+                    best_speeds: Optional[List[Tuple[int, int, int]]], statistics: Dict[str, float]):
+    """
+    Saves the branch and bound search to a compressed binary checkpoint with the candidate allocations encoded as task
+        positions, the checkpoint is written to a temporary file first so a crash never corrupts the last checkpoint
+
+    :param filename: The checkpoint filename
+    :param tasks: List of the tasks
+    :param servers: List of the servers
+    :param candidates: The encoded candidates of the search frontier
+    :param best_lower_bound: The best lower bound
+    :param best_allocation: The encoded best allocation
+    :param best_speeds: The resource speeds of the best allocation tasks in order of the encoded allocation
+    :param statistics: The search statistics
+    """
+    checkpoint = {
+        'tasks': [task.name for task in tasks],
+        'servers': [server.name for server in servers],
+        'candidates': candidates,
+        'best lower bound': best_lower_bound,
+        'best allocation': best_allocation,
+        'best speeds': best_speeds,
+        'statistics': statistics
+    }
+
+    with gzip.open(f'{filename}.tmp', 'wb') as file:
+        pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f'{filename}.tmp', filename)
+
+
+def load_checkpoint(filename: str, tasks: List[ElasticTask], servers: List[Server]) -> Dict[str, Any]:
+    """
+    Loads a branch and bound search checkpoint for the tasks and servers
+
+    :param filename: The checkpoint filename
+    :param tasks: List of the tasks, in the same order as the checkpointed search
+    :param servers: List of the servers, in the same order as the checkpointed search
+    :return: Dictionary of the encoded candidates, best lower bound, encoded best allocation, best speeds and statistics
+    """
+    with gzip.open(filename, 'rb') as file:
+        checkpoint = pickle.load(file)
+
+    assert checkpoint['tasks'] == [task.name for task in tasks] and \
+        checkpoint['servers'] == [server.name for server in servers], \
+        f'Checkpoint {filename} is for different tasks and servers'
+    return checkpoint
+
+
+class SearchProgress:
+    """
+    The statistics, checkpoints and progress callback of a branch and bound search, shared by the elastic and
+        non-elastic searches where the search frontier and best allocation are encoded by the search when checkpointed
+    """
+
+    def __init__(self, tasks: List[ElasticTask], servers: List[Server], candidates: PriorityQueue,
+                 encode_search: Callable[[], Tuple[list, Optional[Tuple[Tuple[int, ...], ...]],
+                                                   Optional[List[Tuple[int, int, int]]]]],
+                 checkpoint_filename: Optional[str] = None, checkpoint_interval: float = 600,
+                 progress_callback: Optional[Callable[[Dict[str, float]], Optional[bool]]] = None,
+                 progress_interval: int = 100):
+        """
+        Constructor
+
+        :param tasks: List of the tasks
+        :param servers: List of the servers
+        :param candidates: The search candidates, with the upper bound of each candidate as the second element
+        :param encode_search: Function returning the encoded candidates, encoded best allocation and best speeds
+        :param checkpoint_filename: The checkpoint filename, if None then no checkpoints are saved
+        :param checkpoint_interval: Number of seconds between checkpoints
+        :param progress_callback: The progress callback function
+        :param progress_interval: Number of nodes explored between calling the progress callback
+        """
+        self.tasks = tasks
+        self.servers = servers
+        self.candidates = candidates
+        self.encode_search = encode_search
+        self.checkpoint_filename = checkpoint_filename
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+
+        # The search statistics with the solve time of any previous searches resumed from
+        self.start_time = time()
+        self.last_checkpoint_time = self.start_time
+        self.nodes_explored, self.previous_solve_time = 0, 0
+
+    def resume(self, resumed: Dict[str, Any]):
+        """
+        Resumes the search statistics from a loaded checkpoint
+
+        :param resumed: The loaded checkpoint
+        """
+        self.nodes_explored = resumed['statistics']['nodes explored']
+        self.previous_solve_time = resumed['statistics']['solve time']
+
+    def statistics(self, best_lower_bound: float) -> Dict[str, float]:
+        """
+        The search statistics
+
+        :param best_lower_bound: The best lower bound
+        :return: Dictionary of the search statistics
+        """
+        upper_bound = max([best_lower_bound] + [candidate[1] for candidate in self.candidates.queue])
+        return {
+            'nodes explored': self.nodes_explored,
+            'frontier size': self.candidates.size,
+            'best lower bound': best_lower_bound,
+            'upper bound': upper_bound,
+            'gap': 0 if upper_bound == 0 else round((upper_bound - best_lower_bound) / upper_bound, 6),
+            'solve time': self.previous_solve_time + time() - self.start_time
+        }
+
+    def checkpoint(self, best_lower_bound: float, force: bool = False):
+        """
+        Saves a checkpoint if the checkpoint interval has passed since the last checkpoint
+
+        :param best_lower_bound: The best lower bound
+        :param force: If to save the checkpoint independent of the checkpoint interval
+        """
+        if self.checkpoint_filename is not None and \
+                (force or self.checkpoint_interval <= time() - self.last_checkpoint_time):
+            encoded_candidates, best_allocation, best_speeds = self.encode_search()
+            save_checkpoint(self.checkpoint_filename, self.tasks, self.servers, encoded_candidates, best_lower_bound,
+                            best_allocation, best_speeds, self.statistics(best_lower_bound))
+            self.last_checkpoint_time = time()
+
+    def explored(self, num_nodes: int, best_lower_bound: float) -> bool:
+        """
+        Updates the number of nodes explored, calling the progress callback and saving a checkpoint when required
+
+        :param num_nodes: The number of nodes explored
+        :param best_lower_bound: The best lower bound
+        :return: If the search should be stopped
+        """
+        previous_nodes_explored, self.nodes_explored = self.nodes_explored, self.nodes_explored + num_nodes
+        self.checkpoint(best_lower_bound)
+
+        if self.progress_callback is not None and \
+                previous_nodes_explored // self.progress_interval < self.nodes_explored // self.progress_interval:
+            if self.progress_callback(self.statistics(best_lower_bound)):
+                self.checkpoint(best_lower_bound, force=True)
+                return True
+        return False
+
+    def finish(self, best_lower_bound: float) -> Dict[str, float]:
+        """
+        The final search statistics, saving the finished search such that it is not resumed from an old checkpoint
+
+        :param best_lower_bound: The best lower bound
+        :return: Dictionary of the search statistics
+        """
+        search_statistics = self.statistics(best_lower_bound)
+        if self.candidates.size == 0:
+            self.checkpoint(best_lower_bound, force=True)
+        return search_statistics
+
+
+def init_feasibility_worker(shared_lower_bound, feasibility: Callable, tasks: List[ElasticTask],
+                            servers: List[Server]):
+    """
+    Initialises a feasibility worker process with the shared lower bound, feasibility function, tasks and servers
+        such that candidates can be sent to the worker as just task and server positions
+
+    :param shared_lower_bound: The best lower bound shared with the coordinator
+    :param feasibility: Feasibility function
+    :param tasks: List of the tasks
+    :param servers: List of the servers
+    """
+    global _worker_lower_bound, _worker_feasibility, _worker_tasks, _worker_servers
+    _worker_lower_bound = shared_lower_bound
+    _worker_feasibility = feasibility
+    _worker_tasks = tasks
+    _worker_servers = servers
+
+
+def evaluate_candidate(encoded_candidate: Tuple[float, Tuple[Tuple[int, ...], ...]]) \
+        -> Optional[List[Tuple[int, int, int]]]:
+    """
+    Evaluates the feasibility of a candidate within a worker process, the candidate is pruned without checking if its
+        upper bound is not greater than the shared best lower bound
+
+    :param encoded_candidate: Tuple of the candidate upper bound and the task positions allocated to each server
+    :return: The resource speeds of each allocated task in order of the allocation if feasible otherwise None
+    """
+    upper_bound, server_task_positions = encoded_candidate
+    if upper_bound <= _worker_lower_bound.value:
+        return None
+
+    allocation = decode_allocation(server_task_positions, _worker_tasks, _worker_servers)
+    task_speeds = _worker_feasibility(allocation)
+    if task_speeds:
+        return [task_speeds[task] for tasks in allocation.values() for task in tasks]
+    else:
+        return None
+
+
+def branch_bound_algorithm(tasks: List[ElasticTask], servers: List[Server], feasibility: Optional[Callable] = None,
+                           processes: Optional[int] = None, batch_size: Optional[int] = None,
+                           checkpoint_filename: Optional[str] = None, checkpoint_interval: float = 600,
+                           resume_from: Optional[str] = None,
+                           progress_callback: Optional[Callable[[Dict[str, float]], Optional[bool]]] = None,
+                           progress_interval: int = 100,
                            debug_new_candidate: bool = False, debug_checking_allocation: bool = False,
                            debug_update_lower_bound: bool = False, debug_feasibility: bool = False) -> Result:
     """
     Branch and bound based algorithm
 
+    With processes set, the best candidates are popped in batches with their feasibility evaluated in a process pool
+        while the coordinator pushes the new candidates and shares the best lower bound with the workers for pruning.
+        The results are processed in the order that they are popped so the search is deterministic
+
+    The search frontier, best allocation and statistics are checkpointed every checkpoint interval seconds that can be
+        resumed from with the same tasks and servers. The progress callback is called with the search statistics
+        (nodes explored, frontier size, best lower bound, upper bound, gap and solve time) every progress interval
+        nodes explored, if the callback returns True then the search is stopped (and checkpointed)
+
     :param tasks: A list of tasks
     :param servers: A list of servers
-    :param feasibility: Feasibility function
+    :param feasibility: Feasibility function, if None then the non-elastic search is used if all of the tasks are
+        non-elastic otherwise the elastic feasible allocation. As the non-elastic search doesn't evaluate the
+        feasibility of candidates, with processes, batch size or debug feasibility then the non-elastic feasible
+        allocation is used
+    :param processes: Number of feasibility worker processes, if None then the search is single process
+    :param batch_size: Number of candidates popped for each batch, defaults to the number of processes
+    :param checkpoint_filename: The checkpoint filename, if None then no checkpoints are saved
+    :param checkpoint_interval: Number of seconds between checkpoints
+    :param resume_from: The checkpoint filename to resume the search from
+    :param progress_callback: The progress callback function
+    :param progress_interval: Number of nodes explored between calling the progress callback
     :param debug_new_candidate:
     :param debug_checking_allocation:
     :param debug_update_lower_bound:
     :param debug_feasibility:
     :return: The results from the search
     """
-    start_time = time()
+    if feasibility is None:
+        if all(isinstance(task, NonElasticTask) for task in tasks):
+            if processes is None and batch_size is None and not debug_feasibility:
+                return non_elastic_branch_bound_algorithm(tasks, servers, checkpoint_filename, checkpoint_interval,
+                                                          resume_from, progress_callback, progress_interval,
+                                                          debug_new_candidate=debug_new_candidate,
+                                                          debug_checking_allocation=debug_checking_allocation,
+                                                          debug_update_lower_bound=debug_update_lower_bound)
+            # The parallel feasibility evaluation is only for the feasibility search
+            feasibility = non_elastic_feasible_allocation
+        else:
+            feasibility = elastic_feasible_allocation
 
     # The best values for the lower bound, allocation and speeds
     best_lower_bound: float = 0
@@ -112,47 +421,231 @@ def branch_bound_algorithm(tasks: List[ElasticTask], servers: List[Server], feas
         """
         return str(candidate[0])
 
+    def update_candidate(candidate, task_speeds: Dict[ElasticTask, Tuple[int, int, int]]):
+        """
+        Updates the best lower bound with a feasible candidate and generates the new candidates
+
+        :param candidate: The feasible candidate
+        :param task_speeds: The task resource speeds of the candidate
+        """
+        nonlocal best_lower_bound, best_allocation, best_speeds
+        lower_bound, upper_bound, allocation, pos = candidate
+
+        # Update the lower bound if better
+        if best_lower_bound < lower_bound:
+            if debug_update_lower_bound:
+                print(f'Update - New Lower bound: {lower_bound}')
+
+            best_allocation = allocation
+            best_speeds = task_speeds
+            best_lower_bound = lower_bound
+
+        # Generate the new candidates as the allocation was successful
+        if pos < len(tasks):
+            candidates.push_all(generate_candidates(allocation, tasks, servers, pos, lower_bound, upper_bound,
+                                                    debug_new_candidates=debug_new_candidate))
+
+    task_positions = {task: pos for pos, task in enumerate(tasks)}
+
+    def encode_search():
+        """
+        Encodes the search frontier and best allocation as task positions for a checkpoint
+
+        :return: Tuple of the encoded candidates, encoded best allocation and best speeds
+        """
+        return [(lower_bound, upper_bound, encode_allocation(allocation, servers, task_positions), pos)
+                for lower_bound, upper_bound, allocation, pos in candidates.queue], \
+            None if best_allocation is None else encode_allocation(best_allocation, servers, task_positions), \
+            None if best_speeds is None else \
+            [best_speeds[task] for server in servers for task in best_allocation[server]]
+
     candidates = PriorityQueue(compare, evaluate)
-    candidates.push_all(generate_candidates({server: [] for server in servers}, tasks, servers, 0, 0,
-                                            sum(task.value for task in tasks),
-                                            debug_new_candidates=debug_new_candidate))
+    search = SearchProgress(tasks, servers, candidates, encode_search, checkpoint_filename, checkpoint_interval,
+                            progress_callback, progress_interval)
+    if resume_from is None:
+        candidates.push_all(generate_candidates({server: [] for server in servers}, tasks, servers, 0, 0,
+                                                sum(task.value for task in tasks),
+                                                debug_new_candidates=debug_new_candidate))
+    else:
+        resumed = load_checkpoint(resume_from, tasks, servers)
+        candidates.push_all([(lower_bound, upper_bound, decode_allocation(encoded_allocation, tasks, servers), pos)
+                             for lower_bound, upper_bound, encoded_allocation, pos in resumed['candidates']])
+        best_lower_bound = resumed['best lower bound']
+        if resumed['best allocation'] is not None:
+            best_allocation = decode_allocation(resumed['best allocation'], tasks, servers)
+            best_speeds = dict(zip((task for server in servers for task in best_allocation[server]),
+                                   resumed['best speeds']))
+        search.resume(resumed)
+
+    if processes is None:
+        # While candidates exist
+        while candidates.size > 0:
+            actual_lower_bound = max(candidate[0] for candidate in candidates.queue)
+            lower_bound, upper_bound, allocation, pos = candidates.pop()
+            assert actual_lower_bound == lower_bound
+
+            if best_lower_bound < upper_bound:
+                if debug_checking_allocation:
+                    print(f'Checking - Lower bound: {lower_bound}, Upper bound: {upper_bound}, pos: {pos}')
+                    # print_allocation(allocation)
+
+                # Check if the allocation is feasible
+                task_speeds = feasibility(allocation)
+                if debug_feasibility:
+                    print(f'Allocation feasibility: {task_speeds is not None}')
+
+                if task_speeds:
+                    update_candidate((lower_bound, upper_bound, allocation, pos), task_speeds)
+
+            if search.explored(1, best_lower_bound):
+                break
+    else:
+        shared_lower_bound = Value('d', best_lower_bound)
+        with Pool(processes, initializer=init_feasibility_worker,
+                  initargs=(shared_lower_bound, feasibility, tasks, servers)) as pool:
+            # While candidates exist
+            while candidates.size > 0:
+                # Pop the batch of best candidates that could improve on the best lower bound
+                batch_candidates, num_popped = [], 0
+                while candidates.size > 0 and len(batch_candidates) < (batch_size or processes):
+                    candidate, num_popped = candidates.pop(), num_popped + 1
+                    if best_lower_bound < candidate[1]:
+                        if debug_checking_allocation:
+                            print(f'Checking - Lower bound: {candidate[0]}, Upper bound: {candidate[1]}, '
+                                  f'pos: {candidate[3]}')
+                        batch_candidates.append(candidate)
+
+                # Check if the allocations are feasible with the results processed in the order of the candidates
+                encoded_candidates = [(upper_bound, encode_allocation(allocation, servers, task_positions))
+                                      for _, upper_bound, allocation, _ in batch_candidates]
+                for candidate, speeds in zip(batch_candidates, pool.imap(evaluate_candidate, encoded_candidates)):
+                    if debug_feasibility:
+                        print(f'Allocation feasibility: {speeds is not None}')
+
+                    if speeds is not None and best_lower_bound < candidate[1]:
+                        allocated_tasks = [task for server in servers for task in candidate[2][server]]
+                        update_candidate(candidate, dict(zip(allocated_tasks, speeds)))
+                        shared_lower_bound.value = best_lower_bound
+
+                if search.explored(num_popped, best_lower_bound):
+                    break
+
+    search_statistics = search.finish(best_lower_bound)
+
+    # Search is finished so allocate the tasks
+    if best_allocation is not None:
+        for server, allocated_tasks in best_allocation.items():
+            for allocated_task in allocated_tasks:
+                allocated_task.allocate(best_speeds[allocated_task][0], best_speeds[allocated_task][1],
+                                        best_speeds[allocated_task][2], server)
+                server.allocate_task(allocated_task)
+
+    return Result('Branch & Bound', tasks, servers, search_statistics['solve time'],
+                  **{'nodes explored': search_statistics['nodes explored'], 'gap': search_statistics['gap']})
+
+
+def non_elastic_branch_bound_algorithm(tasks: List[NonElasticTask], servers: List[Server],
+                                       checkpoint_filename: Optional[str] = None, checkpoint_interval: float = 600,
+                                       resume_from: Optional[str] = None,
+                                       progress_callback: Optional[Callable[[Dict[str, float]], Optional[bool]]] = None,
+                                       progress_interval: int = 100, debug_new_candidate: bool = False,
+                                       debug_checking_allocation: bool = False,
+                                       debug_update_lower_bound: bool = False) -> Result:
+    """
+    Branch and bound based algorithm for non-elastic tasks where each candidate holds the cumulative storage, compute
+        and bandwidth usage of each server such that extending a candidate is a constant resource check rather than a
+        feasibility function call, every candidate popped is therefore feasible
+
+    :param tasks: A list of non-elastic tasks
+    :param servers: A list of servers
+    :param checkpoint_filename: The checkpoint filename, if None then no checkpoints are saved
+    :param checkpoint_interval: Number of seconds between checkpoints
+    :param resume_from: The checkpoint filename to resume the search from
+    :param progress_callback: The progress callback function
+    :param progress_interval: Number of nodes explored between calling the progress callback
+    :param debug_new_candidate:
+    :param debug_checking_allocation:
+    :param debug_update_lower_bound:
+    :return: The results from the search
+    """
+    candidates = PriorityQueue(lambda candidate_1, candidate_2: Comparison.compare(candidate_1[0], candidate_2[0]),
+                               lambda candidate: str(candidate[0]), check_tree=False)
+
+    # The best values for the lower bound and encoded allocation
+    best_lower_bound: float = 0
+    best_allocation: Optional[Tuple[Tuple[int, ...], ...]] = None
+
+    def encode_search():
+        """
+        The search frontier without the server usage, best allocation and best speeds for a checkpoint
+
+        :return: Tuple of the encoded candidates, encoded best allocation and best speeds
+        """
+        return [candidate[:4] for candidate in candidates.queue], best_allocation, \
+            None if best_allocation is None else \
+            [(tasks[pos].loading_speed, tasks[pos].compute_speed, tasks[pos].sending_speed)
+             for task_positions in best_allocation for pos in task_positions]
+
+    search = SearchProgress(tasks, servers, candidates, encode_search, checkpoint_filename, checkpoint_interval,
+                            progress_callback, progress_interval)
+
+    values = [task.value for task in tasks]
+    demands = np.array([(task.required_storage, task.compute_speed, task.loading_speed + task.sending_speed)
+                        for task in tasks], dtype=np.int64).reshape((len(tasks), 3))
+    capacities = np.array([(server.storage_capacity, server.computation_capacity, server.bandwidth_capacity)
+                           for server in servers], dtype=np.int64).reshape((len(servers), 3))
+
+    if resume_from is None:
+        candidates.push_all(generate_non_elastic_candidates(tuple(() for _ in servers), np.zeros_like(capacities),
+                                                            demands, capacities, values, 0, 0, sum(values)))
+    else:
+        resumed = load_checkpoint(resume_from, tasks, servers)
+        candidates.push_all([(lower_bound, upper_bound, encoded_allocation, pos,
+                              np.array([demands[list(task_positions)].sum(axis=0)
+                                        for task_positions in encoded_allocation], dtype=np.int64))
+                             for lower_bound, upper_bound, encoded_allocation, pos in resumed['candidates']])
+        best_lower_bound, best_allocation = resumed['best lower bound'], resumed['best allocation']
+        search.resume(resumed)
 
     # While candidates exist
     while candidates.size > 0:
-        actual_lower_bound = max(candidate[0] for candidate in candidates.queue)
-        lower_bound, upper_bound, allocation, pos = candidates.pop()
-        assert actual_lower_bound == lower_bound
+        lower_bound, upper_bound, allocation, pos, usage = candidates.pop()
 
         if best_lower_bound < upper_bound:
             if debug_checking_allocation:
                 print(f'Checking - Lower bound: {lower_bound}, Upper bound: {upper_bound}, pos: {pos}')
-                # print_allocation(allocation)
 
-            # Check if the allocation is feasible
-            task_speeds = feasibility(allocation)
-            if debug_feasibility:
-                print(f'Allocation feasibility: {task_speeds is not None}')
+            # Update the lower bound if better
+            if best_lower_bound < lower_bound:
+                if debug_update_lower_bound:
+                    print(f'Update - New Lower bound: {lower_bound}')
 
-            if task_speeds:
-                # Update the lower bound if better
-                if best_lower_bound < lower_bound:
-                    if debug_update_lower_bound:
-                        print(f'Update - New Lower bound: {lower_bound}')
+                best_allocation = allocation
+                best_lower_bound = lower_bound
 
-                    best_allocation = allocation
-                    best_speeds = task_speeds
-                    best_lower_bound = lower_bound
+            # Generate the new candidates that could improve on the best lower bound
+            if pos < len(tasks):
+                new_candidates = [candidate for candidate in generate_non_elastic_candidates(
+                    allocation, usage, demands, capacities, values, pos, lower_bound, upper_bound)
+                    if best_lower_bound < candidate[1]]
+                if debug_new_candidate:
+                    for new_lower_bound, new_upper_bound, new_allocation, new_pos, _ in new_candidates:
+                        print(f'New candidate - Lower bound: {new_lower_bound}, upper bound: {new_upper_bound}, '
+                              f'pos: {new_pos}, allocation: {new_allocation}')
+                candidates.push_all(new_candidates)
 
-                # Generate the new candidates as the allocation was successful
-                if pos < len(tasks):
-                    candidates.push_all(generate_candidates(allocation, tasks, servers, pos, lower_bound, upper_bound,
-                                                            debug_new_candidates=debug_new_candidate))
+        if search.explored(1, best_lower_bound):
+            break
 
-    # Search is finished so allocate the tasks
-    for server, allocated_tasks in best_allocation.items():
-        for allocated_task in allocated_tasks:
-            allocated_task.allocate(best_speeds[allocated_task][0], best_speeds[allocated_task][1],
-                                    best_speeds[allocated_task][2], server)
-            server.allocate_task(allocated_task)
+    search_statistics = search.finish(best_lower_bound)
 
-    return Result('Branch & Bound', tasks, servers, time() - start_time)
+    # Search is finished so allocate the tasks
+    if best_allocation is not None:
+        for server, task_positions in zip(servers, best_allocation):
+            for pos in task_positions:
+                tasks[pos].allocate(tasks[pos].loading_speed, tasks[pos].compute_speed, tasks[pos].sending_speed,
+                                    server)
+                server.allocate_task(tasks[pos])
+
+    return Result('Branch & Bound', tasks, servers, search_statistics['solve time'],
+                  **{'nodes explored': search_statistics['nodes explored'], 'gap': search_statistics['gap']})
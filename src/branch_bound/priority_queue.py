@@ -45,9 +45,15 @@ class PriorityQueue(Generic[T]):
     queue: List[T] = []
     size: int = 0
 
-    def __init__(self, comparator: Callable[[T, T], Comparison], to_string: Callable[[T], str]):
+    def __init__(self, comparator: Callable[[T, T], Comparison], to_string: Callable[[T], str],
+                 check_tree: bool = True):
         self.comparator = comparator
         self.to_string = to_string
+        self.check_tree = check_tree
+
+        # Instance queue such that queues are not shared between searches (a stopped search leaves its frontier)
+        self.queue = []
+        self.size = 0
 
     def pop(self) -> T:
         """
@@ -80,7 +86,7 @@ class PriorityQueue(Generic[T]):
                 self.swap(pos, largest)
                 pos = largest
 
-        self.assert_tree()
+        self.assert_tree(check=self.check_tree)
 
         return pop_value
 
@@ -104,7 +110,7 @@ class PriorityQueue(Generic[T]):
             pos = parent
             parent = self.parent(pos)
 
-        self.assert_tree()
+        self.assert_tree(check=self.check_tree)
 
     def push_all(self, data: List[T]):
         """
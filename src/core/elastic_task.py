@@ -6,8 +6,10 @@ from math import ceil
 from random import gauss, randint, uniform
 from typing import TYPE_CHECKING, List
 
+import numpy as np
+
 if TYPE_CHECKING:
-    from typing import Optional, Dict, Any
+    from typing import Optional, Dict, Any, Sequence
 
     from src.core.server import Server
 
@@ -24,7 +26,8 @@ class ElasticTask:
                  deadline: int, value: Optional[float] = None, price: float = 0, auction_time: int = -1,
                  loading_speed: Optional[int] = None, compute_speed: Optional[int] = None,
                  sending_speed: Optional[int] = None,
-                 running_server: Optional[Server] = None, servers: List[Server] = None):
+                 running_server: Optional[Server] = None, servers: List[Server] = None,
+                 value_model: Optional[ConcaveValueModel] = None):
         # Name of the task
         self.name = name
 
@@ -34,7 +37,7 @@ class ElasticTask:
         self.required_results_data = required_results_data
 
         # This is the true private internal evaluation (the max price) and the price that the task runs for
-        self.value = self.concave_value(servers) if value is None else value
+        self.value = self.concave_value(servers, value_model=value_model) if value is None else value
         self.price = price
 
         # This is only used for online vs batched evaluation
@@ -114,20 +117,23 @@ class ElasticTask:
         """
         return self.value - self.price
 
-    def mutate(self, mutation_percent) -> ElasticTask:
+    def mutate(self, mutation_percent, rng: Optional[np.random.Generator] = None) -> ElasticTask:
         """
         Mutate the server by a percentage
         
         :param mutation_percent: The percentage to increase the max resources by
+        :param rng: The numpy random generator, if None then the random module is used
         """
+        # Random integer between a and b (inclusive)
+        rand_int = randint if rng is None else (lambda a, b: int(rng.integers(a, b + 1)))
         return ElasticTask(name=f'mutated {self.name}',
-                           required_storage=randint(self.required_storage,
-                                                    ceil(self.required_storage * (1 + mutation_percent))),
-                           required_computation=randint(self.required_computation,
-                                                        ceil(self.required_computation * (1 + mutation_percent))),
-                           required_results_data=randint(self.required_results_data,
-                                                         ceil(self.required_results_data * (1 + mutation_percent))),
-                           deadline=max(1, randint(ceil(self.deadline * (1 - mutation_percent)), self.deadline)),
+                           required_storage=rand_int(self.required_storage,
+                                                     ceil(self.required_storage * (1 + mutation_percent))),
+                           required_computation=rand_int(self.required_computation,
+                                                         ceil(self.required_computation * (1 + mutation_percent))),
+                           required_results_data=rand_int(self.required_results_data,
+                                                          ceil(self.required_results_data * (1 + mutation_percent))),
+                           deadline=max(1, rand_int(ceil(self.deadline * (1 - mutation_percent)), self.deadline)),
                            value=self.value)
 
     def save(self, resource_speeds=False):
@@ -180,12 +186,13 @@ class ElasticTask:
         )
 
     @staticmethod
-    def load_dist(task_dist: Dict[str, Any], task_id: int) -> ElasticTask:
+    def load_dist(task_dist: Dict[str, Any], task_id: int, rng: Optional[np.random.Generator] = None) -> ElasticTask:
         """
         Loads a task from a task distribution
 
         :param task_dist: A JSON dictionary representing task distribution
         :param task_id: A task identifier value
+        :param rng: The numpy random generator, if None then the random module is used
         :return: A new task based on a task distribution
         """
 
@@ -197,7 +204,7 @@ class ElasticTask:
             :param std: Gaussian standard deviation
             :return: A float of random gaussian distribution
             """
-            return max(1, int(gauss(mean, std)))
+            return max(1, int(gauss(mean, std) if rng is None else rng.normal(mean, std)))
 
         return ElasticTask(
             name=f'{task_dist["name"]} {task_id}',
@@ -251,23 +258,78 @@ class ElasticTask:
         """
         return ceil(5 * self.required_results_data / self.deadline)
 
-    def concave_value(self, servers: List[Server]):
+    def concave_value(self, servers: Optional[List[Server]] = None, rng: Optional[np.random.Generator] = None,
+                      value_model: Optional[ConcaveValueModel] = None):
         """
         Generates a concave utility in accordance with Araldo et al, 2020
 
         :param servers: List of servers to get the maximum resources
+        :param rng: The numpy random generator, if None then the random module is used
+        :param value_model: The value model of the servers, if None then a value model of the servers is created
+        :return: value of the task
+        """
+        value_model = ConcaveValueModel(servers) if value_model is None else value_model
+        return value_model.value(self.required_storage, self.required_computation, self.required_results_data, rng)
+
+
+class ConcaveValueModel:
+    """
+    Concave utility model (see ElasticTask.concave_value) of a set of servers, the server capacity totals are summed
+        once such that the values of many tasks are generated without iterating over the servers for each task
+    """
+
+    def __init__(self, servers: List[Server]):
+        """
+        Constructor
+
+        :param servers: List of servers to get the maximum resources
+        """
+        self.storage_total = sum(server.storage_capacity for server in servers)
+        self.comp_total = sum(server.computation_capacity for server in servers)
+        self.results_total = sum(server.bandwidth_capacity for server in servers)
+
+    def value(self, required_storage: int, required_computation: int, required_results_data: int,
+              rng: Optional[np.random.Generator] = None) -> float:
+        """
+        Generates a concave utility in accordance with Araldo et al, 2020
+
+        :param required_storage: The task required storage
+        :param required_computation: The task required computation
+        :param required_results_data: The task required results data
+        :param rng: The numpy random generator, if None then the random module is used
         :return: value of the task
         """
-        alpha, alpha_prime = uniform(0, 1), uniform(0, 1)
+        rand_uniform = uniform if rng is None else rng.uniform
+        alpha, alpha_prime = rand_uniform(0, 1), rand_uniform(0, 1)
         if alpha_prime < alpha:
             alpha, alpha_prime = alpha_prime, alpha
-        beta_storage, beta_comp, beta_results_data = uniform(1, 5), uniform(1, 5), uniform(1, 5)
-
-        storage_total = sum(server.storage_capacity for server in servers)
-        comp_total = sum(server.computation_capacity for server in servers)
-        results_total = sum(server.bandwidth_capacity for server in servers)
+        beta_storage, beta_comp, beta_results_data = rand_uniform(1, 5), rand_uniform(1, 5), rand_uniform(1, 5)
 
-        storage_value = alpha * pow(self.required_storage / storage_total, 1 / beta_storage)
-        computation_value = (alpha_prime - alpha) * pow(self.required_computation / comp_total, 1 / beta_comp)
-        results_data_value = (1 - alpha_prime) * pow(self.required_results_data / results_total, 1 / beta_results_data)
+        storage_value = alpha * pow(required_storage / self.storage_total, 1 / beta_storage)
+        computation_value = (alpha_prime - alpha) * pow(required_computation / self.comp_total, 1 / beta_comp)
+        results_data_value = (1 - alpha_prime) * pow(required_results_data / self.results_total, 1 / beta_results_data)
         return round(storage_value + computation_value + results_data_value * 100, 2)
+
+    def values(self, required_storage: Sequence[int], required_computation: Sequence[int],
+               required_results_data: Sequence[int], rng: np.random.Generator) -> np.ndarray:
+        """
+        Generates the concave utility of each task with numpy, the random numbers are drawn in the same order as value
+            for each task such that the values are equal to calling value for each task with the same generator
+
+        :param required_storage: The required storage of each task
+        :param required_computation: The required computation of each task
+        :param required_results_data: The required results data of each task
+        :param rng: The numpy random generator
+        :return: Array of the task values
+        """
+        # For each task, the alpha, alpha prime, storage beta, computation beta and results data beta
+        samples = rng.random((len(required_storage), 5))
+        alphas = np.sort(samples[:, :2], axis=1)
+        betas = 1 + 4 * samples[:, 2:]
+
+        storage_value = alphas[:, 0] * np.power(np.asarray(required_storage) / self.storage_total, 1 / betas[:, 0])
+        computation_value = (alphas[:, 1] - alphas[:, 0]) * \
+            np.power(np.asarray(required_computation) / self.comp_total, 1 / betas[:, 1])
+        results_data_value = (1 - alphas[:, 1]) * \
+            np.power(np.asarray(required_results_data) / self.results_total, 1 / betas[:, 2])
+        return np.round(storage_value + computation_value + results_data_value * 100, 2)
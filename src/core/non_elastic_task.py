@@ -5,14 +5,17 @@ from __future__ import annotations
 import sys
 import time
 from abc import abstractmethod, ABC
+from math import ceil
+from multiprocessing import Pool
 from typing import TYPE_CHECKING, List
 
+import numpy as np
 from docplex.cp.model import CpoModel, SOLVE_STATUS_FEASIBLE, SOLVE_STATUS_OPTIMAL
 
 from src.core.elastic_task import ElasticTask
 
 if TYPE_CHECKING:
-    from typing import Tuple
+    from typing import Dict, Optional, Tuple
 
     from src.core.server import Server
 
@@ -21,11 +24,13 @@ class NonElasticTask(ElasticTask):
     """Task with a non-elastic resource usage speed"""
 
     def __init__(self, task: ElasticTask, non_elastic_value_policy: NonElasticResourcePriority,
-                 non_elastic_name: bool = True):
+                 non_elastic_name: bool = True, speeds: Optional[Tuple[int, int, int]] = None):
         name = f'Non Elastic {task.name}' if non_elastic_name else task.name
 
         self.non_elastic_value_policy = non_elastic_value_policy
-        loading_speed, compute_speed, sending_speed = self.minimum_resources(task, non_elastic_value_policy)
+        if speeds is None:
+            speeds = self.minimum_resources(task, non_elastic_value_policy)
+        loading_speed, compute_speed, sending_speed = speeds
 
         ElasticTask.__init__(self, name=name, required_storage=task.required_storage,
                              required_computation=task.required_computation,
@@ -112,6 +117,9 @@ class NonElasticResourcePriority(ABC):
     non_elastic Value policy for the non_elastic task to select the speed
     """
 
+    # The power of the sum of the speeds to the power value policies, used for the exact speeds (see minimum_speeds)
+    speed_power: Optional[int] = None
+
     def __init__(self, name: str):
         self.name = name
 
@@ -131,6 +139,8 @@ class NonElasticResourcePriority(ABC):
 class SumSpeedsResourcePriority(NonElasticResourcePriority):
     """sum of speeds"""
 
+    speed_power = 1
+
     def __init__(self):
         NonElasticResourcePriority.__init__(self, 'Sum speeds')
 
@@ -142,6 +152,8 @@ class SumSpeedsResourcePriority(NonElasticResourcePriority):
 class SumSpeedPowResourcePriority(NonElasticResourcePriority):
     """non_elastic Exp Sum of speeds"""
 
+    speed_power = 2
+
     def __init__(self):
         NonElasticResourcePriority.__init__(self, 'Exp Sum Speeds')
 
@@ -153,17 +165,141 @@ class SumSpeedPowResourcePriority(NonElasticResourcePriority):
 # TODO add more non_elastic value classes
 
 
+# The memoised minimum speeds of the task requirements, deadline and speed power
+_minimum_speeds_cache: Dict[Tuple[int, int, int, int, int], Tuple[int, int, int]] = {}
+
+
+def minimum_speeds(required_storage: int, required_computation: int, required_results_data: int, deadline: int,
+                   speed_power: int) -> Tuple[int, int, int]:
+    """
+    The exact minimum of the sum of the speeds to the power (i.e. SumSpeedsResourcePriority and
+        SumSpeedPowResourcePriority) for the task to complete within the deadline. The loading and compute speeds are
+        enumerated, bounded by the closed form continuous relaxation, with the minimum sending speed in closed form
+
+    :param required_storage: The task required storage
+    :param required_computation: The task required computation
+    :param required_results_data: The task required results data
+    :param deadline: The task deadline
+    :param speed_power: The power of the speeds
+    :return: The loading, compute and sending speeds
+    """
+    storage, computation, results_data, power = required_storage, required_computation, required_results_data, \
+        speed_power
+    assert 0 < deadline and 0 < power, (deadline, power)
+
+    def feasible(loading: int, compute: int, sending: int) -> bool:
+        """
+        If the speeds complete the task within the deadline, using integer arithmetic for exact comparison
+
+        :param loading: The loading speed
+        :param compute: The compute speed
+        :param sending: The sending speed
+        :return: If the speeds are feasible
+        """
+        return storage * compute * sending + computation * loading * sending + results_data * loading * compute <= \
+            deadline * loading * compute * sending
+
+    # Initial solution from the rounded up continuous optimum, x_i = a_i^(1/(p+1)) sum_j a_j^(p/(p+1)) / deadline
+    weight_total = sum(pow(requirement, power / (power + 1)) for requirement in (storage, computation, results_data))
+    speeds = tuple(max(1, ceil(pow(requirement, 1 / (power + 1)) * weight_total / deadline))
+                   for requirement in (storage, computation, results_data))
+    while not feasible(*speeds):
+        speeds = tuple(speed + 1 for speed in speeds)
+    best = sum(speed ** power for speed in speeds)
+
+    # The loading speed lower bound of the remaining compute and sending continuous optimum given the loading speed
+    loading_speeds = np.arange(max(1, storage // deadline), int(pow(best, 1 / power)) + 2)
+    remaining_times = deadline - storage / loading_speeds
+    remaining_weight = pow(pow(computation, power / (power + 1)) + pow(results_data, power / (power + 1)), power + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lower_bounds = np.where(0 < remaining_times, loading_speeds ** power +
+                                remaining_weight / np.power(np.maximum(remaining_times, 0), power), np.inf)
+
+    for pos in np.argsort(lower_bounds, kind='stable'):
+        if best < lower_bounds[pos] * (1 - 1e-9):
+            break
+        loading = int(loading_speeds[pos])
+        loading_time = deadline * loading - storage
+        if loading_time <= 0:
+            continue
+
+        # The compute speeds such that the compute time is within the remaining time
+        min_compute = max(1, -(-computation * loading // loading_time))
+        max_compute = int(pow(max(best - loading ** power - 1, 0), 1 / power)) + 1
+        if max_compute < min_compute:
+            continue
+        compute_speeds = np.arange(min_compute, max_compute + 1, dtype=np.int64)
+
+        # The minimum sending speed, s >= results data * l * c / (deadline * l * c - storage * c - computation * l)
+        sending_time = loading_time * compute_speeds - computation * loading
+        sending_data = results_data * loading * compute_speeds
+        valid = (0 < sending_time) | ((sending_data == 0) & (sending_time == 0))
+        sending_speeds = np.where(valid, -(-sending_data // np.maximum(sending_time, 1)), 0)
+        sending_speeds = np.maximum(sending_speeds, 1)
+
+        values = np.where(valid, loading ** power + compute_speeds ** power + sending_speeds ** power,
+                          np.iinfo(np.int64).max)
+        min_pos = int(np.argmin(values))
+        if values[min_pos] < best:
+            best = int(values[min_pos])
+            speeds = (loading, int(compute_speeds[min_pos]), int(sending_speeds[min_pos]))
+
+    assert feasible(*speeds), speeds
+    return speeds
+
+
+def cached_minimum_speeds(key: Tuple[int, int, int, int, int]) -> Tuple[int, int, int]:
+    """
+    The memoised minimum speeds (see minimum_speeds)
+
+    :param key: The task required storage, computation, results data, deadline and speed power
+    :return: The loading, compute and sending speeds
+    """
+    if key not in _minimum_speeds_cache:
+        _minimum_speeds_cache[key] = minimum_speeds(*key)
+    return _minimum_speeds_cache[key]
+
+
+def bulk_non_elastic_tasks(tasks: List[ElasticTask], priority: NonElasticResourcePriority,
+                           processes: Optional[int] = None) -> List[NonElasticTask]:
+    """
+    Converts the tasks to non-elastic tasks with the exact minimum speeds, memoised by the task requirements, deadline
+        and priority such that tasks with equal requirements are only solved once
+
+    :param tasks: List of tasks
+    :param priority: non_elastic allocation priority class with a speed power
+    :param processes: The number of processes to solve the speeds, if None then the speeds are solved in process
+    :return: A list of non-elastic tasks
+    """
+    assert priority.speed_power is not None, f'Priority {priority.name} has no speed power'
+    keys = [(task.required_storage, task.required_computation, task.required_results_data, task.deadline,
+             priority.speed_power) for task in tasks]
+
+    unsolved_keys = [key for key in dict.fromkeys(keys) if key not in _minimum_speeds_cache]
+    if processes is not None and unsolved_keys:
+        with Pool(processes) as pool:
+            _minimum_speeds_cache.update(zip(unsolved_keys, pool.map(cached_minimum_speeds, unsolved_keys)))
+
+    return [NonElasticTask(task, priority, speeds=cached_minimum_speeds(key)) for task, key in zip(tasks, keys)]
+
+
 def generate_non_elastic_tasks(
         tasks: List[ElasticTask], max_tries: int = 5,
-        priority: NonElasticResourcePriority = SumSpeedPowResourcePriority()) -> List[NonElasticTask]:
+        priority: NonElasticResourcePriority = SumSpeedPowResourcePriority(),
+        processes: Optional[int] = None) -> List[NonElasticTask]:
     """
-    Generates a list of non_elastic tasks catching if the generation of the task fails for some reasons
+    Generates a list of non_elastic tasks catching if the generation of the task fails for some reasons, the priorities
+        with a speed power use the exact minimum speeds (see bulk_non_elastic_tasks)
 
     :param tasks: List of tasks
     :param priority: non_elastic allocation priority class
     :param max_tries: The max tries for generated the non_elastic task
+    :param processes: The number of processes for the exact minimum speeds, if None then solved in process
     :return: A list of non-elastic tasks
     """
+    if priority.speed_power is not None:
+        return bulk_non_elastic_tasks(tasks, priority, processes)
+
     non_elastic_tasks = []
     for task in tasks:
         tries = 0
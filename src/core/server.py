@@ -4,7 +4,9 @@ from __future__ import annotations
 
 from random import gauss
 from typing import Dict, Any
-from typing import List
+from typing import List, Optional
+
+import numpy as np
 
 from src.core.non_elastic_task import NonElasticTask
 from src.core.elastic_task import ElasticTask
@@ -136,16 +138,18 @@ class Server:
         self.revenue = 0
         self.value = 0
 
-    def mutate(self, percent: float) -> Server:
+    def mutate(self, percent: float, rng: Optional[np.random.Generator] = None) -> Server:
         """
         Mutate the server by a percentage
 
         :param percent: The percentage to increase the max resources by
+        :param rng: The numpy random generator, if None then the random module is used
         """
+        rand_gauss = gauss if rng is None else rng.normal
         return Server(f'mutated {self.name}',
-                      max(1, int(self.storage_capacity - abs(gauss(0, self.storage_capacity * percent)))),
-                      max(1, int(self.computation_capacity - abs(gauss(0, self.computation_capacity * percent)))),
-                      max(1, int(self.bandwidth_capacity - abs(gauss(0, self.bandwidth_capacity * percent)))),
+                      max(1, int(self.storage_capacity - abs(rand_gauss(0, self.storage_capacity * percent)))),
+                      max(1, int(self.computation_capacity - abs(rand_gauss(0, self.computation_capacity * percent)))),
+                      max(1, int(self.bandwidth_capacity - abs(rand_gauss(0, self.bandwidth_capacity * percent)))),
                       self.price_change)
 
     def update_capacities(self, computation_capacity: int, bandwidth_capacity: int):
@@ -202,18 +206,19 @@ class Server:
         )
 
     @staticmethod
-    def load_dist(server_dist: Dict[str, Any], server_id: int) -> Server:
+    def load_dist(server_dist: Dict[str, Any], server_id: int, rng: Optional[np.random.Generator] = None) -> Server:
         """
         Loads a server distribution to instantiate a new server
 
         :param server_dist: Json dictionary for a server distribution
         :param server_id: The server number as a unique identifier
+        :param rng: The numpy random generator, if None then the random module is used
         :return: A new server using the server distribution and identifier
         """
 
         def gaussian(mean, std) -> int:
             """Generates a new positive gaussian distribution from a mean and standard distribution"""
-            return max(1, int(gauss(mean, std)))
+            return max(1, int(gauss(mean, std) if rng is None else rng.normal(mean, std)))
 
         return Server(
             name=f'{server_dist["name"]} {server_id}',
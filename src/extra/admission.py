@@ -0,0 +1,278 @@
+"""
+Asyncio admission control service for online resource allocation, tasks are submitted (in-process or over a local
+    socket), grouped into micro-batches by time or size and allocated with a solver (i.e. the greedy algorithm) with the
+    allocation decision (server, speeds and price) replied to each task submission
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from functools import partial
+from heapq import heappush, heappop
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from src.core.elastic_task import ElasticTask
+from src.greedy.greedy import greedy_algorithm
+from src.greedy.resource_allocation import SumPowPercentage
+from src.greedy.server_selection import SumResources
+from src.greedy.task_priority import UtilityDeadlinePerResourcePriority, SqrtResourcesPriority
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+    from src.core.server import Server
+    from src.extra.model import ModelDist
+
+
+class AdmissionService:
+    """
+    Admission control service that allocates the submitted tasks in micro-batches, the task deadlines are in time steps
+        of time_step_length seconds after which the tasks depart and the server resources are released
+    """
+
+    def __init__(self, servers: List[Server], max_batch_time: float = 0.05, max_batch_size: int = 32,
+                 time_step_length: float = 1, solver=greedy_algorithm, **solver_args):
+        """
+        Constructor
+
+        :param servers: List of servers
+        :param max_batch_time: The maximum time (seconds) that the first task of a micro-batch waits
+        :param max_batch_size: The maximum number of tasks in a micro-batch
+        :param time_step_length: The length of a time step in seconds for the task deadlines
+        :param solver: Solver function
+        :param solver_args: Solver function arguments, if no arguments are given for the greedy algorithm then the
+            default greedy policies are used
+        """
+        assert 0 < max_batch_time and 0 < max_batch_size and 0 < time_step_length
+
+        self.servers = servers
+        self.max_batch_time = max_batch_time
+        self.max_batch_size = max_batch_size
+        self.time_step_length = time_step_length
+
+        if solver is greedy_algorithm and not solver_args:
+            solver_args = {'task_priority': UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                           'server_selection': SumResources(), 'resource_allocation': SumPowPercentage()}
+        self.solver = partial(solver, **solver_args)
+
+        # The queue of submissions (task, decision future, submit time) and heap of departures (time, number, task)
+        self.queue: Optional[asyncio.Queue] = None
+        self.socket_server: Optional[asyncio.AbstractServer] = None
+        self.departures: List[Tuple[float, int, ElasticTask]] = []
+        self.start_time = perf_counter()
+        self.num_allocated = 0
+
+        self.queueing_latencies: List[float] = []
+        self.decision_latencies: List[float] = []
+        self.batch_sizes: List[int] = []
+
+    async def submit(self, task: ElasticTask) -> Dict[str, Any]:
+        """
+        Submits a task to the service and waits for the allocation decision
+
+        :param task: The task
+        :return: The allocation decision
+        """
+        assert self.queue is not None, 'Admission service is not running'
+        decision = asyncio.get_event_loop().create_future()
+        await self.queue.put((task, decision, perf_counter()))
+        return await decision
+
+    async def run(self):
+        """
+        Runs the service, processing the micro-batches of the submitted tasks until cancelled
+        """
+        self.queue = asyncio.Queue()
+        loop = asyncio.get_event_loop()
+        while True:
+            # Wait for the first submission then the micro-batch is filled until the time or size limit
+            submissions = [await self.queue.get()]
+            batch_end_time = submissions[0][2] + self.max_batch_time
+            while len(submissions) < self.max_batch_size:
+                if not self.queue.empty():
+                    submissions.append(self.queue.get_nowait())
+                elif perf_counter() < batch_end_time:
+                    try:
+                        submissions.append(await asyncio.wait_for(self.queue.get(), batch_end_time - perf_counter()))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    break
+
+            batch_start_time = perf_counter()
+            self.release_departures(batch_start_time)
+            tasks = [task for task, _, _ in submissions]
+            time_step = int((batch_start_time - self.start_time) / self.time_step_length)
+            for task in tasks:
+                task.auction_time = time_step
+            await loop.run_in_executor(None, self.solver, tasks, self.servers)
+
+            decision_time = perf_counter()
+            self.batch_sizes.append(len(tasks))
+            for task, decision, submit_time in submissions:
+                if task.running_server:
+                    heappush(self.departures, (batch_start_time + task.deadline * self.time_step_length,
+                                               self.num_allocated, task))
+                    self.num_allocated += 1
+
+                self.queueing_latencies.append(batch_start_time - submit_time)
+                self.decision_latencies.append(decision_time - submit_time)
+                if not decision.done():
+                    decision.set_result(self.decision(task))
+
+    def release_departures(self, current_time: float):
+        """
+        Releases the server resources of the tasks that have departed
+
+        :param current_time: The current time
+        """
+        while self.departures and self.departures[0][0] <= current_time:
+            _, _, task = heappop(self.departures)
+            server = task.running_server
+            server.allocated_tasks.remove(task)
+            server.available_storage += task.required_storage
+            server.available_computation += task.compute_speed
+            server.available_bandwidth += task.loading_speed + task.sending_speed
+
+    @staticmethod
+    def decision(task: ElasticTask) -> Dict[str, Any]:
+        """
+        The allocation decision for the task
+
+        :param task: The task
+        :return: Dictionary of the task name, server name (None if not allocated), resource speeds and price
+        """
+        return {
+            'task': task.name, 'server': task.running_server.name if task.running_server else None,
+            'loading speed': task.loading_speed, 'compute speed': task.compute_speed,
+            'sending speed': task.sending_speed, 'price': task.price
+        }
+
+    def latency_percentiles(self, percentiles: Iterable[float] = (50, 90, 99)) -> Dict[str, Dict[str, float]]:
+        """
+        The queueing and decision latency percentiles (in seconds) of the task submissions
+
+        :param percentiles: The latency percentiles
+        :return: Dictionary of the queueing and decision latency percentiles
+        """
+        percentiles = list(percentiles)
+        return {
+            latency_name: dict(zip((f'p{percentile}' for percentile in percentiles),
+                                   np.percentile(latencies, percentiles).tolist()) if latencies else {})
+            for latency_name, latencies in (('queueing', self.queueing_latencies),
+                                            ('decision', self.decision_latencies))
+        }
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Handles a socket client that sends the tasks as json lines (see ElasticTask.save) with a json line reply of the
+            allocation decision for each task
+
+        :param reader: The client stream reader
+        :param writer: The client stream writer
+        """
+
+        async def reply(task_decision):
+            """
+            Replies the decision of a task submission
+
+            :param task_decision: The decision coroutine
+            """
+            writer.write((json.dumps(await task_decision) + '\n').encode())
+            await writer.drain()
+
+        replies = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            replies.append(asyncio.ensure_future(reply(self.submit(ElasticTask.load(json.loads(line))))))
+        await asyncio.gather(*replies)
+        writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765):
+        """
+        Runs the service with a local socket server until cancelled
+
+        :param host: The server host
+        :param port: The server port
+        """
+        service = asyncio.ensure_future(self.run())
+        self.socket_server = await asyncio.start_server(self.handle_client, host, port)
+        try:
+            await service
+        finally:
+            self.socket_server.close()
+            await self.socket_server.wait_closed()
+
+
+async def load_generator(host: str, port: int, tasks: List[ElasticTask], arrival_rate: float = 100,
+                         connections: int = 4) -> List[Dict[str, Any]]:
+    """
+    Local load generator client that submits the tasks to the admission service socket with exponential inter-arrival
+        times over a number of connections
+
+    :param host: The service host
+    :param port: The service port
+    :param tasks: List of tasks
+    :param arrival_rate: The mean number of tasks submitted per second
+    :param connections: The number of client connections
+    :return: List of the allocation decisions
+    """
+
+    async def client(client_tasks: List[ElasticTask]) -> List[Dict[str, Any]]:
+        """
+        Submits the client tasks with the decisions read as they are replied
+
+        :param client_tasks: List of the client tasks
+        :return: List of the client task decisions
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        for task in client_tasks:
+            await asyncio.sleep(np.random.exponential(connections / arrival_rate))
+            writer.write((json.dumps(task.save()) + '\n').encode())
+            await writer.drain()
+        writer.write_eof()
+
+        decisions = [json.loads(line) for line in [await reader.readline() for _ in client_tasks]]
+        writer.close()
+        return decisions
+
+    client_decisions = await asyncio.gather(*(client(tasks[pos::connections]) for pos in range(connections)))
+    return [decision for decisions in client_decisions for decision in decisions]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.extra.model import get_model, SERVER_STREAM, TASK_STREAM
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('mode', choices=('service', 'client'))
+    parser.add_argument('-m', '--model', default='synthetic', help='Model distribution')
+    parser.add_argument('-s', '--servers', type=int, default=8, help='Number of servers for the service')
+    parser.add_argument('-t', '--tasks', type=int, default=1000, help='Number of tasks for the client')
+    parser.add_argument('-r', '--rate', type=float, default=100, help='Client task arrival rate per second')
+    parser.add_argument('--seed', type=int, default=None, help='Seed such that the service and client servers match')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    model_dist: ModelDist = get_model(args.model, args.tasks, args.servers, args.seed)
+    # The client task values (i.e. the alibaba concave value) are relative to the servers
+    server_rng = model_dist.rng(0, SERVER_STREAM)
+    model_servers = [model_dist.generate_server(server_id, server_rng) for server_id in range(args.servers)]
+    if args.mode == 'service':
+        admission_service = AdmissionService(model_servers)
+        try:
+            asyncio.run(admission_service.serve(port=args.port))
+        except KeyboardInterrupt:
+            print(f'Latency percentiles: {admission_service.latency_percentiles()}')
+    else:
+        generated_tasks = model_dist.generate_tasks(model_servers, args.tasks, rng=model_dist.rng(0, TASK_STREAM))
+        task_decisions = asyncio.run(load_generator('127.0.0.1', args.port, generated_tasks, args.rate))
+        print(f'Tasks allocated: {sum(decision["server"] is not None for decision in task_decisions)} '
+              f'of {len(task_decisions)}')
@@ -0,0 +1,98 @@
+"""
+Binary cache of the csv model data tables (i.e. the alibaba and google cluster tasks), each table column is converted
+    once to a typed npy file that later loads memory-map such that model startup doesn't reparse the csv and parallel
+    workers share the same pages. The cache is invalidated if the csv file size or modification time changes
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Optional
+
+
+def table_cache_dir(filename: str) -> str:
+    """
+    The cache directory of a csv file, the .cache directory next to the csv file
+
+    :param filename: The csv filename
+    :return: The cache directory
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(filename)), '.cache', os.path.basename(filename))
+
+
+def write_table_cache(filename: str, cache_dir: str, source: Dict[str, Any], **read_csv_args):
+    """
+    Converts the csv file to a npy file for each column with the metadata file written last such that a partially
+        written cache is never loaded
+
+    :param filename: The csv filename
+    :param cache_dir: The cache directory
+    :param source: The csv source information for the cache invalidation
+    :param read_csv_args: Arguments for reading the csv with pandas
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    df = pd.read_csv(filename, **read_csv_args)
+
+    columns = []
+    for pos, column in enumerate(df.columns):
+        values = df[column].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        # Write to a temporary file then rename for other processes loading the cache
+        temp_filename = os.path.join(cache_dir, f'column_{pos}.{os.getpid()}.npy')
+        np.save(temp_filename, values)
+        os.replace(temp_filename, os.path.join(cache_dir, f'column_{pos}.npy'))
+        columns.append(str(column))
+
+    temp_filename = os.path.join(cache_dir, f'meta.{os.getpid()}.json')
+    with open(temp_filename, 'w') as file:
+        json.dump({'source': source, 'columns': columns}, file)
+    os.replace(temp_filename, os.path.join(cache_dir, 'meta.json'))
+
+
+def load_table(filename: str, cache_dir: Optional[str] = None, **read_csv_args) -> Dict[str, np.ndarray]:
+    """
+    Loads the columns of a csv file as memory-mapped arrays from the binary cache, the cache is created if it doesn't
+        exist or the csv file has changed
+
+    :param filename: The csv filename
+    :param cache_dir: The cache directory, if None then the .cache directory next to the csv file
+    :param read_csv_args: Arguments for reading the csv with pandas
+    :return: Dictionary of the column names and (read only) column arrays
+    """
+    cache_dir = table_cache_dir(filename) if cache_dir is None else cache_dir
+    stat = os.stat(filename)
+    source = {'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+              'read csv args': json.loads(json.dumps(read_csv_args, default=str))}
+
+    meta_filename = os.path.join(cache_dir, 'meta.json')
+    meta = None
+    if os.path.exists(meta_filename):
+        with open(meta_filename) as file:
+            meta = json.load(file)
+    if meta is None or meta['source'] != source:
+        write_table_cache(filename, cache_dir, source, **read_csv_args)
+        with open(meta_filename) as file:
+            meta = json.load(file)
+
+    return {column: np.load(os.path.join(cache_dir, f'column_{pos}.npy'), mmap_mode='r')
+            for pos, column in enumerate(meta['columns'])}
+
+
+def load_dataframe(filename: str, cache_dir: Optional[str] = None, **read_csv_args) -> pd.DataFrame:
+    """
+    Loads a csv file as a dataframe from the binary cache (see load_table)
+
+    :param filename: The csv filename
+    :param cache_dir: The cache directory, if None then the .cache directory next to the csv file
+    :param read_csv_args: Arguments for reading the csv with pandas
+    :return: The dataframe of the csv file
+    """
+    return pd.DataFrame(load_table(filename, cache_dir, **read_csv_args), copy=False)
@@ -0,0 +1,187 @@
+"""
+Instance store of the evaluation model instances (tasks and servers), each instance is saved once as a compressed npz
+    file of typed attribute arrays keyed by the content hash of the arrays such that results reference the instance hash
+    rather than embedding the tasks and servers. Instances are loaded lazily, the arrays are only read when the tasks
+    or servers are first requested
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from src.core.elastic_task import ElasticTask
+from src.core.server import Server
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
+
+# The instance arrays of the task and server attributes
+task_attributes = ('name', 'storage', 'computation', 'results data', 'deadline', 'value', 'auction time')
+server_attributes = ('name', 'storage capacity', 'computation capacity', 'bandwidth capacity', 'price change',
+                     'initial price')
+
+
+def instance_arrays(tasks: List[ElasticTask], servers: List[Server]) -> Dict[str, np.ndarray]:
+    """
+    The typed attribute arrays of the tasks and servers
+
+    :param tasks: List of tasks
+    :param servers: List of servers
+    :return: Dictionary of the task and server attribute arrays
+    """
+    task_specs, server_specs = [task.save() for task in tasks], [server.save() for server in servers]
+    # Tasks without an auction time are saved with an auction time of -1
+    arrays = {f'task {attribute}': np.array([spec.get(attribute, -1) for spec in task_specs],
+                                            dtype=str if attribute == 'name' else None)
+              for attribute in task_attributes}
+    arrays.update({f'server {attribute}': np.array([spec[attribute] for spec in server_specs],
+                                                   dtype=str if attribute == 'name' else None)
+                   for attribute in server_attributes})
+    return arrays
+
+
+def instance_hash(arrays: Dict[str, np.ndarray]) -> str:
+    """
+    The content hash of the instance arrays, including the array types and shapes
+
+    :param arrays: Dictionary of the instance arrays
+    :return: The hexadecimal hash
+    """
+    content_hash = hashlib.sha256()
+    for key in sorted(arrays):
+        array = np.ascontiguousarray(arrays[key])
+        content_hash.update(f'{key}:{array.dtype.str}:{array.shape};'.encode())
+        content_hash.update(array.tobytes())
+    return content_hash.hexdigest()[:20]
+
+
+class Instance:
+    """
+    Lazily loaded instance of the instance store
+    """
+
+    def __init__(self, instance_hash: str, filename: str):
+        """
+        Constructor
+
+        :param instance_hash: The instance hash
+        :param filename: The instance npz filename
+        """
+        self.hash = instance_hash
+        self.filename = filename
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        The instance arrays, read from the file on the first access
+
+        :return: Dictionary of the instance arrays
+        """
+        if self._arrays is None:
+            with np.load(self.filename) as data:
+                self._arrays = {key: data[key] for key in data.files}
+        return self._arrays
+
+    def tasks(self) -> List[ElasticTask]:
+        """
+        New tasks of the instance, such that the instance can be solved repeatedly
+
+        :return: List of tasks
+        """
+        columns = [self.arrays[f'task {attribute}'].tolist() for attribute in task_attributes]
+        return [ElasticTask(name, required_storage=storage, required_computation=computation,
+                            required_results_data=results_data, deadline=deadline, value=value,
+                            auction_time=auction_time)
+                for name, storage, computation, results_data, deadline, value, auction_time in zip(*columns)]
+
+    def servers(self) -> List[Server]:
+        """
+        New servers of the instance, such that the instance can be solved repeatedly
+
+        :return: List of servers
+        """
+        columns = [self.arrays[f'server {attribute}'].tolist() for attribute in server_attributes]
+        return [Server.load(dict(zip(server_attributes, server_spec))) for server_spec in zip(*columns)]
+
+    def load(self) -> Tuple[List[ElasticTask], List[Server]]:
+        """
+        New tasks and servers of the instance
+
+        :return: Tuple of the tasks and servers
+        """
+        return self.tasks(), self.servers()
+
+
+class InstanceStore:
+    """
+    Content addressed store of the model instances in a directory
+    """
+
+    def __init__(self, directory: str = 'instances'):
+        """
+        Constructor
+
+        :param directory: The store directory
+        """
+        self.directory = directory
+        self.instances: Dict[str, Instance] = {}
+
+    def filename(self, instance_hash: str) -> str:
+        """
+        The npz filename of an instance
+
+        :param instance_hash: The instance hash
+        :return: The instance filename
+        """
+        return os.path.join(self.directory, f'{instance_hash}.npz')
+
+    def __contains__(self, instance_hash: str) -> bool:
+        return instance_hash in self.instances or os.path.exists(self.filename(instance_hash))
+
+    def add(self, tasks: List[ElasticTask], servers: List[Server]) -> str:
+        """
+        Adds the instance to the store, if an instance with the same hash exists then the instance isn't saved again
+
+        :param tasks: List of tasks
+        :param servers: List of servers
+        :return: The instance hash
+        """
+        arrays = instance_arrays(tasks, servers)
+        key = instance_hash(arrays)
+        if key not in self:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file then rename for other processes adding the same instance
+            temp_filename = os.path.join(self.directory, f'{key}.{os.getpid()}.npz')
+            np.savez_compressed(temp_filename, **arrays)
+            os.replace(temp_filename, self.filename(key))
+        return key
+
+    def get(self, instance_hash: str) -> Instance:
+        """
+        Gets an instance of the store, the instance arrays are not loaded until used
+
+        :param instance_hash: The instance hash
+        :return: The instance
+        """
+        if instance_hash not in self.instances:
+            assert os.path.exists(self.filename(instance_hash)), f'Unknown instance: {instance_hash}'
+            self.instances[instance_hash] = Instance(instance_hash, self.filename(instance_hash))
+        return self.instances[instance_hash]
+
+    def load_model(self, model_results: Dict[str, Any]) -> Tuple[List[ElasticTask], List[Server]]:
+        """
+        Loads the tasks and servers of the model results, either the instance hash or embedded tasks and servers
+
+        :param model_results: The model results, i.e. results['model']
+        :return: Tuple of the tasks and servers
+        """
+        if 'instance' in model_results:
+            return self.get(model_results['instance']).load()
+        else:
+            return [ElasticTask.load(task_spec) for task_spec in model_results['tasks']], \
+                   [Server.load(server_spec) for server_spec in model_results['servers']]
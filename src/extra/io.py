@@ -77,6 +77,11 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('-t', '--tasks', help='Number of tasks', default=None)
     parser.add_argument('-s', '--servers', help='Number of servers', default=None)
     parser.add_argument('-e', '--extra', help='Extra information to pass to the script', default='')
+    parser.add_argument('-r', '--repeat', help='The first repeat number of the random streams', type=int, default=0)
+    parser.add_argument('--seed', help='The seed of the random streams, if not set then the models are not seeded',
+                        type=int, default=None)
+    parser.add_argument('-i', '--instances', help='The instance store directory, if not set then the model instances '
+                                                  'are embedded in the results', default=None)
 
     args = parser.parse_args()
 
@@ -0,0 +1,139 @@
+"""
+Compact time series metrics of the server usage for online runs
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from src.extra.result import resource_usage
+
+if TYPE_CHECKING:
+    from typing import List
+
+    from src.core.server import Server
+
+
+class MetricsRecorder:
+    """
+    Records the server metrics (storage, computation and bandwidth usage and number of tasks allocated) of each batch
+        into a preallocated numpy array of shape (batches, servers, metrics). Batches can be downsampled by averaging
+        the metrics over a number of batches
+    """
+
+    metric_names = ('storage used', 'computation used', 'bandwidth used', 'num tasks allocated')
+
+    def __init__(self, servers: List[Server], num_batches: int = 1000, downsample: int = 1):
+        """
+        Constructor
+
+        :param servers: List of servers
+        :param num_batches: The expected number of batches to preallocate, the arrays are grown if exceeded
+        :param downsample: The number of batches averaged for each recorded metric
+        """
+        assert 0 < downsample, f'Downsample: {downsample}'
+
+        self.server_names = [server.name for server in servers]
+        self.downsample = downsample
+
+        self.metric_sums = np.zeros((max(1, -(-num_batches // downsample)), len(servers), len(self.metric_names)))
+        self.metric_counts = np.zeros(len(self.metric_sums), dtype=np.int64)
+        self.num_recorded = 0
+
+    def record(self, batch_num: int, servers: List[Server], num_batches: int = 1):
+        """
+        Records the server metrics for the batch, or in bulk for a number of batches with the same metrics
+
+        :param batch_num: The (first) batch number
+        :param servers: List of servers, in the same order as the constructor
+        :param num_batches: The number of batches from the batch number with the same metrics
+        """
+        first_pos, last_pos = batch_num // self.downsample, (batch_num + num_batches - 1) // self.downsample
+        if len(self.metric_sums) <= last_pos:
+            # Double the size of the arrays
+            size = max(last_pos + 1, 2 * len(self.metric_sums))
+            self.metric_sums = np.concatenate((self.metric_sums, np.zeros((size - len(self.metric_sums),) +
+                                                                          self.metric_sums.shape[1:])))
+            self.metric_counts = np.concatenate((self.metric_counts,
+                                                 np.zeros(size - len(self.metric_counts), dtype=np.int64)))
+
+        # The number of batches within each downsampled position
+        positions = np.arange(first_pos, last_pos + 1)
+        counts = np.minimum((positions + 1) * self.downsample, batch_num + num_batches) - \
+            np.maximum(positions * self.downsample, batch_num)
+
+        metrics = np.array([[resource_usage(server, 'storage'), resource_usage(server, 'computation'),
+                             resource_usage(server, 'bandwidth'), len(server.allocated_tasks)] for server in servers])
+        self.metric_sums[first_pos:last_pos + 1] += counts[:, np.newaxis, np.newaxis] * metrics
+        self.metric_counts[first_pos:last_pos + 1] += counts
+        self.num_recorded = max(self.num_recorded, last_pos + 1)
+
+    @property
+    def metrics(self) -> np.ndarray:
+        """
+        The (downsampled) metrics array of shape (batches, servers, metrics)
+
+        :return: The metrics array
+        """
+        counts = self.metric_counts[:self.num_recorded]
+        return self.metric_sums[:self.num_recorded] / np.maximum(counts, 1)[:, np.newaxis, np.newaxis]
+
+    def metric(self, metric_name: str) -> np.ndarray:
+        """
+        The metric for all of the servers
+
+        :param metric_name: The metric name
+        :return: Array of shape (batches, servers)
+        """
+        return self.metrics[:, :, self.metric_names.index(metric_name)]
+
+    def rolling(self, metric_name: str, window: int, aggregate: str = 'mean') -> np.ndarray:
+        """
+        The rolling aggregate of the metric over a window of (downsampled) batches
+
+        :param metric_name: The metric name
+        :param window: The window length
+        :param aggregate: Either the rolling mean, sum, min or max
+        :return: Array of shape (batches - window + 1, servers)
+        """
+        assert 0 < window, f'Window: {window}'
+        values = self.metric(metric_name)
+        if len(values) < window:
+            return np.zeros((0, values.shape[1]))
+
+        if aggregate == 'mean' or aggregate == 'sum':
+            cumulative = np.concatenate((np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)))
+            sums = cumulative[window:] - cumulative[:-window]
+            return sums / window if aggregate == 'mean' else sums
+        elif aggregate == 'min' or aggregate == 'max':
+            windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+            return windows.min(axis=-1) if aggregate == 'min' else windows.max(axis=-1)
+        else:
+            raise Exception(f'Unknown aggregate: {aggregate}')
+
+    def save(self, filename: str):
+        """
+        Saves the metrics to a compressed npz file
+
+        :param filename: The filename
+        """
+        np.savez_compressed(filename, metrics=self.metrics.astype(np.float32), server_names=self.server_names,
+                            metric_names=self.metric_names, downsample=self.downsample)
+
+    @staticmethod
+    def load(filename: str) -> MetricsRecorder:
+        """
+        Loads the metrics from a npz file
+
+        :param filename: The filename
+        :return: The metrics recorder
+        """
+        with np.load(filename) as data:
+            recorder = MetricsRecorder([], len(data['metrics']), int(data['downsample']))
+            recorder.server_names = data['server_names'].tolist()
+            recorder.metric_sums = data['metrics'].astype(np.float64)
+            recorder.metric_counts = np.ones(len(recorder.metric_sums), dtype=np.int64)
+            recorder.num_recorded = len(recorder.metric_sums)
+        return recorder
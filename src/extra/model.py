@@ -11,90 +11,248 @@ from math import ceil
 from pprint import PrettyPrinter
 from typing import TYPE_CHECKING
 
-import pandas as pd
+import numpy as np
 
 from src.core.non_elastic_task import generate_non_elastic_tasks
 from src.core.server import Server
-from src.core.elastic_task import ElasticTask
+from src.core.elastic_task import ConcaveValueModel, ElasticTask
+from src.extra.cache import load_table
+from src.extra.instance_store import InstanceStore
 
 if TYPE_CHECKING:
-    from typing import Tuple, List, Optional
+    from typing import Any, Dict, Iterator, Tuple, List, Optional
+
+# The random streams of each repeat for the entities generated
+SERVER_STREAM, TASK_STREAM, ARRIVAL_STREAM, MUTATION_STREAM = range(4)
+
+
+def random_module_rng() -> np.random.Generator:
+    """
+    A numpy random generator seeded from the random module, such that the bulk generation without a seed is still
+        reproduced by random.seed
+
+    :return: The random generator
+    """
+    return np.random.default_rng(rnd.getrandbits(64))
 
 
 class ModelDist:
     def __init__(self, model_filename: Optional[str] = None, num_tasks: Optional[int] = None,
-                 num_servers: Optional[int] = None):
+                 num_servers: Optional[int] = None, seed: Optional[int] = None, first_repeat: int = 0):
         self.num_tasks = num_tasks
         self.num_servers = num_servers
 
+        # The seed and first repeat number of the random streams, see rng
+        self.seed = seed
+        self.first_repeat = first_repeat
+
+        # The instance store of the evaluation models, if None then the models are embedded in the results
+        self.instance_store: Optional[InstanceStore] = None
+
         with open(model_filename) as file:
             self.model = json.load(file)
 
             self.name = self.model['name']
 
-    def generate_oneshot(self) -> Tuple[List[ElasticTask], List[Server]]:
+    def rng(self, repeat: Optional[int], stream: int) -> Optional[np.random.Generator]:
+        """
+        The counter-based random generator of a repeat and entity stream (i.e. servers, tasks, arrivals or mutations)
+            such that each repeat can be generated independently on any worker and reproduce the same model
+
+        :param repeat: The repeat number (offset by the first repeat)
+        :param stream: The entity stream
+        :return: The random generator, None if the seed or repeat is None such that the random module is used (see
+            random_module_rng)
+        """
+        if self.seed is None or repeat is None:
+            return None
+        seed_sequence = np.random.SeedSequence(self.seed, spawn_key=(self.first_repeat + repeat, stream))
+        return np.random.Generator(np.random.Philox(seed_sequence))
+
+    def generate_oneshot(self, repeat: Optional[int] = None) -> Tuple[List[ElasticTask], List[Server]]:
         """
         Creates a list of tasks and servers from a task and server distribution
 
+        :param repeat: The repeat number for the random streams
         :return: A list of tasks and list of servers
         """
-        servers = [self.generate_server(server_id) for server_id in range(self.num_servers)]
-        return [self.generate_task(servers, task_id) for task_id in range(self.num_tasks)], servers
+        server_rng = self.rng(repeat, SERVER_STREAM)
+        servers = [self.generate_server(server_id, server_rng) for server_id in range(self.num_servers)]
+        return self.generate_tasks(servers, self.num_tasks, rng=self.rng(repeat, TASK_STREAM)), servers
 
-    def generate_online(self, time_steps: int, mean_arrival_rate: float,
-                        std_arrival_rate: float) -> Tuple[List[ElasticTask], List[Server]]:
+    def generate_online(self, time_steps: int, mean_arrival_rate: float, std_arrival_rate: float,
+                        repeat: Optional[int] = None) -> Tuple[List[ElasticTask], List[Server]]:
         """
         Create a list of tasks and servers from a task and server distribution with online distribution
 
         :param time_steps: Number of time steps
         :param mean_arrival_rate: Mean number of tasks that arrive each time steps
         :param std_arrival_rate: Standard deviation of the number of tasks that arrive each time steps
+        :param repeat: The repeat number for the random streams
         :return: A list of tasks and list of servers
         """
-        servers = [self.generate_server(server_id) for server_id in range(self.num_servers)]
+        server_rng = self.rng(repeat, SERVER_STREAM)
+        servers = [self.generate_server(server_id, server_rng) for server_id in range(self.num_servers)]
+        return list(self.stream_online(servers, mean_arrival_rate, std_arrival_rate, time_steps, repeat)), servers
 
-        tasks, task_id = [], 0
-        for time_step in range(time_steps):
-            for task in range(max(0, int(rnd.gauss(mean_arrival_rate, std_arrival_rate)))):
-                task = self.generate_task(servers, task_id)
+    def stream_online(self, servers: List[Server], mean_arrival_rate: float, std_arrival_rate: float,
+                      time_steps: Optional[int] = None, repeat: Optional[int] = None) -> Iterator[ElasticTask]:
+        """
+        Lazily generates the online tasks (see generate_online) in order of auction time such that the tasks are only
+            created when required by the online simulation
 
+        :param servers: List of servers
+        :param mean_arrival_rate: Mean number of tasks that arrive each time steps
+        :param std_arrival_rate: Standard deviation of the number of tasks that arrive each time steps
+        :param time_steps: Number of time steps, if None then the tasks are unbounded
+        :param repeat: The repeat number for the random streams
+        :return: Iterator of tasks
+        """
+        arrival_rng, task_rng = self.rng(repeat, ARRIVAL_STREAM), self.rng(repeat, TASK_STREAM)
+        rand_gauss = rnd.gauss if arrival_rng is None else arrival_rng.normal
+
+        time_step, task_id = 0, 0
+        while time_steps is None or time_step < time_steps:
+            # The tasks that arrive at each time step are generated together
+            for task in self.generate_tasks(servers, max(0, int(rand_gauss(mean_arrival_rate, std_arrival_rate))),
+                                            task_id, task_rng):
                 task.auction_time, task_id = time_step, task_id + 1
-                tasks.append(task)
+                yield task
+            time_step += 1
 
-        return tasks, servers
-
-    def generate_server(self, server_id: int) -> Server:
+    def generate_server(self, server_id: int, rng: Optional[np.random.Generator] = None) -> Server:
         return Server.load(self.model['servers'][server_id])
 
-    def generate_task(self, servers: List[Server], task_id: int) -> ElasticTask:
+    def generate_task(self, servers: List[Server], task_id: int,
+                      rng: Optional[np.random.Generator] = None) -> ElasticTask:
         return ElasticTask.load(self.model['tasks'][task_id])
 
+    def generate_tasks(self, servers: List[Server], num_tasks: int, first_task_id: int = 0,
+                       rng: Optional[np.random.Generator] = None) -> List[ElasticTask]:
+        """
+        Generates a number of tasks, subclasses can override this to generate the tasks in bulk
+
+        :param servers: List of servers
+        :param num_tasks: The number of tasks
+        :param first_task_id: The task id of the first task
+        :param rng: The numpy random generator
+        :return: List of tasks
+        """
+        return [self.generate_task(servers, task_id, rng)
+                for task_id in range(first_task_id, first_task_id + num_tasks)]
+
 
 class SyntheticModelDist(ModelDist):
     def __init__(self, num_tasks: Optional[int] = None, num_servers: Optional[int] = None,
-                 filename: str = 'models/synthetic.mdl'):
-        ModelDist.__init__(self, filename, num_tasks, num_servers)
+                 filename: str = 'models/synthetic.mdl', seed: Optional[int] = None, first_repeat: int = 0):
+        ModelDist.__init__(self, filename, num_tasks, num_servers, seed, first_repeat)
+
+        # The cumulative probabilities of the task and server distributions for bulk generation
+        self.task_cdf = np.cumsum([task_dist['probability']
+                                   for task_dist in self.model.get('task distributions', [])])
+        self.server_cdf = np.cumsum([server_dist['probability']
+                                     for server_dist in self.model.get('server distributions', [])])
 
-    def generate_server(self, server_id: int) -> Server:
-        probability = rnd.random()
+    def generate_server(self, server_id: int, rng: Optional[np.random.Generator] = None) -> Server:
+        probability = rnd.random() if rng is None else rng.random()
         server_dist = next(server_dist for i, server_dist in enumerate(self.model['server distributions'])
                            if probability <= sum(self.model['server distributions'][j]['probability']
                                                  for j in range(i + 1)))
-        return Server.load_dist(server_dist, server_id)
+        return Server.load_dist(server_dist, server_id, rng)
 
-    def generate_task(self, servers: List[Server], task_id: int) -> ElasticTask:
-        probability = rnd.random()
+    def generate_task(self, servers: List[Server], task_id: int,
+                      rng: Optional[np.random.Generator] = None) -> ElasticTask:
+        probability = rnd.random() if rng is None else rng.random()
         task_dist = next(task_dist for i, task_dist in enumerate(self.model['task distributions'])
                          if probability <= sum(self.model['task distributions'][j]['probability']
                                                for j in range(i + 1)))
-        return ElasticTask.load_dist(task_dist, task_id)
+        return ElasticTask.load_dist(task_dist, task_id, rng)
+
+    @staticmethod
+    def sample_dists(dists: List[Dict[str, Any]], cdf: np.ndarray, attributes: Tuple[str, ...], num_samples: int,
+                     rng: np.random.Generator) -> Tuple[np.ndarray, Dict[str, List[int]]]:
+        """
+        Samples the distribution of each item and the positive gaussian attributes (see ElasticTask.load_dist and
+            Server.load_dist) with a single random generator call for each attribute
+
+        :param dists: List of distributions
+        :param cdf: The cumulative probability of the distributions
+        :param attributes: The attribute names of the distributions, each with a mean and std
+        :param num_samples: The number of samples
+        :param rng: The numpy random generator
+        :return: Tuple of the distribution position of each sample and the sampled attributes
+        """
+        dist_positions = np.minimum(np.searchsorted(cdf, rng.random(num_samples)), len(dists) - 1)
+        samples = {}
+        for attribute in attributes:
+            means = np.array([dist[f'{attribute} mean'] for dist in dists], dtype=float)[dist_positions]
+            stds = np.array([dist[f'{attribute} std'] for dist in dists], dtype=float)[dist_positions]
+            samples[attribute] = np.maximum(1, rng.normal(means, stds).astype(np.int64)).tolist()
+        return dist_positions, samples
+
+    def generate_servers(self, num_servers: int, first_server_id: int = 0,
+                         rng: Optional[np.random.Generator] = None) -> List[Server]:
+        """
+        Generates the servers in bulk with the same distributions as generate_server
+
+        :param num_servers: The number of servers
+        :param first_server_id: The server id of the first server
+        :param rng: The numpy random generator, if None then a generator seeded from the random module is used
+        :return: List of servers
+        """
+        rng = random_module_rng() if rng is None else rng
+        server_dists = self.model['server distributions']
+        dist_positions, samples = self.sample_dists(server_dists, self.server_cdf,
+                                                    ('storage', 'computation', 'bandwidth'), num_servers, rng)
+        return [Server(f'{server_dists[dist_pos]["name"]} {first_server_id + pos}',
+                       storage_capacity=storage, computation_capacity=computation, bandwidth_capacity=bandwidth)
+                for pos, (dist_pos, storage, computation, bandwidth) in enumerate(zip(
+                    dist_positions, samples['storage'], samples['computation'], samples['bandwidth']))]
+
+    def generate_tasks(self, servers: List[Server], num_tasks: int, first_task_id: int = 0,
+                       rng: Optional[np.random.Generator] = None) -> List[ElasticTask]:
+        """
+        Generates the tasks in bulk with the same distributions as generate_task
+
+        :param servers: List of servers
+        :param num_tasks: The number of tasks
+        :param first_task_id: The task id of the first task
+        :param rng: The numpy random generator, if None then a generator seeded from the random module is used
+        :return: List of tasks
+        """
+        rng = random_module_rng() if rng is None else rng
+
+        task_dists = self.model['task distributions']
+        dist_positions, samples = self.sample_dists(
+            task_dists, self.task_cdf, ('storage', 'computation', 'results data', 'deadline', 'value'), num_tasks, rng)
+        return [ElasticTask(f'{task_dists[dist_pos]["name"]} {first_task_id + pos}', required_storage=storage,
+                            required_computation=computation, required_results_data=results_data,
+                            deadline=deadline, value=value)
+                for pos, (dist_pos, storage, computation, results_data, deadline, value) in enumerate(zip(
+                    dist_positions, samples['storage'], samples['computation'], samples['results data'],
+                    samples['deadline'], samples['value']))]
+
+    def generate_bulk(self, num_tasks: Optional[int] = None, num_servers: Optional[int] = None,
+                      rng: Optional[np.random.Generator] = None) -> Tuple[List[ElasticTask], List[Server]]:
+        """
+        Creates a list of tasks and servers in bulk (see generate_oneshot) for large instances
+
+        :param num_tasks: The number of tasks, if None then the model number of tasks
+        :param num_servers: The number of servers, if None then the model number of servers
+        :param rng: The numpy random generator, if None then a generator seeded from the random module is used
+        :return: A list of tasks and list of servers
+        """
+        rng = random_module_rng() if rng is None else rng
+        servers = self.generate_servers(self.num_servers if num_servers is None else num_servers, rng=rng)
+        return self.generate_tasks(servers, self.num_tasks if num_tasks is None else num_tasks, rng=rng), servers
 
 
 class AlibabaModelDist(SyntheticModelDist):
     def __init__(self, num_tasks: Optional[int] = None, num_servers: Optional[int] = None, foreknowledge: bool = True,
                  filename: str = 'models/alibaba.mdl', storage_scaling: int = 1000, computational_scaling: int = 0.5,
-                 results_data_scaling: int = 100, results_range: Tuple[int, int] = (20, 60)):
-        SyntheticModelDist.__init__(self, num_tasks, num_servers, filename)
+                 results_data_scaling: int = 100, results_range: Tuple[int, int] = (20, 60), seed: Optional[int] = None,
+                 first_repeat: int = 0):
+        SyntheticModelDist.__init__(self, num_tasks, num_servers, filename, seed, first_repeat)
 
         self.foreknowledge = foreknowledge
 
@@ -105,70 +263,169 @@ class AlibabaModelDist(SyntheticModelDist):
         self.results_range = results_range
 
         task_model_path = '/'.join(filename.split('/')[:-1]) + '/' + self.model['task filename']
-        self.task_model = pd.read_csv(task_model_path)
-
-    def generate_task(self, servers: List[Server], task_id: int) -> ElasticTask:
-        for index, task_row in self.task_model.sample().iterrows():
-            if self.foreknowledge:
-                return ElasticTask(
-                    f'Foreknowledge Task {task_id}',
-                    required_storage=int(self.storage_scaling * task_row['mem-max']),
-                    required_computation=int(self.computational_scaling * task_row['cpu-avg'] * task_row['time-taken']),
-                    required_results_data=ceil(self.results_scaling * rnd.uniform(*self.results_range) *
-                                               task_row['mem-max']),
-                    deadline=task_row['time-taken'], servers=servers)
-            else:
-                return ElasticTask(
-                    f'Requested Task {task_id}',
-                    required_storage=int(self.storage_scaling * task_row['request-mem']),
-                    required_computation=int(self.computational_scaling * task_row['request-cpu'] *
-                                             task_row['time-taken']),
-                    required_results_data=ceil(self.results_scaling * rnd.uniform(*self.results_range) *
-                                               task_row['request-mem']),
-                    deadline=task_row['time-taken'], servers=servers)
-
-    def generate_foreknowledge_requested_tasks(self, servers: List[Server],
-                                               num_tasks: int) -> Tuple[List[ElasticTask], List[ElasticTask]]:
+        # The task model columns are memory-mapped from the binary cache, the rows are sampled from the columns
+        #   directly such that the pages are shared between processes
+        self.task_columns = load_table(task_model_path)
+        self.num_task_rows = len(self.task_columns['time-taken'])
+
+        # The value model of the last server list, see value_model
+        self._value_model_servers: Optional[List[Server]] = None
+        self._value_model: Optional[ConcaveValueModel] = None
+
+    def value_model(self, servers: List[Server]) -> ConcaveValueModel:
+        """
+        The concave value model of the servers, reused while the tasks are generated for the same server list such that
+            the server capacities are only summed once (the server list is assumed to be unchanged)
+
+        :param servers: List of servers
+        :return: The concave value model
+        """
+        if self._value_model_servers is not servers:
+            self._value_model_servers, self._value_model = servers, ConcaveValueModel(servers)
+        return self._value_model
+
+    def generate_task(self, servers: List[Server], task_id: int,
+                      rng: Optional[np.random.Generator] = None) -> ElasticTask:
+        row = rnd.randrange(self.num_task_rows) if rng is None else int(rng.integers(self.num_task_rows))
+        task_row = {column: values[row] for column, values in self.task_columns.items()}
+        return self.row_task(task_row, servers, task_id, rng, self.value_model(servers))
+
+    def row_task(self, task_row: Dict[str, Any], servers: List[Server], task_id: int,
+                 rng: Optional[np.random.Generator] = None,
+                 value_model: Optional[ConcaveValueModel] = None) -> ElasticTask:
+        """
+        Creates a task from a task model row, i.e. a row of the task model csv file
+
+        :param task_row: The task model row
+        :param servers: List of servers
+        :param task_id: The task id
+        :param rng: The numpy random generator, if None then the random module is used
+        :param value_model: The value model of the servers, if None then a value model of the servers is created
+        :return: A new task
+        """
+        if self.foreknowledge:
+            name, memory, cpu = 'Foreknowledge Task', task_row['mem-max'], task_row['cpu-avg']
+        else:
+            name, memory, cpu = 'Requested Task', task_row['request-mem'], task_row['request-cpu']
+        results_data_size = self.results_scaling * (rnd.uniform if rng is None else rng.uniform)(*self.results_range)
+
+        task = ElasticTask(f'{name} {task_id}', required_storage=int(self.storage_scaling * memory),
+                           required_computation=int(self.computational_scaling * cpu * task_row['time-taken']),
+                           required_results_data=ceil(results_data_size * memory),
+                           deadline=int(task_row['time-taken']), value=0)
+        task.value = task.concave_value(servers, rng, value_model)
+        return task
+
+    def task_requirements(self, rows: np.ndarray, foreknowledge: bool,
+                          results_data_sizes: np.ndarray) -> Dict[str, List[int]]:
+        """
+        The task requirements of the task model rows (see row_task) computed with numpy
+
+        :param rows: The task model row positions
+        :param foreknowledge: If the foreknowledge (memory max and cpu average) or requested resources are used
+        :param results_data_sizes: The results data size scaling of each task
+        :return: Dictionary of the storage, computation, results data and deadline of each task
+        """
+        memory = self.task_columns['mem-max' if foreknowledge else 'request-mem'][rows]
+        cpu = self.task_columns['cpu-avg' if foreknowledge else 'request-cpu'][rows]
+        time_taken = self.task_columns['time-taken'][rows]
+        return {
+            'storage': (self.storage_scaling * memory).astype(np.int64).tolist(),
+            'computation': (self.computational_scaling * cpu * time_taken).astype(np.int64).tolist(),
+            'results data': np.ceil(results_data_sizes * memory).astype(np.int64).tolist(),
+            'deadline': time_taken.astype(np.int64).tolist()
+        }
+
+    def generate_tasks(self, servers: List[Server], num_tasks: int, first_task_id: int = 0,
+                       rng: Optional[np.random.Generator] = None) -> List[ElasticTask]:
+        """
+        Generates the tasks in bulk from the task model rows sampled (with replacement) in a single call
+
+        :param servers: List of servers
+        :param num_tasks: The number of tasks
+        :param first_task_id: The task id of the first task
+        :param rng: The numpy random generator, if None then a generator seeded from the random module is used
+        :return: List of tasks
+        """
+        rng = random_module_rng() if rng is None else rng
+
+        rows = rng.integers(self.num_task_rows, size=num_tasks)
+        requirements = self.task_requirements(rows, self.foreknowledge,
+                                              self.results_scaling * rng.uniform(*self.results_range, num_tasks))
+        values = self.value_model(servers).values(requirements['storage'], requirements['computation'],
+                                                  requirements['results data'], rng).tolist()
+
+        name = 'Foreknowledge Task' if self.foreknowledge else 'Requested Task'
+        return [ElasticTask(f'{name} {first_task_id + pos}', required_storage=storage, required_computation=computation,
+                            required_results_data=results_data, deadline=deadline, value=value)
+                for pos, (storage, computation, results_data, deadline, value) in enumerate(zip(
+                    requirements['storage'], requirements['computation'], requirements['results data'],
+                    requirements['deadline'], values))]
+
+    def generate_foreknowledge_requested_tasks(self, servers: List[Server], num_tasks: int,
+                                               rng: Optional[np.random.Generator] = None) \
+            -> Tuple[List[ElasticTask], List[ElasticTask]]:
+        """
+        Generates the foreknowledge and requested tasks of the same task model rows (sampled without replacement) with
+            the requested tasks having the value of the foreknowledge tasks
+
+        :param servers: List of servers
+        :param num_tasks: The number of tasks
+        :param rng: The numpy random generator, if None then a generator seeded from the random module is used
+        :return: Tuple of the foreknowledge tasks and requested tasks
+        """
+        rng = random_module_rng() if rng is None else rng
+        rows = rng.choice(self.num_task_rows, size=num_tasks, replace=False)
+        results_data_sizes = self.results_scaling * rng.uniform(*self.results_range, num_tasks)
+        foreknowledge_requirements = self.task_requirements(rows, True, results_data_sizes)
+        requested_requirements = self.task_requirements(rows, False, results_data_sizes)
+        values = self.value_model(servers).values(
+            foreknowledge_requirements['storage'], foreknowledge_requirements['computation'],
+            foreknowledge_requirements['results data'], rng).tolist()
+
         foreknowledge_tasks, requested_tasks = [], []
-        for task_id, (_, task_row) in enumerate(self.task_model.sample(num_tasks).iterrows()):
-            results_data_size = self.results_scaling * rnd.uniform(*self.results_range)
-            foreknowledge_task = ElasticTask(
-                f'Foreknowledge Task {task_id}',
-                required_storage=int(self.storage_scaling * task_row['mem-max']),
-                required_computation=int(self.computational_scaling * task_row['cpu-avg'] * task_row['time-taken']),
-                required_results_data=ceil(results_data_size * task_row['mem-max']),
-                deadline=task_row['time-taken'], servers=servers)
-            requested_task = ElasticTask(
-                f'Requested Task {task_id}',
-                required_storage=int(self.storage_scaling * task_row['request-mem']),
-                required_computation=int(self.computational_scaling * task_row['request-cpu'] * task_row['time-taken']),
-                required_results_data=ceil(results_data_size * task_row['request-mem']),
-                deadline=task_row['time-taken'], value=foreknowledge_task.value)
-
-            foreknowledge_tasks.append(foreknowledge_task)
-            requested_tasks.append(requested_task)
+        for name, requirements, tasks in (('Foreknowledge Task', foreknowledge_requirements, foreknowledge_tasks),
+                                          ('Requested Task', requested_requirements, requested_tasks)):
+            tasks.extend(ElasticTask(f'{name} {task_id}', required_storage=storage, required_computation=computation,
+                                     required_results_data=results_data, deadline=deadline, value=value)
+                         for task_id, (storage, computation, results_data, deadline, value) in enumerate(zip(
+                             requirements['storage'], requirements['computation'], requirements['results data'],
+                             requirements['deadline'], values)))
         return foreknowledge_tasks, requested_tasks
 
 
-def get_model(model_name: str, num_tasks: Optional[int] = None, num_servers: Optional[int] = None) -> ModelDist:
+def get_model(model_name: str, num_tasks: Optional[int] = None, num_servers: Optional[int] = None,
+              seed: Optional[int] = None, first_repeat: int = 0, instances_dir: Optional[str] = None) -> ModelDist:
     if model_name == 'alibaba':
-        return AlibabaModelDist(num_tasks, num_servers)
+        model_dist = AlibabaModelDist(num_tasks, num_servers, seed=seed, first_repeat=first_repeat)
     elif model_name == 'synthetic':
-        return SyntheticModelDist(num_tasks, num_servers)
+        model_dist = SyntheticModelDist(num_tasks, num_servers, seed=seed, first_repeat=first_repeat)
     else:
         if os.path.exists(model_name):
-            return ModelDist(model_filename=model_name)
+            model_dist = ModelDist(model_filename=model_name, seed=seed, first_repeat=first_repeat)
         else:
             raise Exception(f'Unknown model distribution ({model_name})')
 
+    if instances_dir is not None:
+        model_dist.instance_store = InstanceStore(instances_dir)
+    return model_dist
+
 
-def generate_evaluation_model(model_dist: ModelDist, pp: PrettyPrinter):
+def generate_evaluation_model(model_dist: ModelDist, pp: PrettyPrinter, repeat: Optional[int] = None):
     # Generate the tasks and servers
-    tasks, servers = model_dist.generate_oneshot()
+    tasks, servers = model_dist.generate_oneshot(repeat)
     non_elastic_tasks = generate_non_elastic_tasks(tasks)
-    algorithm_results = {'model': {
-        'tasks': [task.save() for task in tasks], 'servers': [server.save() for server in servers]
-    }}
+    if model_dist.instance_store is not None:
+        # The results reference the instance hash rather than embedding the tasks and servers
+        algorithm_results = {'model': {'instance': model_dist.instance_store.add(tasks, servers)}}
+    else:
+        algorithm_results = {'model': {
+            'tasks': [task.save() for task in tasks], 'servers': [server.save() for server in servers]
+        }}
+    if model_dist.seed is not None and repeat is not None:
+        # The seed and repeat number to reproduce the model
+        algorithm_results['model']['seed'] = model_dist.seed
+        algorithm_results['model']['repeat'] = model_dist.first_repeat + repeat
     pp.pprint(algorithm_results)
 
     return tasks, servers, non_elastic_tasks, algorithm_results
@@ -2,28 +2,48 @@
 For online resource allocation using any resource allocation mechanism (optimal, greedy, fixed, etc)
 """
 
+import csv
+import json
 import sys
+from heapq import heappush, heappop
 from math import ceil
+from multiprocessing import Pool
 from time import time
-from typing import List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from src.core.core import server_task_allocation, reset_model
 from src.core.server import Server
 from src.core.elastic_task import ElasticTask
+from src.extra.metrics import MetricsRecorder
 from src.extra.result import Result, resource_usage
 from src.extra.visualise import minimal_allocated_resources_solver
+from src.greedy.greedy import greedy_algorithm
 from src.optimal.elastic_optimal import elastic_optimal_solver
 
+# The batch length sweep worker tasks, servers and settings
+_sweep_tasks = None
+_sweep_servers = None
+_sweep_settings = None
 
-def online_batch_solver(batched_tasks: List[List[ElasticTask]], servers: List[Server], batch_length: int,
-                        solver_name: str, solver, **solver_args) -> Result:
+
+def online_batch_solver(batched_tasks: Iterable[List[ElasticTask]], servers: List[Server], batch_length: int,
+                        solver_name: str, solver, metrics: Optional[MetricsRecorder] = None, skip_idle: bool = False,
+                        **solver_args) -> Result:
     """
     Generic online batch solver
 
-    :param batched_tasks: List of batch tasks
+    With skip idle, the solver is not called for batches without tasks and consecutive idle batches up to the next task
+        arrival or departure are fast-forwarded with the server usage recorded in bulk. As the solver is only called
+        for the batches with tasks, solvers with per-batch state (i.e. the SolverChain batch latencies) will not have
+        the idle batches
+
+    :param batched_tasks: List or iterator of batch tasks
     :param servers: List of servers
     :param batch_length: Batch length
     :param solver_name: Solver name
     :param solver: Solver function
+    :param metrics: Optional metrics recorder of the server usage for each batch
+    :param skip_idle: If to fast-forward over the idle batches
     :param solver_args: Solver function arguments
     :return: Online results
     """
@@ -34,9 +54,41 @@ def online_batch_solver(batched_tasks: List[List[ElasticTask]], servers: List[Se
     server_bandwidth_usage = {server: [] for server in servers}
     server_num_tasks_allocated = {server: [] for server in servers}
 
+    # The earliest departure time of the allocated tasks and the first batch number and number of idle batches
+    next_departure, idle_batch_num, num_idle_batches = None, 0, 0
+
+    def record_idle_batches():
+        """
+        Records the server usage of the fast-forwarded idle batches in bulk, as the servers are unchanged
+        """
+        if metrics is not None:
+            metrics.record(idle_batch_num, servers, num_idle_batches)
+        for idle_server in servers:
+            server_storage_usage[idle_server] += [resource_usage(idle_server, 'storage')] * num_idle_batches
+            server_computation_usage[idle_server] += [resource_usage(idle_server, 'computation')] * num_idle_batches
+            server_bandwidth_usage[idle_server] += [resource_usage(idle_server, 'bandwidth')] * num_idle_batches
+            server_num_tasks_allocated[idle_server] += [len(idle_server.allocated_tasks)] * num_idle_batches
+
+    flatten_tasks = []
     for batch_num, batch_tasks in enumerate(batched_tasks):
-        solver(batch_tasks, servers, **solver_args)
+        if skip_idle and not batch_tasks and \
+                (next_departure is None or batch_length * (batch_num + 1) <= next_departure):
+            # Fast-forward the idle batch as no task departs before the next batch
+            if num_idle_batches == 0:
+                idle_batch_num = batch_num
+            num_idle_batches += 1
+            continue
+
+        if num_idle_batches:
+            record_idle_batches()
+            num_idle_batches = 0
 
+        flatten_tasks += batch_tasks
+        if batch_tasks or not skip_idle:
+            solver(batch_tasks, servers, **solver_args)
+
+        if metrics is not None:
+            metrics.record(batch_num, servers)
         for server in servers:
             # Save the current information for the server
             server_social_welfare[server] += sum(task.value for task in batch_tasks if task.running_server is server)
@@ -70,7 +122,13 @@ def online_batch_solver(batched_tasks: List[List[ElasticTask]], servers: List[Se
                 ceil(sum((task.loading_speed + task.sending_speed) for task in server.allocated_tasks))
             assert 0 <= server.available_bandwidth <= server.bandwidth_capacity, server.available_bandwidth
 
-    flatten_tasks = [task for tasks in batched_tasks for task in tasks]
+        if skip_idle:
+            next_departure = min((task.auction_time + task.deadline for server in servers
+                                  for task in server.allocated_tasks), default=None)
+
+    if num_idle_batches:
+        record_idle_batches()
+
     return Result(solver_name, flatten_tasks, servers, time() - start_time, limited=True, **{
         'server social welfare': {server.name: server_social_welfare[server] for server in servers},
         'server storage used': {server.name: server_storage_usage[server] for server in servers},
@@ -80,6 +138,548 @@ def online_batch_solver(batched_tasks: List[List[ElasticTask]], servers: List[Se
     })
 
 
+def online_event_solver(batched_tasks: Iterable[List[ElasticTask]], servers: List[Server], batch_length: int,
+                        solver_name: str, solver, metrics: Optional[MetricsRecorder] = None, skip_idle: bool = False,
+                        **solver_args) -> Result:
+    """
+    Event driven online batch solver, equivalent to the online batch solver, where each batch is an arrival event and
+        the allocated tasks departures are scheduled in a min heap of the task auction time + deadline such that the
+        server resources are released incrementally. The cost of each batch is therefore proportional to the number of
+        task arrivals and departures rather than the number of running tasks
+
+    :param batched_tasks: List or iterator of batch tasks
+    :param servers: List of servers
+    :param batch_length: Batch length
+    :param solver_name: Solver name
+    :param solver: Solver function
+    :param metrics: Optional metrics recorder of the server usage for each batch
+    :param skip_idle: If to fast-forward over the idle batches (see online_stream_solver)
+    :param solver_args: Solver function arguments
+    :return: Online results
+    """
+    start_time = time()
+    server_social_welfare = {server.name: 0 for server in servers}
+    server_storage_usage = {server.name: [] for server in servers}
+    server_computation_usage = {server.name: [] for server in servers}
+    server_bandwidth_usage = {server.name: [] for server in servers}
+    server_num_tasks_allocated = {server.name: [] for server in servers}
+
+    flatten_tasks = []
+
+    def collect_tasks():
+        """
+        Collects the batch tasks as they are processed for the results
+        """
+        for batch_tasks in batched_tasks:
+            flatten_tasks.extend(batch_tasks)
+            yield batch_tasks
+
+    for batch_result in online_stream_solver(collect_tasks(), servers, batch_length, solver, skip_idle,
+                                             **solver_args):
+        # The results are recorded in bulk for the fast-forwarded idle batches
+        num_batches = batch_result['num batches']
+        if metrics is not None:
+            metrics.record(batch_result['batch num'], servers, num_batches)
+        for server in servers:
+            server_social_welfare[server.name] += batch_result['server social welfare'][server.name]
+            server_storage_usage[server.name] += [batch_result['server storage used'][server.name]] * num_batches
+            server_computation_usage[server.name] += \
+                [batch_result['server computation used'][server.name]] * num_batches
+            server_bandwidth_usage[server.name] += [batch_result['server bandwidth used'][server.name]] * num_batches
+            server_num_tasks_allocated[server.name] += \
+                [batch_result['server num tasks allocated'][server.name]] * num_batches
+
+    return Result(solver_name, flatten_tasks, servers, time() - start_time, limited=True, **{
+        'server social welfare': server_social_welfare,
+        'server storage used': server_storage_usage,
+        'server computation used': server_computation_usage,
+        'server bandwidth used': server_bandwidth_usage,
+        'server num tasks allocated': server_num_tasks_allocated
+    })
+
+
+def online_stream_solver(batched_tasks: Iterable[List[ElasticTask]], servers: List[Server], batch_length: int,
+                         solver, skip_idle: bool = False, **solver_args) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming event driven online solver that yields the results of each batch as they are solved. Only the running
+        tasks are held in memory (with the departures heap) such that unbounded simulations can run in constant memory.
+        With skip idle, the solver is not called for batches without tasks and consecutive idle batches up to the next
+        task arrival or departure are fast-forwarded as a single result with the number of batches, solvers with
+        per-batch state (i.e. the SolverChain batch latencies) will therefore not have the idle batches
+
+    :param batched_tasks: Iterator of batch tasks, i.e. from iterate_batch_tasks or stream_batch_tasks
+    :param servers: List of servers
+    :param batch_length: Batch length
+    :param solver: Solver function
+    :param skip_idle: If to fast-forward over the idle batches
+    :param solver_args: Solver function arguments
+    :return: Iterator of the batch results, each with the number of batches that the result is for
+    """
+    # The resources used by the running tasks of each server and the heap of task departures (time, task number, task)
+    server_storage_used = {server: server.storage_capacity - server.available_storage for server in servers}
+    server_computation_used = {server: server.computation_capacity - server.available_computation for server in servers}
+    server_bandwidth_used = {server: server.bandwidth_capacity - server.available_bandwidth for server in servers}
+    departures, num_tasks_allocated = [], 0
+    # The first batch number and number of batches of the idle batches to fast-forward
+    idle_batch_num, num_idle_batches = 0, 0
+
+    def batch_result(batch_num: int, num_batches: int, num_tasks: int, solve_time: float,
+                     server_social_welfare: Dict[str, float]) -> Dict[str, Any]:
+        """
+        The batch result with the current server usage
+
+        :param batch_num: The first batch number
+        :param num_batches: The number of batches
+        :param num_tasks: The number of batch tasks
+        :param solve_time: The solve time
+        :param server_social_welfare: The social welfare of each server
+        :return: The batch result
+        """
+        return {
+            'batch num': batch_num, 'num batches': num_batches, 'time step': batch_length * batch_num,
+            'num tasks': num_tasks, 'social welfare': sum(server_social_welfare.values()), 'solve time': solve_time,
+            'server social welfare': server_social_welfare,
+            'server storage used': {server.name: resource_usage(server, 'storage') for server in servers},
+            'server computation used': {server.name: resource_usage(server, 'computation') for server in servers},
+            'server bandwidth used': {server.name: resource_usage(server, 'bandwidth') for server in servers},
+            'server num tasks allocated': {server.name: len(server.allocated_tasks) for server in servers}
+        }
+
+    for batch_num, batch_tasks in enumerate(batched_tasks):
+        if skip_idle and not batch_tasks:
+            # Fast-forward the idle batch until a task departs
+            if num_idle_batches == 0:
+                idle_batch_num = batch_num
+            num_idle_batches += 1
+            if not departures or batch_length * (batch_num + 1) <= departures[0][0]:
+                continue
+
+        if num_idle_batches:
+            yield batch_result(idle_batch_num, num_idle_batches, 0, 0, {server.name: 0 for server in servers})
+            num_idle_batches = 0
+
+        server_social_welfare = {server.name: 0 for server in servers}
+        if batch_tasks or not skip_idle:
+            # Arrival event for the batch tasks
+            solve_start_time = time()
+            solver(batch_tasks, servers, **solver_args)
+            solve_time = time() - solve_start_time
+
+            for task in batch_tasks:
+                if task.running_server:
+                    server = task.running_server
+                    server_social_welfare[server.name] += task.value
+                    server_storage_used[server] += task.required_storage
+                    server_computation_used[server] += task.compute_speed
+                    server_bandwidth_used[server] += task.loading_speed + task.sending_speed
+
+                    heappush(departures, (task.auction_time + task.deadline, num_tasks_allocated, task))
+                    num_tasks_allocated += 1
+
+            # Solvers that re-optimise the running task speeds (i.e. the RollingHorizonSolver) change the resources used
+            #   by the servers, such that these are recomputed from the running task speeds for the departures
+            for server in getattr(solver, 'reoptimised_servers', ()):
+                server_computation_used[server] = sum(task.compute_speed for task in server.allocated_tasks)
+                server_bandwidth_used[server] = sum(task.loading_speed + task.sending_speed
+                                                    for task in server.allocated_tasks)
+
+            yield batch_result(batch_num, 1, len(batch_tasks), solve_time, server_social_welfare)
+
+        # Departure events for the tasks that are not running in the next batch time step
+        next_time_step, departed_tasks = batch_length * (batch_num + 1), {}
+        while departures and departures[0][0] < next_time_step:
+            _, _, task = heappop(departures)
+            server = task.running_server
+            departed_tasks.setdefault(server, set()).add(task)
+            server_storage_used[server] -= task.required_storage
+            server_computation_used[server] -= task.compute_speed
+            server_bandwidth_used[server] -= task.loading_speed + task.sending_speed
+
+        for server, tasks in departed_tasks.items():
+            server.allocated_tasks = [task for task in server.allocated_tasks if task not in tasks]
+
+        # Update the server available resources, rounding the resources used for floating point errors
+        for server in servers:
+            server.available_storage = server.storage_capacity - server_storage_used[server]
+            assert 0 <= server.available_storage <= server.storage_capacity, server.available_storage
+
+            server.available_computation = server.computation_capacity - \
+                ceil(round(server_computation_used[server], 6))
+            assert 0 <= server.available_computation <= server.computation_capacity, server.available_computation
+
+            server.available_bandwidth = server.bandwidth_capacity - ceil(round(server_bandwidth_used[server], 6))
+            assert 0 <= server.available_bandwidth <= server.bandwidth_capacity, server.available_bandwidth
+
+    if num_idle_batches:
+        yield batch_result(idle_batch_num, num_idle_batches, 0, 0, {server.name: 0 for server in servers})
+
+
+def stream_batch_tasks(tasks: Iterable[ElasticTask], batch_length: int) -> Iterator[List[ElasticTask]]:
+    """
+    Batches a stream of tasks on the fly, with the tasks ordered by auction time, such that only the current batch of
+        tasks is held in memory. Empty batches are generated for time steps without any task arrivals.
+
+    :param tasks: Iterator of tasks ordered by auction time
+    :param batch_length: The batch length integer
+    :return: Iterator of the batch tasks
+    """
+    batch_tasks, time_step = [], batch_length
+    for task in tasks:
+        assert time_step - batch_length <= task.auction_time, \
+            f'Task {task.name} auction time {task.auction_time} is before the batch start {time_step - batch_length}'
+        while time_step <= task.auction_time:
+            yield [batch_task.batch(time_step) for batch_task in batch_tasks]
+            batch_tasks, time_step = [], time_step + batch_length
+        batch_tasks.append(task)
+    yield [batch_task.batch(time_step) for batch_task in batch_tasks]
+
+
+def csv_task_stream(filename: str, row_task: Callable[[Dict[str, Any], int], ElasticTask],
+                    auction_time_column: Optional[str] = None, tasks_per_time_step: int = 1,
+                    converters: Optional[Dict[str, Callable[[str], Any]]] = None) -> Iterator[ElasticTask]:
+    """
+    Reads the tasks row by row from a csv file, e.g. models/alibaba_cluster_tasks.csv or raw traces
+
+    :param filename: The csv filename
+    :param row_task: Function to convert the row and task id to a task
+    :param auction_time_column: The column of the task auction time, otherwise the rows are arrivals at
+        tasks_per_time_step
+    :param tasks_per_time_step: Number of tasks that arrive each time step without an auction time column
+    :param converters: The converter of each column passed to the row task, if None then all of the non-empty columns
+        are passed with the numeric values converted to floats and other values (i.e. names) kept as strings
+    :return: Iterator of the tasks
+    """
+
+    def numeric_value(value: str) -> Any:
+        """
+        Converts a numeric value to a float otherwise the value is kept as a string
+
+        :param value: The csv value
+        :return: The float or string value
+        """
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+    with open(filename, newline='') as file:
+        for task_id, row in enumerate(csv.DictReader(file)):
+            if converters is None:
+                task_row = {column: numeric_value(value) for column, value in row.items() if value != ''}
+            else:
+                task_row = {column: converter(row[column]) for column, converter in converters.items()}
+            task = row_task(task_row, task_id)
+            if auction_time_column is None:
+                task.auction_time = task_id // tasks_per_time_step
+            else:
+                task.auction_time = int(float(row[auction_time_column]))
+            yield task
+
+
+def save_stream_results(batch_results: Iterable[Dict[str, Any]], filename: str) -> Dict[str, float]:
+    """
+    Saves the batch results as json lines when each batch is solved
+
+    :param batch_results: Iterator of the batch results
+    :param filename: The json lines filename
+    :return: The summary of the number of batches, tasks and social welfare
+    """
+    summary = {'batches': 0, 'tasks': 0, 'social welfare': 0}
+    with open(filename, 'w') as file:
+        for batch_result in batch_results:
+            file.write(json.dumps(batch_result) + '\n')
+            file.flush()
+
+            summary['batches'] += batch_result['num batches']
+            summary['tasks'] += batch_result['num tasks']
+            summary['social welfare'] += batch_result['social welfare']
+    return summary
+
+
+class SolverChain:
+    """
+    Latency budgeted anytime solver for online batches, the greedy algorithm is always run first then the improvement
+        solvers (i.e. elastic optimal or DIA) are run in order within the remaining per-batch wall-clock budget with
+        the best allocation found kept. The latency and stage that produced the final allocation of each batch are
+        recorded for the results
+    """
+
+    def __init__(self, time_budget: float, task_priority, server_selection, resource_allocation,
+                 improvement_solvers: Iterable[Tuple[str, Callable]] = (('Elastic Optimal', elastic_optimal_solver),)):
+        """
+        Constructor
+
+        :param time_budget: The wall-clock time budget (seconds) for each batch
+        :param task_priority: The greedy task priority function
+        :param server_selection: The greedy server selection policy
+        :param resource_allocation: The greedy resource allocation policy
+        :param improvement_solvers: List of the improvement solver names and functions that take the tasks, servers
+            and time limit. Solvers without a time limit (i.e. DIA) are only bounded by the remaining budget when they
+            are started
+        """
+        assert 0 < time_budget, f'Time budget: {time_budget}'
+        self.time_budget = time_budget
+        self.task_priority = task_priority
+        self.server_selection = server_selection
+        self.resource_allocation = resource_allocation
+        self.improvement_solvers = list(improvement_solvers)
+
+        self.batch_latencies: List[float] = []
+        self.batch_stages: List[str] = []
+
+    def __call__(self, tasks: List[ElasticTask], servers: List[Server]):
+        """
+        Solves the batch of tasks
+
+        :param tasks: List of tasks
+        :param servers: List of servers
+        """
+        start_time = time()
+        server_states = {server: (server.available_storage, server.available_computation, server.available_bandwidth,
+                                  list(server.allocated_tasks), server.revenue) for server in servers}
+
+        def allocation():
+            """
+            The batch task allocations and social welfare
+
+            :return: Tuple of the task allocations and social welfare
+            """
+            return {task: (task.running_server, task.loading_speed, task.compute_speed, task.sending_speed, task.price)
+                    for task in tasks if task.running_server}, sum(task.value for task in tasks if task.running_server)
+
+        def restore_servers():
+            """
+            Restores the servers to the state before the batch was solved
+            """
+            for task in tasks:
+                task.reset_allocation()
+            for server, (storage, computation, bandwidth, allocated_tasks, revenue) in server_states.items():
+                server.available_storage, server.available_computation, server.available_bandwidth = \
+                    storage, computation, bandwidth
+                server.allocated_tasks, server.revenue = list(allocated_tasks), revenue
+
+        greedy_algorithm(tasks, servers, self.task_priority, self.server_selection, self.resource_allocation)
+        (best_allocation, best_social_welfare), best_stage = allocation(), 'Greedy'
+
+        for stage, solver in self.improvement_solvers:
+            remaining_time = self.time_budget - (time() - start_time)
+            if remaining_time <= 0 or not tasks:
+                break
+
+            restore_servers()
+            valid_servers = [server for server in servers
+                             if 1 <= server.available_computation and 2 <= server.available_bandwidth]
+            try:
+                solver(tasks, valid_servers, remaining_time)
+            except AssertionError as e:
+                print(f'{stage} solver chain error: ', e, file=sys.stderr)
+            stage_allocation, stage_social_welfare = allocation()
+            if best_social_welfare < stage_social_welfare:
+                best_allocation, best_social_welfare, best_stage = stage_allocation, stage_social_welfare, stage
+
+        # Reallocate the best allocation found if the last solver was not the best
+        if allocation()[0] != best_allocation:
+            restore_servers()
+            for task, (server, loading_speed, compute_speed, sending_speed, price) in best_allocation.items():
+                server_task_allocation(server, task, loading_speed, compute_speed, sending_speed, price)
+
+        self.batch_latencies.append(time() - start_time)
+        self.batch_stages.append(best_stage)
+
+
+class RollingHorizonSolver:
+    """
+    Rolling horizon online batch solver that re-optimises the speeds of the running tasks at each batch boundary
+        (before the batch tasks are solved) to meet the remaining deadline of the tasks with their remaining work,
+        freeing the server resources for the new batch tasks. The speeds are minimised using the minimal allocated
+        resources solver for each server within a per-batch time budget. The batch time step is found from the batch
+        tasks' auction time such that the solver can be used with the idle batches skipped. The re-optimised servers
+        of the last batch are recorded for the online_stream_solver to recompute the server resources used
+    """
+
+    def __init__(self, batch_length: int, solver, time_budget: float = 2, server_time_limit: int = 1, **solver_args):
+        """
+        Constructor
+
+        :param batch_length: Batch length
+        :param solver: The batch solver function
+        :param time_budget: The wall-clock time budget (seconds) for the re-optimisation of each batch
+        :param server_time_limit: The re-optimisation time limit for each server
+        :param solver_args: Solver function arguments
+        """
+        self.batch_length = batch_length
+        self.solver = solver
+        self.solver_args = solver_args
+        self.time_budget = time_budget
+        self.server_time_limit = server_time_limit
+
+        # The time step, remaining storage, computation, results data and deadline of the running tasks
+        self.task_progress: Dict[ElasticTask, Tuple[int, float, float, float, float]] = {}
+        self.batch_tasks_allocated: List[int] = []
+        # The servers with the running task speeds re-optimised in the last batch
+        self.reoptimised_servers: List[Server] = []
+
+    def __call__(self, tasks: List[ElasticTask], servers: List[Server]):
+        """
+        Re-optimises the running tasks then solves the batch of tasks
+
+        :param tasks: List of tasks
+        :param servers: List of servers
+        """
+        self.reoptimised_servers = []
+        if tasks:
+            # The batch tasks start at the batch time step of their auction time (see iterate_batch_tasks), such that
+            #   idle batches that are skipped or empty don't need to be counted
+            time_step = self.batch_length * (tasks[0].auction_time // self.batch_length + 1)
+            assert all(self.batch_length * (task.auction_time // self.batch_length + 1) == time_step for task in tasks)
+
+            # Update the progress of the running tasks with the tasks that have departed removed, as the remaining
+            #   work only depends on the elapsed time then the progress isn't updated for batches without tasks
+            running_tasks = {task for server in servers for task in server.allocated_tasks}
+            task_progress = {}
+            for task, (progress_time_step, storage, computation, results_data, deadline) in self.task_progress.items():
+                if task in running_tasks:
+                    remaining_work = running_task_remaining_work(task, time_step - progress_time_step,
+                                                                 (storage, computation, results_data), deadline)
+                    if remaining_work:
+                        task_progress[task] = (time_step,) + remaining_work
+            self.task_progress = task_progress
+
+            start_time = time()
+            # Servers with the least available resources are re-optimised first
+            for server in sorted(servers, key=lambda s: s.available_computation / s.computation_capacity +
+                                 s.available_bandwidth / s.bandwidth_capacity):
+                if self.time_budget <= time() - start_time:
+                    break
+
+                remaining_work = {task: self.task_progress[task][1:] for task in server.allocated_tasks
+                                  if task in self.task_progress}
+                if remaining_work:
+                    minimal_allocated_resources_solver(list(remaining_work.keys()), [server],
+                                                       self.server_time_limit, remaining_work)
+                    self.reoptimised_servers.append(server)
+
+        self.solver(tasks, servers, **self.solver_args)
+        for task in tasks:
+            if task.running_server:
+                self.task_progress[task] = (time_step, task.required_storage, task.required_computation,
+                                            task.required_results_data, task.deadline)
+        self.batch_tasks_allocated.append(sum(task.running_server is not None for task in tasks))
+
+
+def running_task_remaining_work(task: ElasticTask, elapsed_time: int, work: Tuple[float, float, float],
+                                deadline: float) -> Optional[Tuple[float, float, float, float]]:
+    """
+    The remaining work of a running task where the loading, computation and sending stages are sequential
+
+    :param task: The running task
+    :param elapsed_time: The time elapsed since the work and deadline were calculated
+    :param work: The storage, computation and results data work remaining at the time
+    :param deadline: The deadline remaining at the time
+    :return: The remaining storage, computation, results data and deadline or None if the task stages are finished
+    """
+    if deadline <= elapsed_time:
+        return None
+
+    storage, computation, results_data = work
+    loading_time = storage / task.loading_speed
+    compute_time = computation / task.compute_speed
+    sending_time = results_data / task.sending_speed
+    if elapsed_time < loading_time:
+        remaining_work = (storage - task.loading_speed * elapsed_time, computation, results_data)
+    elif elapsed_time < loading_time + compute_time:
+        remaining_work = (0, computation - task.compute_speed * (elapsed_time - loading_time), results_data)
+    elif elapsed_time < loading_time + compute_time + sending_time:
+        remaining_work = (0, 0, results_data - task.sending_speed * (elapsed_time - loading_time - compute_time))
+    else:
+        return None
+    return remaining_work + (deadline - elapsed_time,)
+
+
+def init_sweep_worker(tasks: List[ElasticTask], servers: List[Server], time_steps: int, solver_name: str, solver,
+                      solver_args: Dict[str, Any], scale_capacities: bool, skip_idle: bool):
+    """
+    Initialises a batch length sweep worker with the shared task and server data such that only the batch length is
+        sent to the worker
+
+    :param tasks: List of tasks
+    :param servers: List of servers
+    :param time_steps: Total number of time steps
+    :param solver_name: Solver name
+    :param solver: Solver function
+    :param solver_args: Solver function arguments
+    :param scale_capacities: If to scale the server computation and bandwidth capacities by the batch length
+    :param skip_idle: If to fast-forward over the idle batches
+    """
+    global _sweep_tasks, _sweep_servers, _sweep_settings
+    _sweep_tasks = tasks
+    _sweep_servers = servers
+    _sweep_settings = (time_steps, solver_name, solver, solver_args, scale_capacities, skip_idle)
+
+
+def sweep_batch_length(batch_length: int) -> Dict[str, Any]:
+    """
+    Runs the online batch solver with a batch length using the sweep worker tasks and servers
+
+    :param batch_length: The batch length
+    :return: The online results
+    """
+    time_steps, solver_name, solver, solver_args, scale_capacities, skip_idle = _sweep_settings
+    original_capacities = [(server.computation_capacity, server.bandwidth_capacity) for server in _sweep_servers]
+    if scale_capacities:
+        for server, (computation_capacity, bandwidth_capacity) in zip(_sweep_servers, original_capacities):
+            server.update_capacities(computation_capacity * batch_length, bandwidth_capacity * batch_length)
+    reset_model([], _sweep_servers)
+
+    valid_tasks = [task for task in _sweep_tasks if batch_length < task.deadline]
+    result = online_batch_solver(iterate_batch_tasks(valid_tasks, batch_length, time_steps), _sweep_servers,
+                                 batch_length, solver_name, solver, skip_idle=skip_idle, **solver_args)
+
+    reset_model([], _sweep_servers)
+    for server, (computation_capacity, bandwidth_capacity) in zip(_sweep_servers, original_capacities):
+        server.update_capacities(computation_capacity, bandwidth_capacity)
+    return result.store(**{'batch length': batch_length})
+
+
+def online_batch_length_sweep(tasks: List[ElasticTask], servers: List[Server], time_steps: int,
+                              batch_lengths: Iterable[int], solver_name: str, solver, processes: Optional[int] = None,
+                              scale_capacities: bool = False, skip_idle: bool = False,
+                              filename: Optional[str] = None, **solver_args) -> Dict[int, Dict[str, Any]]:
+    """
+    Runs the online batch solver for a range of batch lengths over the same tasks (generated once) with each batch
+        length run in a separate process that shares the task and server data (copy on write with fork), only tasks
+        with a deadline greater than the batch length are used
+
+    :param tasks: List of tasks
+    :param servers: List of servers
+    :param time_steps: Total number of time steps
+    :param batch_lengths: List of the batch lengths
+    :param solver_name: Solver name
+    :param solver: Solver function
+    :param processes: The number of processes, if 1 then the batch lengths are run sequentially in this process
+    :param scale_capacities: If to scale the server computation and bandwidth capacities by the batch length
+    :param skip_idle: If to fast-forward over the idle batches (see online_batch_solver)
+    :param filename: Optional json filename to save all of the results to
+    :param solver_args: Solver function arguments
+    :return: Dictionary of the batch length results
+    """
+    batch_lengths = list(batch_lengths)
+    settings = (tasks, servers, time_steps, solver_name, solver, solver_args, scale_capacities, skip_idle)
+    if processes == 1:
+        init_sweep_worker(*settings)
+        results = [sweep_batch_length(batch_length) for batch_length in batch_lengths]
+    else:
+        with Pool(processes, initializer=init_sweep_worker, initargs=settings) as pool:
+            results = pool.map(sweep_batch_length, batch_lengths)
+
+    batch_length_results = dict(zip(batch_lengths, results))
+    if filename:
+        with open(filename, 'w') as file:
+            json.dump({f'batch length {batch_length}': result
+                       for batch_length, result in batch_length_results.items()}, file)
+    return batch_length_results
+
+
 def generate_batch_tasks(tasks: List[ElasticTask], batch_length: int, time_steps: int) -> List[List[ElasticTask]]:
     """
     Generate batch tasks with updated task deadlines that has the first batch at batch_length, the second at
@@ -90,10 +690,27 @@ def generate_batch_tasks(tasks: List[ElasticTask], batch_length: int, time_steps
     :param time_steps: Total number of time steps
     :return: List of batched tasks
     """
-    return [
-        [task.batch(time_step) for task in tasks if time_step - batch_length <= task.auction_time < time_step]
-        for time_step in range(batch_length, time_steps + time_steps % batch_length + 1, batch_length)
-    ]
+    return list(iterate_batch_tasks(tasks, batch_length, time_steps))
+
+
+def iterate_batch_tasks(tasks: List[ElasticTask], batch_length: int, time_steps: int) -> Iterator[List[ElasticTask]]:
+    """
+    Lazily generates the batch tasks (see generate_batch_tasks) such that the batched task copies are only created
+        when the batch is processed. The tasks are bucketed by auction time // batch length in a single pass
+
+    :param tasks: List of tasks
+    :param batch_length: The batch length integer
+    :param time_steps: Total number of time steps
+    :return: Iterator of the batch tasks
+    """
+    batch_time_steps = range(batch_length, time_steps + time_steps % batch_length + 1, batch_length)
+    buckets = [[] for _ in batch_time_steps]
+    for task in tasks:
+        if 0 <= task.auction_time and task.auction_time // batch_length < len(buckets):
+            buckets[task.auction_time // batch_length].append(task)
+
+    for time_step, bucket in zip(batch_time_steps, buckets):
+        yield [task.batch(time_step) for task in bucket]
 
 
 def minimal_resources_elastic_optimal_solver(tasks: List[ElasticTask], servers: List[Server],
@@ -14,7 +14,7 @@ from src.core.core import server_task_allocation
 from src.extra.io import ImageFormat, save_plot
 
 if TYPE_CHECKING:
-    from typing import List, Iterable, Dict
+    from typing import List, Iterable, Dict, Optional, Tuple
 
     from src.core.server import Server
     from src.core.elastic_task import ElasticTask
@@ -23,16 +23,23 @@ matplotlib.rcParams['font.family'] = 'monospace'
 matplotlib.rc('text', usetex=True)
 
 
-def minimal_allocated_resources_solver(tasks: List[ElasticTask], servers: List[Server], time_limit: int = 1):
+def minimal_allocated_resources_solver(tasks: List[ElasticTask], servers: List[Server], time_limit: int = 1,
+                                       remaining_work: Optional[Dict[ElasticTask, Tuple[float, float, float,
+                                                                                         float]]] = None):
     """
     Minimise resource allocation of a list of servers
 
     :param tasks: List of new tasks to the server (this is important for the online flexible case)
     :param servers: List of servers
     :param time_limit: Solve time limit
+    :param remaining_work: Optional remaining storage, computation, results data and deadline of running tasks, for
+        which the speeds are re-optimised to meet the remaining deadline with the speeds only being reduced
     """
     for server in servers:
-        server_new_tasks = [task for task in server.allocated_tasks if task in tasks]
+        server_new_tasks = [task for task in server.allocated_tasks
+                            if task in tasks and (remaining_work is None or task in remaining_work)]
+        if not server_new_tasks:
+            continue
         model = CpoModel('MinimumAllocation')
 
         loading_speeds: Dict[ElasticTask, CpoVariable] = {}
@@ -45,13 +52,23 @@ def minimal_allocated_resources_solver(tasks: List[ElasticTask], servers: List[S
 
         # Loop over each task to allocate the variables and add the deadline constraints
         for task in server_new_tasks:
-            loading_speeds[task] = model.integer_var(min=1, max=max_bandwidth)
-            compute_speeds[task] = model.integer_var(min=1, max=max_computation)
-            sending_speeds[task] = model.integer_var(min=1, max=max_bandwidth)
+            if remaining_work is None:
+                loading_speeds[task] = model.integer_var(min=1, max=max_bandwidth)
+                compute_speeds[task] = model.integer_var(min=1, max=max_computation)
+                sending_speeds[task] = model.integer_var(min=1, max=max_bandwidth)
+
+                model.add((task.required_storage / loading_speeds[task]) +
+                          (task.required_computation / compute_speeds[task]) +
+                          (task.required_results_data / sending_speeds[task]) <= task.deadline)
+            else:
+                # The running task speeds can only be reduced with the deadline constraint on the remaining work
+                loading_speeds[task] = model.integer_var(min=1, max=task.loading_speed)
+                compute_speeds[task] = model.integer_var(min=1, max=task.compute_speed)
+                sending_speeds[task] = model.integer_var(min=1, max=task.sending_speed)
 
-            model.add((task.required_storage / loading_speeds[task]) +
-                      (task.required_computation / compute_speeds[task]) +
-                      (task.required_results_data / sending_speeds[task]) <= task.deadline)
+                storage, computation, results_data, deadline = remaining_work[task]
+                model.add((storage / loading_speeds[task]) + (computation / compute_speeds[task]) +
+                          (results_data / sending_speeds[task]) <= deadline)
 
         model.add(sum(compute_speeds[task] for task in server_new_tasks) <= max_computation)
         model.add(sum(loading_speeds[task] + sending_speeds[task] for task in server_new_tasks) <= max_bandwidth)
@@ -68,6 +85,16 @@ def minimal_allocated_resources_solver(tasks: List[ElasticTask], servers: List[S
             print(f'Minimise {server.name} server resources allocated failed: {model_solution.get_solve_status()}')
             continue
 
+        if remaining_work is not None:
+            # The running task speeds are updated without reallocating as the task deadlines are for the full work
+            for task in server_new_tasks:
+                loading_speed, compute_speed, sending_speed = model_solution.get_value(loading_speeds[task]), \
+                    model_solution.get_value(compute_speeds[task]), model_solution.get_value(sending_speeds[task])
+                server.available_computation += task.compute_speed - compute_speed
+                server.available_bandwidth += task.loading_speed + task.sending_speed - loading_speed - sending_speed
+                task.loading_speed, task.compute_speed, task.sending_speed = loading_speed, compute_speed, sending_speed
+            continue
+
         allocated_tasks = server.allocated_tasks.copy()
         server.reset_allocations()
         for task in allocated_tasks:
@@ -12,24 +12,31 @@ from docplex.cp.solution import SOLVE_STATUS_FEASIBLE, SOLVE_STATUS_OPTIMAL, Cpo
 from docplex.cp.solver.solver import CpoSolverException
 
 from src.core.core import server_task_allocation
+from src.core.non_elastic_task import cached_minimum_speeds
 from src.core.super_server import SuperServer
 from src.extra.pprint import print_model_solution, print_model
 from src.extra.result import Result
 
 if TYPE_CHECKING:
-    from typing import List, Optional
+    from typing import Dict, List, Optional, Tuple
 
     from src.core.server import Server
     from src.core.elastic_task import ElasticTask
 
 
-def elastic_optimal_solver(tasks: List[ElasticTask], servers: List[Server], time_limit: Optional[int]):
+def elastic_optimal_solver(tasks: List[ElasticTask], servers: List[Server], time_limit: Optional[int],
+                           task_names: Optional[Dict[ElasticTask, str]] = None,
+                           starting_allocation: Optional[Dict[ElasticTask, Optional[Server]]] = None,
+                           starting_speeds: Optional[Dict[ElasticTask, Tuple[int, int, int]]] = None):
     """
     Elastic Optimal algorithm solver using cplex
 
     :param tasks: List of tasks
     :param servers: List of servers
     :param time_limit: Time limit for cplex
+    :param task_names: Optional variable names for each task, otherwise the task name is used
+    :param starting_allocation: Optional task server allocations as the starting point of the search
+    :param starting_speeds: Optional loading, compute and sending speeds of the starting allocation tasks
     :return: the results of the algorithm
     """
     assert time_limit is None or 0 < time_limit, f'Time limit: {time_limit}'
@@ -45,9 +52,10 @@ def elastic_optimal_solver(tasks: List[ElasticTask], servers: List[Server], time
     runnable_tasks = [task for task in tasks if any(server.can_run_empty(task) for server in servers)]
     for task in runnable_tasks:
         # Check if the task can be run on any server even if empty
-        loading_speeds[task] = model.integer_var(min=1, max=max_bandwidth - 1, name=f'{task.name} loading speed')
-        compute_speeds[task] = model.integer_var(min=1, max=max_computation, name=f'{task.name} compute speed')
-        sending_speeds[task] = model.integer_var(min=1, max=max_bandwidth - 1, name=f'{task.name} sending speed')
+        task_name = task_names[task] if task_names else task.name
+        loading_speeds[task] = model.integer_var(min=1, max=max_bandwidth - 1, name=f'{task_name} loading speed')
+        compute_speeds[task] = model.integer_var(min=1, max=max_computation, name=f'{task_name} compute speed')
+        sending_speeds[task] = model.integer_var(min=1, max=max_bandwidth - 1, name=f'{task_name} sending speed')
 
         model.add((task.required_storage / loading_speeds[task]) +
                   (task.required_computation / compute_speeds[task]) +
@@ -55,7 +63,7 @@ def elastic_optimal_solver(tasks: List[ElasticTask], servers: List[Server], time
 
         # The task allocation variables and add the allocation constraint
         for server in servers:
-            task_allocation[(task, server)] = model.binary_var(name=f'{task.name} Task - {server.name} Server')
+            task_allocation[(task, server)] = model.binary_var(name=f'{task_name} Task - {server.name} Server')
         model.add(sum(task_allocation[(task, server)] for server in servers) <= 1)
 
     # For each server, add the resource constraint
@@ -70,6 +78,18 @@ def elastic_optimal_solver(tasks: List[ElasticTask], servers: List[Server], time
     # The optimisation statement
     model.maximize(sum(task.value * task_allocation[(task, server)] for task in runnable_tasks for server in servers))
 
+    # The starting point of the task allocations
+    if starting_allocation:
+        starting_point = model.create_empty_solution()
+        for (task, server), allocation in task_allocation.items():
+            if task in starting_allocation:
+                starting_point.add_integer_var_solution(allocation, int(starting_allocation[task] is server))
+        for task, speeds in (starting_speeds or {}).items():
+            if task in loading_speeds:
+                for speed_var, speed in zip((loading_speeds[task], compute_speeds[task], sending_speeds[task]), speeds):
+                    starting_point.add_integer_var_solution(speed_var, speed)
+        model.set_starting_point(starting_point)
+
     # Solve the cplex model with time limit
     try:
         model_solution: CpoSolveResult = model.solve(log_output=None, TimeLimit=time_limit)
@@ -146,3 +166,199 @@ def server_relaxed_elastic_optimal(tasks: List[ElasticTask], servers: List[Serve
     else:
         print(f'Server Relaxed Elastic Optimal error', file=sys.stderr)
         return Result('Server Relaxed Elastic Optimal', tasks, servers, 0, limited=True)
+
+
+class ParametricElasticOptimal:
+    """
+    Elastic optimal cplex model that is built once for the tasks and servers with the server capacities as variables
+        whose domains are fixed to the available resources on each solve. This allows the model to be re-solved for
+        a sweep of server capacities (i.e. resource ratios) without rebuilding the model, using the previous solution
+        as the starting point of the search
+    """
+
+    def __init__(self, tasks: List[ElasticTask], servers: List[Server]):
+        self.tasks = tasks
+        self.servers = servers
+        self.model = CpoModel('Parametric Elastic Optimal')
+        self.model_solution: Optional[CpoSolveResult] = None
+
+        # As the capacities can change, the speeds are bounded by the maximum total resources of a server
+        max_speed = max(server.computation_capacity + server.bandwidth_capacity for server in servers)
+        self.runnable_tasks = [
+            task for task in tasks
+            if any(task.required_storage <= server.storage_capacity for server in servers) and
+            (task.required_storage + task.required_results_data) / (max_speed - 1) +
+            task.required_computation / max_speed <= task.deadline
+        ]
+
+        # The resource speed variables and the allocation variables
+        self.loading_speeds, self.compute_speeds, self.sending_speeds, self.task_allocation = {}, {}, {}, {}
+        for task in self.runnable_tasks:
+            self.loading_speeds[task] = self.model.integer_var(min=1, max=max_speed - 1,
+                                                               name=f'{task.name} loading speed')
+            self.compute_speeds[task] = self.model.integer_var(min=1, max=max_speed, name=f'{task.name} compute speed')
+            self.sending_speeds[task] = self.model.integer_var(min=1, max=max_speed - 1,
+                                                               name=f'{task.name} sending speed')
+
+            self.model.add((task.required_storage / self.loading_speeds[task]) +
+                           (task.required_computation / self.compute_speeds[task]) +
+                           (task.required_results_data / self.sending_speeds[task]) <= task.deadline)
+
+            for server in servers:
+                self.task_allocation[(task, server)] = self.model.binary_var(
+                    name=f'{task.name} Task - {server.name} Server')
+            self.model.add(sum(self.task_allocation[(task, server)] for server in servers) <= 1)
+
+        # The server capacity variables and the resource constraints
+        self.storage_capacities, self.computation_capacities, self.bandwidth_capacities = {}, {}, {}
+        for server in servers:
+            self.storage_capacities[server] = self.model.integer_var(min=0, max=server.storage_capacity,
+                                                                     name=f'{server.name} storage capacity')
+            self.computation_capacities[server] = self.model.integer_var(min=0, max=max_speed,
+                                                                         name=f'{server.name} computation capacity')
+            self.bandwidth_capacities[server] = self.model.integer_var(min=0, max=max_speed,
+                                                                       name=f'{server.name} bandwidth capacity')
+
+            self.model.add(sum(task.required_storage * self.task_allocation[(task, server)]
+                               for task in self.runnable_tasks) <= self.storage_capacities[server])
+            self.model.add(sum(self.compute_speeds[task] * self.task_allocation[(task, server)]
+                               for task in self.runnable_tasks) <= self.computation_capacities[server])
+            self.model.add(sum((self.loading_speeds[task] + self.sending_speeds[task]) *
+                               self.task_allocation[(task, server)]
+                               for task in self.runnable_tasks) <= self.bandwidth_capacities[server])
+
+        # The optimisation statement
+        self.model.maximize(sum(task.value * self.task_allocation[(task, server)]
+                                for task in self.runnable_tasks for server in servers))
+
+    def solve(self, time_limit: Optional[int] = 15, warm_start: bool = True) -> Result:
+        """
+        Solves the model with the servers available resources
+
+        :param time_limit: The time limit for the cplex solver
+        :param warm_start: If to use the previous solution as the starting point
+        :return: Optimal results
+        """
+        assert time_limit is None or 0 < time_limit, f'Time limit: {time_limit}'
+
+        # Update the server capacity parameters
+        for server in self.servers:
+            assert server.available_storage <= server.storage_capacity
+            self.storage_capacities[server].set_domain([server.available_storage])
+            self.computation_capacities[server].set_domain([server.available_computation])
+            self.bandwidth_capacities[server].set_domain([server.available_bandwidth])
+
+        if warm_start and self.model_solution:
+            starting_point = self.model.create_empty_solution()
+            for variables in (self.loading_speeds, self.compute_speeds, self.sending_speeds, self.task_allocation):
+                for var in variables.values():
+                    starting_point.add_integer_var_solution(var, self.model_solution.get_value(var))
+            self.model.set_starting_point(starting_point)
+
+        # Solve the cplex model with time limit
+        try:
+            model_solution: CpoSolveResult = self.model.solve(log_output=None, TimeLimit=time_limit)
+        except CpoSolverException as e:
+            print(f'Solver Exception: ', e)
+            return Result('Elastic Optimal', self.tasks, self.servers, 0, limited=True)
+
+        # Check that it is solved
+        if model_solution.get_solve_status() != SOLVE_STATUS_FEASIBLE and \
+                model_solution.get_solve_status() != SOLVE_STATUS_OPTIMAL:
+            print(f'Parametric elastic optimal solver failed', file=sys.stderr)
+            print_model_solution(model_solution)
+            return Result('Elastic Optimal', self.tasks, self.servers, 0, limited=True)
+        self.model_solution = model_solution
+
+        # Generate the allocation of the tasks and servers
+        for task in self.runnable_tasks:
+            for server in self.servers:
+                if model_solution.get_value(self.task_allocation[(task, server)]):
+                    server_task_allocation(server, task,
+                                           model_solution.get_value(self.loading_speeds[task]),
+                                           model_solution.get_value(self.compute_speeds[task]),
+                                           model_solution.get_value(self.sending_speeds[task]))
+                    break
+
+        return Result('Elastic Optimal', self.tasks, self.servers, round(model_solution.get_solve_time(), 2),
+                      **{'solve status': model_solution.get_solve_status(),
+                         'cplex objective': model_solution.get_objective_values()[0]})
+
+
+class IncrementalElasticOptimal:
+    """
+    Incremental elastic optimal solver for online batches, the model variables are named by the slot of the task (with
+        the tasks ordered by value density) such that the model structure is stable across batches. The starting point
+        of the search is the greedy allocation of the slot tasks with their minimum speeds to the server with the most
+        residual resources (from the previous batches) such that the search starts from a feasible solution
+    """
+
+    def __init__(self, time_limit: Optional[int] = None, warm_start: bool = True, speed_power: int = 2):
+        """
+        Constructor
+
+        :param time_limit: Time limit for cplex for each batch
+        :param warm_start: If to use the greedy starting point of the residual server resources
+        :param speed_power: The power of the sum of the speeds minimised for the starting speeds (see minimum_speeds)
+        """
+        self.time_limit = time_limit
+        self.warm_start = warm_start
+        self.speed_power = speed_power
+
+    def starting_point(self, slot_tasks: List[ElasticTask], servers: List[Server]) \
+            -> Tuple[Dict[ElasticTask, Optional[Server]], Dict[ElasticTask, Tuple[int, int, int]]]:
+        """
+        The greedy starting allocation of the slot tasks to the residual server resources with the minimum speeds
+
+        :param slot_tasks: List of the tasks in slot order
+        :param servers: List of servers
+        :return: Tuple of the starting task allocations and the task speeds of the allocated tasks
+        """
+        residual = {server: [server.available_storage, server.available_computation, server.available_bandwidth]
+                    for server in servers}
+        starting_allocation, starting_speeds = {}, {}
+        for task in slot_tasks:
+            starting_allocation[task] = None
+            if task.deadline <= 0:
+                continue
+
+            loading_speed, compute_speed, sending_speed = cached_minimum_speeds(
+                (task.required_storage, task.required_computation, task.required_results_data, task.deadline,
+                 self.speed_power))
+            fit_servers = [server for server in servers if task.required_storage <= residual[server][0] and
+                           compute_speed <= residual[server][1] and
+                           loading_speed + sending_speed <= residual[server][2]]
+            if fit_servers:
+                # The server with the most residual computation and bandwidth resources
+                server = max(fit_servers, key=lambda s: residual[s][1] / s.computation_capacity +
+                             residual[s][2] / s.bandwidth_capacity)
+                starting_allocation[task] = server
+                starting_speeds[task] = (loading_speed, compute_speed, sending_speed)
+                residual[server][0] -= task.required_storage
+                residual[server][1] -= compute_speed
+                residual[server][2] -= loading_speed + sending_speed
+        return starting_allocation, starting_speeds
+
+    def __call__(self, tasks: List[ElasticTask], servers: List[Server]):
+        """
+        Solves the batch of tasks
+
+        :param tasks: List of tasks
+        :param servers: List of servers
+        """
+        valid_servers = [server for server in servers
+                         if 1 <= server.available_computation and 2 <= server.available_bandwidth]
+        if not tasks or not valid_servers:
+            return None
+
+        # The slot ordering of the tasks by value density
+        slot_tasks = sorted(tasks, key=lambda task: task.value / (task.required_storage + task.required_computation +
+                                                                  task.required_results_data), reverse=True)
+        task_names = {task: f'Slot {slot}' for slot, task in enumerate(slot_tasks)}
+
+        if self.warm_start:
+            starting_allocation, starting_speeds = self.starting_point(slot_tasks, valid_servers)
+            return elastic_optimal_solver(slot_tasks, valid_servers, self.time_limit, task_names, starting_allocation,
+                                          starting_speeds)
+        else:
+            return elastic_optimal_solver(slot_tasks, valid_servers, self.time_limit, task_names)
@@ -0,0 +1,262 @@
+"""
+Non-elastic optimal algorithm as a 3-dimensional multiple knapsack problem (storage, compute and bandwidth) with fixed
+    task weights, solved exactly with dynamic programming for a single server with small capacities otherwise with a
+    depth first branch and bound using the surrogate and resource linear relaxations as the upper bound and a greedy
+    initial lower bound.
+    No cplex is required such that many small instances can be solved in parallel or to cross-check the cp model
+"""
+
+from __future__ import annotations
+
+from time import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from src.core.core import server_task_allocation
+
+if TYPE_CHECKING:
+    from typing import Iterable, Iterator, List, Optional, Tuple
+
+    from src.core.non_elastic_task import NonElasticTask
+    from src.core.server import Server
+
+
+class KnapsackSolution:
+    """
+    Knapsack solution with the objective, solve time and solve status (Optimal or Feasible)
+    """
+
+    def __init__(self, objective: float, solve_time: float, solve_status: str, nodes_explored: int = 0):
+        self.objective = objective
+        self.solve_time = solve_time
+        self.solve_status = solve_status
+        self.nodes_explored = nodes_explored
+
+
+def knapsack_dynamic_program(weights: List[Tuple[int, int, int]], values: List[float],
+                             capacity: Tuple[int, int, int]) -> List[int]:
+    """
+    Solves the single 3-dimensional knapsack using dynamic programming over the capacities
+
+    :param weights: List of item weights
+    :param values: List of item values
+    :param capacity: The knapsack capacity
+    :return: List of the item positions in the knapsack
+    """
+    best_values = np.zeros(tuple(c + 1 for c in capacity))
+    taken = np.zeros((len(weights),) + best_values.shape, dtype=bool)
+
+    for pos, ((storage, compute, bandwidth), value) in enumerate(zip(weights, values)):
+        # The values with the item taken are calculated from the previous values before updating
+        taken_values = best_values[:capacity[0] + 1 - storage, :capacity[1] + 1 - compute,
+                                   :capacity[2] + 1 - bandwidth] + value
+        remaining_values = best_values[storage:, compute:, bandwidth:]
+        improved = remaining_values < taken_values
+        remaining_values[improved] = taken_values[improved]
+        taken[pos, storage:, compute:, bandwidth:] = improved
+
+    # Backtrack from the full capacity for the items taken
+    items, (storage, compute, bandwidth) = [], capacity
+    for pos in reversed(range(len(weights))):
+        if taken[pos, storage, compute, bandwidth]:
+            items.append(pos)
+            storage, compute, bandwidth = storage - weights[pos][0], compute - weights[pos][1], \
+                bandwidth - weights[pos][2]
+    return items
+
+
+def fractional_bound(order: Iterable[int], fits: List[bool], weights: List[float], values: List[float],
+                     capacity: float) -> float:
+    """
+    The fractional knapsack value (linear relaxation) with the items in order of value density
+
+    :param order: The item positions in order of value density
+    :param fits: If each item can fit
+    :param weights: List of item weights
+    :param values: List of item values
+    :param capacity: The knapsack capacity
+    :return: The fractional knapsack value
+    """
+    value = 0
+    for item in order:
+        if fits[item]:
+            if weights[item] <= capacity:
+                capacity -= weights[item]
+                value += values[item]
+            else:
+                return value + values[item] * capacity / weights[item]
+    return value
+
+
+def knapsack_branch_bound(weights: List[Tuple[int, int, int]], values: List[float],
+                          capacities: List[Tuple[int, int, int]], time_limit: Optional[float] = None) \
+        -> Tuple[List[int], bool, int]:
+    """
+    Solves the 3-dimensional multiple knapsack using a depth first branch and bound with the items sorted by the
+        surrogate value density, the upper bound is the minimum linear relaxation of the surrogate knapsack (with the
+        weights normalised by the total capacities) and each resource knapsack. Knapsacks are searched in order of
+        best fit with knapsacks with the same remaining capacities only branched once
+
+    :param weights: List of item weights
+    :param values: List of item values
+    :param capacities: List of knapsack capacities
+    :param time_limit: The time limit for the search
+    :return: Tuple of the knapsack position for each item (-1 for not in a knapsack), if the search finished and the
+        number of nodes explored
+    """
+    start_time = time()
+    total_capacity = [max(1, sum(capacity[dim] for capacity in capacities)) for dim in range(3)]
+    surrogate_weights = [sum(weight[dim] / total_capacity[dim] for dim in range(3)) for weight in weights]
+
+    # The items order by the surrogate value density
+    order = sorted(range(len(weights)), key=lambda pos: values[pos] / surrogate_weights[pos], reverse=True)
+    weights = [weights[pos] for pos in order]
+    values = [values[pos] for pos in order]
+    surrogate_weights = [surrogate_weights[pos] for pos in order]
+
+    # The greedy initial lower bound
+    remaining = [list(capacity) for capacity in capacities]
+    best_assignment = [-1] * len(weights)
+    for pos, weight in enumerate(weights):
+        knapsack = next((k for k, capacity in enumerate(remaining)
+                         if all(weight[dim] <= capacity[dim] for dim in range(3))), -1)
+        if knapsack != -1:
+            best_assignment[pos] = knapsack
+            for dim in range(3):
+                remaining[knapsack][dim] -= weight[dim]
+    best_value = sum(value for value, knapsack in zip(values, best_assignment) if knapsack != -1)
+
+    remaining = [list(capacity) for capacity in capacities]
+    assignment = [-1] * len(weights)
+    nodes_explored, finished = 0, True
+
+    # The item positions ordered by the value density of each resource dimension
+    dimension_orders = [sorted(range(len(weights)), key=lambda pos: values[pos] / max(weights[pos][dim], 1e-9),
+                               reverse=True) for dim in range(3)]
+
+    def upper_bound(pos: int, value: float) -> float:
+        """
+        The minimum of the linear relaxations of the surrogate knapsack and each resource dimension knapsack for the
+            remaining items that can fit within a knapsack
+
+        :param pos: The item position
+        :param value: The current value
+        :return: The upper bound
+        """
+        max_capacity = [max(capacity[dim] for capacity in remaining) for dim in range(3)]
+        fits = [pos <= item and all(weights[item][dim] <= max_capacity[dim] for dim in range(3))
+                for item in range(len(weights))]
+
+        bound = fractional_bound(range(pos, len(weights)), fits, surrogate_weights, values,
+                                 sum(capacity[dim] / total_capacity[dim] for capacity in remaining for dim in range(3)))
+        for dim, dimension_order in enumerate(dimension_orders):
+            if bound <= best_value - value:
+                break
+            bound = min(bound, fractional_bound(dimension_order, fits, [weight[dim] for weight in weights], values,
+                                                sum(capacity[dim] for capacity in remaining)))
+        return value + bound
+
+    def search(pos: int, value: float) -> Iterator[Tuple[int, float]]:
+        """
+        Depth first search of the item allocated to each knapsack or not, the child searches are yielded to be
+            searched (with an explicit stack) before the search is continued, such that the depth isn't limited by the
+            recursion limit
+
+        :param pos: The item position
+        :param value: The current value
+        :return: Iterator of the child search positions and values
+        """
+        nonlocal best_value, best_assignment, nodes_explored, finished
+        nodes_explored += 1
+        if best_value < value:
+            best_value, best_assignment = value, assignment.copy()
+        if pos == len(weights) or upper_bound(pos, value) <= best_value:
+            return
+        if time_limit is not None and nodes_explored % 1000 == 0 and time_limit < time() - start_time:
+            finished = False
+        if not finished:
+            return
+
+        # The knapsacks are searched in order of the best fit for the item
+        weight, searched_capacities = weights[pos], []
+        for knapsack, capacity in sorted(((knapsack, capacity) for knapsack, capacity in enumerate(remaining)
+                                          if all(weight[dim] <= capacity[dim] for dim in range(3))),
+                                         key=lambda knapsack_capacity: sum(
+                                             (knapsack_capacity[1][dim] - weight[dim]) / total_capacity[dim]
+                                             for dim in range(3))):
+            if capacity not in searched_capacities:
+                searched_capacities.append(capacity.copy())
+                for dim in range(3):
+                    capacity[dim] -= weight[dim]
+                assignment[pos] = knapsack
+
+                yield pos + 1, value + values[pos]
+
+                assignment[pos] = -1
+                for dim in range(3):
+                    capacity[dim] += weight[dim]
+
+        yield pos + 1, value
+
+    # The stack of the searches, a child search is run to completion before its parent search continues
+    searches = [search(0, 0)]
+    while searches:
+        child = next(searches[-1], None)
+        if child is None:
+            searches.pop()
+        else:
+            searches.append(search(*child))
+
+    # Undo the item ordering
+    original_assignment = [-1] * len(weights)
+    for pos, knapsack in zip(order, best_assignment):
+        original_assignment[pos] = knapsack
+    return original_assignment, finished, nodes_explored
+
+
+def non_elastic_knapsack_solver(tasks: List[NonElasticTask], servers: List[Server], time_limit: Optional[int] = None,
+                                dynamic_program_memory: int = 256 * 2 ** 20) -> KnapsackSolution:
+    """
+    Finds the optimal non-elastic solution as a multiple knapsack problem
+
+    :param tasks: A list of tasks
+    :param servers: A list of servers
+    :param time_limit: The time limit to solve with
+    :param dynamic_program_memory: The maximum memory (bytes) of the dynamic programming tables, the float values and
+        boolean taken of each task, for the dynamic programming to be used with a single server
+    :return: The knapsack solution
+    """
+    assert time_limit is None or 0 < time_limit, f'Time limit: {time_limit}'
+    start_time = time()
+
+    # Only servers with available resources and tasks that can fit on a server
+    capacities = [(server.available_storage, server.available_computation, server.available_bandwidth)
+                  for server in servers]
+    valid_servers = [pos for pos, capacity in enumerate(capacities) if all(0 < c for c in capacity)]
+    weights = [(task.required_storage, task.compute_speed, task.loading_speed + task.sending_speed) for task in tasks]
+    valid_tasks = [pos for pos, task in enumerate(tasks)
+                   if 0 < task.value and any(all(weights[pos][dim] <= capacities[server][dim] for dim in range(3))
+                                             for server in valid_servers)]
+
+    valid_weights = [weights[pos] for pos in valid_tasks]
+    valid_values = [tasks[pos].value for pos in valid_tasks]
+    if len(valid_servers) == 1 and np.prod([c + 1 for c in capacities[valid_servers[0]]], dtype=float) * \
+            (np.dtype(np.float64).itemsize + len(valid_tasks) * np.dtype(bool).itemsize) <= dynamic_program_memory:
+        items = set(knapsack_dynamic_program(valid_weights, valid_values, capacities[valid_servers[0]]))
+        assignment = [0 if pos in items else -1 for pos in range(len(valid_tasks))]
+        finished, nodes_explored = True, 0
+    else:
+        assignment, finished, nodes_explored = knapsack_branch_bound(
+            valid_weights, valid_values, [capacities[pos] for pos in valid_servers],
+            None if time_limit is None else time_limit - (time() - start_time))
+
+    # Allocate all of the tasks to the servers
+    for pos, knapsack in zip(valid_tasks, assignment):
+        if knapsack != -1:
+            task = tasks[pos]
+            server_task_allocation(servers[valid_servers[knapsack]], task,
+                                   task.loading_speed, task.compute_speed, task.sending_speed)
+
+    return KnapsackSolution(sum(task.value for task in tasks if task.running_server), time() - start_time,
+                            'Optimal' if finished else 'Feasible', nodes_explored)
@@ -8,12 +8,13 @@ import sys
 from typing import TYPE_CHECKING
 
 from docplex.cp.model import CpoModel
-from docplex.cp.solution import SOLVE_STATUS_FEASIBLE, SOLVE_STATUS_OPTIMAL
+from docplex.cp.solution import SOLVE_STATUS_FEASIBLE, SOLVE_STATUS_OPTIMAL, CpoSolveResult
 
 from src.core.core import server_task_allocation
 from src.core.non_elastic_task import NonElasticTask
 from src.extra.pprint import print_model_solution
 from src.extra.result import Result
+from src.optimal.non_elastic_knapsack import non_elastic_knapsack_solver
 
 if TYPE_CHECKING:
     from typing import List, Optional
@@ -85,15 +86,20 @@ def non_elastic_optimal_solver(tasks: List[NonElasticTask], servers: List[Server
 
 
 def non_elastic_optimal(tasks: List[NonElasticTask], servers: List[Server],
-                        time_limit: Optional[int] = 15) -> Optional[Result]:
+                        time_limit: Optional[int] = 15, backend: str = 'cp') -> Optional[Result]:
     """
     Runs the non-elastic optimal cplex algorithm solver with a time limit
 
     :param tasks: List of non-elastic tasks
     :param servers: List of servers
     :param time_limit: Cplex time limit
+    :param backend: The solver backend, either the cplex model (cp) or the multiple knapsack solver (knapsack)
     :return: Optional results
     """
+    if backend == 'knapsack':
+        return knapsack_result('Non-elastic Optimal', tasks, servers, time_limit)
+    assert backend == 'cp', f'Unknown backend: {backend}'
+
     model_solution = non_elastic_optimal_solver(tasks, servers, time_limit=time_limit)
     if model_solution:
         return Result('Non-elastic Optimal', tasks, servers, round(model_solution.get_solve_time(), 2),
@@ -105,15 +111,20 @@ def non_elastic_optimal(tasks: List[NonElasticTask], servers: List[Server],
 
 
 def foreknowledge_non_elastic_optimal(tasks: List[NonElasticTask], servers: List[Server],
-                                      time_limit: Optional[int] = 15) -> Optional[Result]:
+                                      time_limit: Optional[int] = 15, backend: str = 'cp') -> Optional[Result]:
     """
     Runs the foreknowledge Non-elastic optimal cplex algorithm solver with a time limit
 
     :param tasks: List of Non-elastic tasks
     :param servers: List of servers
     :param time_limit: Cplex time limit
+    :param backend: The solver backend, either the cplex model (cp) or the multiple knapsack solver (knapsack)
     :return: Optional results
     """
+    if backend == 'knapsack':
+        return knapsack_result('Foreknowledge Non-elastic Optimal', tasks, servers, time_limit)
+    assert backend == 'cp', f'Unknown backend: {backend}'
+
     model_solution = non_elastic_optimal_solver(tasks, servers, time_limit=time_limit)
     if model_solution:
         return Result('Foreknowledge Non-elastic Optimal', tasks, servers, round(model_solution.get_solve_time(), 2),
@@ -122,3 +133,103 @@ def foreknowledge_non_elastic_optimal(tasks: List[NonElasticTask], servers: List
     else:
         print(f'Foreknowledge Non-elastic optimal error', file=sys.stderr)
         return Result('Foreknowledge Non-elastic Optimal', tasks, servers, 0, limited=True)
+
+
+def knapsack_result(algorithm_name: str, tasks: List[NonElasticTask], servers: List[Server],
+                    time_limit: Optional[int]) -> Result:
+    """
+    Runs the non-elastic multiple knapsack solver with a time limit
+
+    :param algorithm_name: The algorithm name
+    :param tasks: List of non-elastic tasks
+    :param servers: List of servers
+    :param time_limit: Solver time limit
+    :return: Results
+    """
+    solution = non_elastic_knapsack_solver(tasks, servers, time_limit=time_limit)
+    return Result(algorithm_name, tasks, servers, round(solution.solve_time, 2),
+                  **{'solve status': solution.solve_status, 'knapsack objective': solution.objective})
+
+
+class ParametricNonElasticOptimal:
+    """
+    Non-elastic optimal cplex model that is built once for the tasks and servers with the server capacities as
+        variables whose domains are fixed to the available resources on each solve, such that the model can be
+        re-solved for a sweep of server capacities with the previous allocation as the starting point of the search
+    """
+
+    def __init__(self, tasks: List[NonElasticTask], servers: List[Server]):
+        self.tasks = tasks
+        self.servers = servers
+        self.model = CpoModel('Parametric Non-elastic Optimal')
+        self.model_solution: Optional[CpoSolveResult] = None
+
+        # As no resource speeds then only assign binary variables for the allocation
+        self.allocations = {(task, server): self.model.binary_var(name=f'{task.name} task {server.name} server')
+                            for task in tasks for server in servers}
+        for task in tasks:
+            self.model.add(sum(self.allocations[(task, server)] for server in servers) <= 1)
+
+        # The server capacity variables and the resource speeds constraints
+        max_resources = max(server.computation_capacity + server.bandwidth_capacity for server in servers)
+        self.storage_capacities, self.computation_capacities, self.bandwidth_capacities = {}, {}, {}
+        for server in servers:
+            self.storage_capacities[server] = self.model.integer_var(min=0, max=server.storage_capacity,
+                                                                     name=f'{server.name} storage capacity')
+            self.computation_capacities[server] = self.model.integer_var(min=0, max=max_resources,
+                                                                         name=f'{server.name} computation capacity')
+            self.bandwidth_capacities[server] = self.model.integer_var(min=0, max=max_resources,
+                                                                       name=f'{server.name} bandwidth capacity')
+
+            self.model.add(sum(task.required_storage * self.allocations[(task, server)]
+                               for task in tasks) <= self.storage_capacities[server])
+            self.model.add(sum(task.compute_speed * self.allocations[(task, server)]
+                               for task in tasks) <= self.computation_capacities[server])
+            self.model.add(sum((task.loading_speed + task.sending_speed) * self.allocations[(task, server)]
+                               for task in tasks) <= self.bandwidth_capacities[server])
+
+        # Optimisation problem
+        self.model.maximize(sum(task.value * self.allocations[(task, server)] for task in tasks for server in servers))
+
+    def solve(self, time_limit: Optional[int] = 15, warm_start: bool = True) -> Result:
+        """
+        Solves the model with the servers available resources
+
+        :param time_limit: Cplex time limit
+        :param warm_start: If to use the previous allocation as the starting point
+        :return: Optimal results
+        """
+        assert time_limit is None or 0 < time_limit, f'Time limit: {time_limit}'
+
+        # Update the server capacity parameters
+        for server in self.servers:
+            assert server.available_storage <= server.storage_capacity
+            self.storage_capacities[server].set_domain([server.available_storage])
+            self.computation_capacities[server].set_domain([server.available_computation])
+            self.bandwidth_capacities[server].set_domain([server.available_bandwidth])
+
+        if warm_start and self.model_solution:
+            starting_point = self.model.create_empty_solution()
+            for var in self.allocations.values():
+                starting_point.add_integer_var_solution(var, self.model_solution.get_value(var))
+            self.model.set_starting_point(starting_point)
+
+        # Solve the cplex model with time limit
+        model_solution = self.model.solve(log_output=None, TimeLimit=time_limit)
+        if model_solution.get_solve_status() != SOLVE_STATUS_FEASIBLE and \
+                model_solution.get_solve_status() != SOLVE_STATUS_OPTIMAL:
+            print('Parametric non-elastic optimal failure', file=sys.stderr)
+            print_model_solution(model_solution)
+            return Result('Non-elastic Optimal', self.tasks, self.servers, 0, limited=True)
+        self.model_solution = model_solution
+
+        # Allocate all of the tasks to the servers
+        for task in self.tasks:
+            for server in self.servers:
+                if model_solution.get_value(self.allocations[(task, server)]):
+                    server_task_allocation(server, task, task.loading_speed, task.compute_speed, task.sending_speed)
+                    break
+
+        return Result('Non-elastic Optimal', self.tasks, self.servers, round(model_solution.get_solve_time(), 2),
+                      **{'solve status': model_solution.get_solve_status(),
+                         'cplex objective': model_solution.get_objective_values()[0]})
@@ -7,7 +7,9 @@ from __future__ import annotations
 from docplex.cp.model import CpoModel, SOLVE_STATUS_OPTIMAL
 
 from src.branch_bound.branch_bound import branch_bound_algorithm
+from src.branch_bound.feasibility_allocations import non_elastic_feasible_allocation
 from src.core.core import reset_model
+from src.core.non_elastic_task import generate_non_elastic_tasks
 from src.extra.model import SyntheticModelDist
 from src.optimal.elastic_optimal import elastic_optimal
 
@@ -40,3 +42,70 @@ def test_branch_bound():
 
     optimal_result = elastic_optimal(tasks, servers, time_limit=200)
     optimal_result.pretty_print()
+
+
+def test_parallel_branch_bound():
+    model = SyntheticModelDist(6, 2)
+    tasks, servers = model.generate_oneshot()
+    non_elastic_tasks = generate_non_elastic_tasks(tasks)
+
+    branch_bound_result = branch_bound_algorithm(non_elastic_tasks, servers, non_elastic_feasible_allocation)
+    reset_model(non_elastic_tasks, servers)
+
+    parallel_result = branch_bound_algorithm(non_elastic_tasks, servers, non_elastic_feasible_allocation,
+                                             processes=2, batch_size=4)
+    parallel_allocation = {task.name: task.running_server.name for task in non_elastic_tasks if task.running_server}
+    reset_model(non_elastic_tasks, servers)
+
+    repeat_result = branch_bound_algorithm(non_elastic_tasks, servers, non_elastic_feasible_allocation,
+                                           processes=2, batch_size=4)
+    repeat_allocation = {task.name: task.running_server.name for task in non_elastic_tasks if task.running_server}
+
+    assert branch_bound_result.social_welfare == parallel_result.social_welfare == repeat_result.social_welfare
+    assert parallel_allocation == repeat_allocation
+
+
+def test_branch_bound_checkpoint(tmp_path):
+    model = SyntheticModelDist(6, 2)
+    tasks, servers = model.generate_oneshot()
+    non_elastic_tasks = generate_non_elastic_tasks(tasks)
+
+    branch_bound_result = branch_bound_algorithm(non_elastic_tasks, servers, non_elastic_feasible_allocation)
+    reset_model(non_elastic_tasks, servers)
+
+    # Stop the search after the first progress update then resume from the checkpoint
+    progress = []
+    checkpoint_filename = str(tmp_path / 'branch_bound.ckpt')
+    stopped_result = branch_bound_algorithm(non_elastic_tasks, servers, non_elastic_feasible_allocation,
+                                            checkpoint_filename=checkpoint_filename,
+                                            progress_callback=lambda stats: progress.append(stats) or True,
+                                            progress_interval=10)
+    assert len(progress) == 1 and progress[0]['nodes explored'] == 10 and 0 < progress[0]['frontier size']
+    assert stopped_result.social_welfare <= branch_bound_result.social_welfare
+    reset_model(non_elastic_tasks, servers)
+
+    resumed_result = branch_bound_algorithm(non_elastic_tasks, servers, non_elastic_feasible_allocation,
+                                            resume_from=checkpoint_filename)
+    assert resumed_result.social_welfare == branch_bound_result.social_welfare
+    assert resumed_result.data['nodes explored'] == branch_bound_result.data['nodes explored']
+    assert resumed_result.data['gap'] == 0
+
+
+def test_non_elastic_branch_bound():
+    model = SyntheticModelDist(8, 2)
+    tasks, servers = model.generate_oneshot()
+    non_elastic_tasks = generate_non_elastic_tasks(tasks)
+
+    branch_bound_result = branch_bound_algorithm(non_elastic_tasks, servers, non_elastic_feasible_allocation)
+    reset_model(non_elastic_tasks, servers)
+
+    # As all of the tasks are non-elastic, the default is the non-elastic search
+    non_elastic_result = branch_bound_algorithm(non_elastic_tasks, servers)
+    print(f'Feasibility search: {branch_bound_result.solve_time} secs, '
+          f'non-elastic search: {non_elastic_result.solve_time} secs')
+    assert branch_bound_result.social_welfare == non_elastic_result.social_welfare
+    reset_model(non_elastic_tasks, servers)
+
+    # The parallel search options use the non-elastic feasible allocation rather than the non-elastic search
+    parallel_result = branch_bound_algorithm(non_elastic_tasks, servers, processes=2, batch_size=4)
+    assert branch_bound_result.social_welfare == parallel_result.social_welfare
@@ -1,8 +1,10 @@
 """
 Test the model distribution files
 """
+import io
 import json
 import os
+import pprint
 import random as rnd
 import sys
 from math import ceil
@@ -11,11 +13,19 @@ import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+from models.alibaba_cluster.generate_model import batch_instance_col_names, merge_batch_instances, \
+    partition_batch_tasks, write_batch_task_instances
+from models.google_cluster.google_cluster_analyser import finished_task_times
+from models.google_cluster.pipeline import load_frame, stage_1, stage_2, stage_3
 from src.core.core import reset_model
-from src.core.non_elastic_task import NonElasticTask, SumSpeedPowResourcePriority
-from src.core.elastic_task import ElasticTask
+from src.core.non_elastic_task import NonElasticTask, SumSpeedPowResourcePriority, SumSpeedsResourcePriority, \
+    generate_non_elastic_tasks
+from src.core.elastic_task import ConcaveValueModel, ElasticTask
+from src.extra.cache import load_dataframe, load_table
+from src.extra.instance_store import InstanceStore
 from src.extra.io import parse_args
-from src.extra.model import AlibabaModelDist, SyntheticModelDist, ModelDist
+from src.extra.model import AlibabaModelDist, SyntheticModelDist, ModelDist, MUTATION_STREAM, \
+    generate_evaluation_model
 from src.greedy.greedy import greedy_algorithm
 from src.greedy.resource_allocation import SumPercentage
 from src.greedy.server_selection import SumResources
@@ -40,6 +50,215 @@ def test_models():
     os.remove('test.mdl')
 
 
+def test_synthetic_bulk_generation(num_tasks: int = 20000, num_servers: int = 50):
+    model_dist = SyntheticModelDist(num_tasks, num_servers)
+    tasks, servers = model_dist.generate_bulk(rng=np.random.default_rng(0))
+    assert len(tasks) == num_tasks and len(servers) == num_servers
+    assert all(isinstance(task.required_storage, int) and 1 <= task.deadline for task in tasks)
+
+    # The bulk generation is reproducible and has the same distributions as the per-object generation
+    bulk_tasks, _ = model_dist.generate_bulk(rng=np.random.default_rng(0))
+    assert [task.save() for task in tasks[:100]] == [task.save() for task in bulk_tasks[:100]]
+    object_tasks = [model_dist.generate_task(servers, task_id) for task_id in range(num_tasks)]
+    for attribute in ('required_storage', 'required_computation', 'required_results_data', 'deadline', 'value'):
+        bulk_mean = np.mean([getattr(task, attribute) for task in tasks])
+        object_mean = np.mean([getattr(task, attribute) for task in object_tasks])
+        assert abs(bulk_mean - object_mean) < 0.05 * object_mean, attribute
+
+
+def test_alibaba_bulk_generation(num_tasks: int = 200, num_servers: int = 8):
+    model_dist = AlibabaModelDist(num_tasks, num_servers)
+    servers = [model_dist.generate_server(server_id) for server_id in range(num_servers)]
+    tasks = model_dist.generate_tasks(servers, num_tasks, rng=np.random.default_rng(1))
+
+    # The bulk task requirements are equal to the per-row task requirements of the same task model rows
+    # The task rows are sampled from the memory-mapped columns
+    assert all(isinstance(values, np.memmap) for values in model_dist.task_columns.values())
+    rows = np.random.default_rng(1).integers(model_dist.num_task_rows, size=num_tasks)
+    for task, row in zip(tasks, rows):
+        task_row = {column: values[row] for column, values in model_dist.task_columns.items()}
+        row_task = model_dist.row_task(task_row, servers, 0)
+        assert (task.required_storage, task.required_computation, task.deadline) == \
+            (row_task.required_storage, row_task.required_computation, row_task.deadline)
+        assert 0 < task.value
+
+    foreknowledge_tasks, requested_tasks = model_dist.generate_foreknowledge_requested_tasks(servers, num_tasks)
+    assert all(foreknowledge_task.value == requested_task.value and
+               foreknowledge_task.deadline == requested_task.deadline
+               for foreknowledge_task, requested_task in zip(foreknowledge_tasks, requested_tasks))
+
+
+def test_concave_value_model(num_tasks: int = 500, num_servers: int = 8):
+    model_dist = SyntheticModelDist(num_tasks, num_servers)
+    servers = model_dist.generate_servers(num_servers, rng=np.random.default_rng(2))
+    tasks = model_dist.generate_tasks(servers, num_tasks, rng=np.random.default_rng(3))
+
+    # The bulk values are equal to the task concave values with the same random generator
+    rng = np.random.default_rng(4)
+    task_values = [task.concave_value(servers, rng) for task in tasks]
+    values = ConcaveValueModel(servers).values([task.required_storage for task in tasks],
+                                               [task.required_computation for task in tasks],
+                                               [task.required_results_data for task in tasks], np.random.default_rng(4))
+    assert values.tolist() == task_values
+
+    # A prebuilt value model gives the same values as the servers
+    value_model, rng = ConcaveValueModel(servers), np.random.default_rng(4)
+    assert [task.concave_value(rng=rng, value_model=value_model) for task in tasks] == task_values
+
+    # The alibaba value model is reused for the same server list
+    alibaba_model_dist = AlibabaModelDist(num_tasks, num_servers)
+    assert alibaba_model_dist.value_model(servers) is alibaba_model_dist.value_model(servers)
+    assert alibaba_model_dist.value_model(servers) is not alibaba_model_dist.value_model(list(servers))
+
+
+def test_repeat_random_streams(num_tasks: int = 20, num_servers: int = 4, seed: int = 7):
+    for model_dist in (SyntheticModelDist(num_tasks, num_servers, seed=seed),
+                       AlibabaModelDist(num_tasks, num_servers, seed=seed)):
+        # Each repeat reproduces the same model independent of the other repeats generated
+        tasks, servers = model_dist.generate_oneshot(3)
+        model_dist.generate_oneshot(0)
+        repeat_tasks, repeat_servers = model_dist.generate_oneshot(3)
+        assert [task.save() for task in tasks] == [task.save() for task in repeat_tasks]
+        assert [server.save() for server in servers] == [server.save() for server in repeat_servers]
+
+        # The first repeat offsets the repeat number, i.e. for different workers
+        offset_model_dist = type(model_dist)(num_tasks, num_servers, seed=seed, first_repeat=3)
+        offset_tasks, _ = offset_model_dist.generate_oneshot(0)
+        assert [task.save() for task in tasks] == [task.save() for task in offset_tasks]
+
+        online_tasks, _ = model_dist.generate_online(10, 2, 1, repeat=1)
+        repeat_online_tasks, _ = model_dist.generate_online(10, 2, 1, repeat=1)
+        assert [task.save() for task in online_tasks] == [task.save() for task in repeat_online_tasks]
+
+        mutant_task = tasks[0].mutate(0.15, model_dist.rng(3, MUTATION_STREAM))
+        assert mutant_task.save() == tasks[0].mutate(0.15, model_dist.rng(3, MUTATION_STREAM)).save()
+
+
+def test_unseeded_random_module(num_tasks: int = 10, num_servers: int = 3):
+    # Without a seed the models are generated with the random module, such that random.seed reproduces the model
+    model_dist = SyntheticModelDist(num_tasks, num_servers)
+    alibaba_model_dist = AlibabaModelDist(num_tasks, num_servers)
+    models = []
+    for _ in range(2):
+        rnd.seed(1)
+        tasks, servers = model_dist.generate_oneshot()
+        online_tasks, _ = model_dist.generate_online(5, 2, 1)
+        foreknowledge_tasks, requested_tasks = alibaba_model_dist.generate_foreknowledge_requested_tasks(
+            servers, num_tasks)
+        models.append(([task.save() for task in tasks + online_tasks + foreknowledge_tasks + requested_tasks],
+                       [server.save() for server in servers]))
+    assert models[0] == models[1]
+
+    # The tasks are still generated in bulk rather than individually
+    model_dist.generate_task = None
+    assert len(model_dist.generate_oneshot()[0]) == num_tasks
+
+
+def test_table_cache(tmp_path):
+    filename = tmp_path / 'tasks.csv'
+    pd.DataFrame({'name': ['a', 'b', 'c'], 'cpu': [1.5, 2.0, 0.5], 'time': [10, 20, 30]}).to_csv(filename, index=False)
+
+    # The cache is written on the first load then memory-mapped
+    df = load_dataframe(str(filename))
+    assert df.equals(pd.read_csv(filename))
+    table = load_table(str(filename))
+    assert isinstance(table['cpu'], np.memmap) and table['time'].dtype == np.int64
+
+    # The cache is invalidated if the csv file changes
+    pd.DataFrame({'name': ['d'], 'cpu': [4.0], 'time': [40]}).to_csv(filename, index=False)
+    os.utime(filename, ns=(0, 0))
+    assert load_table(str(filename))['name'].tolist() == ['d']
+
+
+def test_instance_store(tmp_path, num_tasks: int = 20, num_servers: int = 4):
+    model_dist = SyntheticModelDist(num_tasks, num_servers, seed=3)
+    model_dist.instance_store = InstanceStore(str(tmp_path))
+    tasks, servers, _, results = generate_evaluation_model(model_dist, pprint.PrettyPrinter(stream=io.StringIO()), 0)
+    assert set(results['model']) == {'instance', 'seed', 'repeat'}
+
+    # The same instance is deduplicated by the content hash
+    assert model_dist.instance_store.add(tasks, servers) == results['model']['instance']
+    assert len(os.listdir(tmp_path)) == 1
+
+    # The instance is loaded lazily from a new store with the same tasks and servers as the original
+    instance = InstanceStore(str(tmp_path)).get(results['model']['instance'])
+    assert instance._arrays is None
+    loaded_tasks, loaded_servers = instance.load()
+    assert [task.save() for task in loaded_tasks] == [task.save() for task in tasks]
+    assert [server.save() for server in loaded_servers] == [server.save() for server in servers]
+
+    embedded_tasks, _ = InstanceStore(str(tmp_path)).load_model({'tasks': [task.save() for task in tasks],
+                                                                 'servers': [server.save() for server in servers]})
+    assert [task.name for task in embedded_tasks] == [task.name for task in tasks]
+
+
+def test_google_pipeline(tmp_path, num_tasks: int = 300):
+    # A task events trace with finished tasks of two resource requests and killed tasks
+    rows = []
+    for task in range(num_tasks):
+        cpu, ram, disk = (0.0625, 0.05, 0.001) if task % 2 else (0.125, 0.1, 0.002)
+        events = ((0, 100), (1, 200), (4, 200 + (20 + task % 5) * 10 ** 6)) if task % 10 else ((0, 100), (5, 300))
+        rows.extend((timestamp + task, '', 1000 + task // 100, task % 100, '', event, '', 0, 1, cpu, ram, disk, '')
+                    for event, timestamp in events)
+    pd.DataFrame(rows).sample(frac=1, random_state=0).to_csv(tmp_path / 'trace.csv', header=False, index=False)
+
+    # Stage 2 of no partitions has no tasks
+    stage_2(str(tmp_path))
+    assert len(load_frame(str(tmp_path / 'task_time.npz'))) == 0
+
+    # The chunked stages with incremental aggregation, other files in the partition directory are ignored
+    stage_1(str(tmp_path), 'trace.csv', chunk_size=100)
+    (tmp_path / 'stage_1' / 'notes.txt').write_text('notes')
+    stage_2(str(tmp_path))
+    stage_3(str(tmp_path), min_count=10)
+
+    task_time_df = load_frame(str(tmp_path / 'task_time.npz'))
+    assert len(task_time_df) == num_tasks - num_tasks // 10
+    assert set(task_time_df['compute time']) == {20, 21, 22, 23, 24}
+    with open(tmp_path / 'google_model.json') as file:
+        task_model = json.load(file)
+    assert len(task_model) == 2 and sum(task_dist['probability'] for task_dist in task_model) == 1
+    assert all(task_dist['deadline_mean'] == 22 for task_dist in task_model)
+
+
+def test_google_finished_tasks():
+    # Task 1 finishes, task 2 is killed and task 3 is not scheduled
+    df = pd.DataFrame([(100, 1, 0, 10), (300, 1, 1, 10), (900, 1, 4, 10), (50, 2, 0, 20), (60, 2, 1, 20),
+                       (70, 2, 5, 20), (40, 3, 0, 30), (80, 3, 4, 30)],
+                      columns=['timestamp', 'task ID', 'event type', 'priority'])
+    timestamped_df = finished_task_times(df.sample(frac=1, random_state=0))
+    assert timestamped_df['task ID'].tolist() == [1]
+    assert timestamped_df[['submit time', 'scheduled time', 'finish time', 'task schedule time',
+                           'task execution time']].iloc[0].tolist() == [100, 300, 900, 200, 600]
+
+
+def test_alibaba_parallel_merge(tmp_path, num_tasks: int = 200):
+    rng = np.random.default_rng(0)
+    batch_tasks = pd.DataFrame({
+        'task_name': [f'M{pos % 7}' for pos in range(num_tasks)], 'job_name': [f'j_{pos}' for pos in range(num_tasks)],
+        'start_time': rng.integers(0, 1000, num_tasks), 'plan_cpu': 100.0, 'plan_mem': 0.5})
+    batch_tasks['end_time'] = batch_tasks['start_time'] + rng.integers(0, 40, num_tasks)
+    batch_instances = batch_tasks[['task_name', 'job_name', 'start_time', 'end_time']].sample(frac=0.8, random_state=0)
+    batch_instances = batch_instances.assign(instance_name='i', task_type=1, status='Terminated', machine_id='m',
+                                             seq_no=1, total_seq_no=1, cpu_avg=50.0, cpu_max=90.0, mem_avg=0.2,
+                                             mem_max=0.3)[batch_instance_col_names]
+    batch_instances.to_csv(tmp_path / 'batch_instance.csv', header=False, index=False)
+
+    # The parallel partitioned merge is equal to the sequential merge
+    partition_batch_tasks(batch_tasks, str(tmp_path / 'partitions'), 4)
+    filenames = merge_batch_instances(str(tmp_path / 'batch_instance.csv'), str(tmp_path / 'partitions'),
+                                      str(tmp_path / 'instances'), 4, chunk_size=50, processes=2)
+    write_batch_task_instances(filenames, str(tmp_path / 'batch_task_instances.csv'))
+
+    expected = pd.merge(batch_tasks, batch_instances, on=['task_name', 'job_name', 'start_time', 'end_time'])
+    expected['time_taken'] = expected['end_time'] - expected['start_time']
+    expected = expected[10 < expected['time_taken']]
+    merged = pd.read_csv(tmp_path / 'batch_task_instances.csv')
+    assert sorted(merged['job_name']) == sorted(expected['job_name'])
+    assert merged.set_index('job_name')['time_taken'].sort_index().tolist() == \
+        expected.set_index('job_name')['time_taken'].sort_index().tolist()
+
+
 def alibaba_task_generation():
     """
     Tests if the task generation for the alibaba dataset is valid
@@ -107,6 +326,27 @@ def test_args():
     eval_args(['-m', 'test', '-t', '10', '-s', '11', '-r', '12'], 'test', 10, 11, 12)
 
 
+def test_bulk_non_elastic_tasks(num_tasks: int = 20, num_servers: int = 4):
+    model_dist = SyntheticModelDist(num_tasks, num_servers)
+    tasks, servers = model_dist.generate_oneshot()
+    for priority in (SumSpeedsResourcePriority(), SumSpeedPowResourcePriority()):
+        # The exact speeds are feasible and at least as good as the cp model speeds
+        non_elastic_tasks = generate_non_elastic_tasks(tasks, priority=priority)
+        for task, non_elastic_task in zip(tasks, non_elastic_tasks):
+            loading, compute, sending = speeds = (non_elastic_task.loading_speed, non_elastic_task.compute_speed,
+                                                  non_elastic_task.sending_speed)
+            assert task.required_storage * compute * sending + task.required_computation * loading * sending + \
+                task.required_results_data * loading * compute <= task.deadline * loading * compute * sending
+            assert priority.evaluate(*speeds) <= \
+                priority.evaluate(*NonElasticTask.minimum_resources(task, priority))
+
+        # The process pool speeds are equal to the memoised speeds
+        pool_tasks = generate_non_elastic_tasks([task.mutate(0.1) for task in tasks], priority=priority,
+                                                processes=2)
+        assert all(pool_task.compute_speed == generate_non_elastic_tasks([pool_task], priority=priority)[0]
+                   .compute_speed for pool_task in pool_tasks)
+
+
 def test_model_tasks(num_servers: int = 8):
     greedy_results, non_elastic_results = [], []
     for num_tasks in range(24, 60, 4):
@@ -4,22 +4,32 @@ Tests the evaluation online environment works as intended
 
 from __future__ import annotations
 
+import asyncio
+import json
+from itertools import islice
 from math import ceil
 from typing import Iterable, List
 
+import numpy as np
+
 from src.core.core import reset_model
 from src.core.non_elastic_task import NonElasticTask, SumSpeedPowResourcePriority
 from src.core.server import Server
 from src.core.elastic_task import ElasticTask
 from src.extra.model import SyntheticModelDist
-from src.extra.online import generate_batch_tasks, online_batch_solver
+from src.extra.admission import AdmissionService, load_generator
+from src.extra.metrics import MetricsRecorder
+from src.extra.model import AlibabaModelDist
+from src.extra.online import generate_batch_tasks, iterate_batch_tasks, online_batch_solver, online_event_solver, \
+    online_stream_solver, stream_batch_tasks, csv_task_stream, save_stream_results, SolverChain, RollingHorizonSolver, \
+    running_task_remaining_work, online_batch_length_sweep
 from src.extra.visualise import minimal_allocated_resources_solver
 from src.greedy.greedy import greedy_algorithm
 from src.greedy.resource_allocation import SumPowPercentage
 from src.greedy.server_selection import SumResources
 from src.greedy.task_priority import UtilityDeadlinePerResourcePriority, SqrtResourcesPriority
 from src.optimal.non_elastic_optimal import non_elastic_optimal_solver
-from src.optimal.elastic_optimal import elastic_optimal_solver
+from src.optimal.elastic_optimal import elastic_optimal_solver, IncrementalElasticOptimal
 
 
 def test_online_model_generation(model_dist=SyntheticModelDist(num_servers=8),
@@ -227,3 +237,384 @@ def test_task_batching(model_dist=SyntheticModelDist(num_servers=8),
 
     for task_1, task_2, task_3 in zip(batch1_tasks, batch2_tasks, batch3_tasks):
         print(f'Task: {task_1.name}, deadlines: [{task_1.deadline}, {task_2.deadline}, {task_3.deadline}]')
+
+    # The bucketed batches are equal to scanning the tasks for each batch time step
+    for batch_length in (1, 2, 3, 4):
+        scanned_tasks = [
+            [task for task in tasks if time_step - batch_length <= task.auction_time < time_step]
+            for time_step in range(batch_length, time_steps + time_steps % batch_length + 1, batch_length)
+        ]
+        for batch_tasks in (generate_batch_tasks(tasks, batch_length, time_steps),
+                            list(iterate_batch_tasks(tasks, batch_length, time_steps))):
+            assert [[task.name for task in _tasks] for _tasks in batch_tasks] == \
+                [[task.name for task in _tasks] for _tasks in scanned_tasks]
+            assert all(task.deadline == original.deadline - (batch_length * (pos + 1) - original.auction_time)
+                       for pos, (_tasks, _scanned) in enumerate(zip(batch_tasks, scanned_tasks))
+                       for task, original in zip(_tasks, _scanned))
+
+
+def test_online_event_solver(model_dist=SyntheticModelDist(num_servers=4), time_steps: int = 60,
+                             batch_length: int = 3, mean_arrival_rate: int = 4, std_arrival_rate: float = 2):
+    tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+    batched_tasks = generate_batch_tasks(tasks, batch_length, time_steps)
+    flattened_tasks = [task for tasks in batched_tasks for task in tasks]
+
+    batch_result = online_batch_solver(batched_tasks, servers, batch_length, 'Greedy', greedy_algorithm,
+                                       task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                                       server_selection=SumResources(), resource_allocation=SumPowPercentage())
+    reset_model(flattened_tasks, servers)
+
+    event_result = online_event_solver(batched_tasks, servers, batch_length, 'Greedy', greedy_algorithm,
+                                       task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                                       server_selection=SumResources(), resource_allocation=SumPowPercentage())
+    print(f'\nBatch social welfare: {batch_result.social_welfare}, event social welfare: {event_result.social_welfare}')
+    assert batch_result.social_welfare == event_result.social_welfare
+    for key in ('server social welfare', 'server storage used', 'server computation used', 'server bandwidth used',
+                'server num tasks allocated'):
+        assert batch_result.data[key] == event_result.data[key], key
+
+
+def test_idle_fast_forward(model_dist=SyntheticModelDist(num_servers=4), time_steps: int = 80, batch_length: int = 2,
+                           mean_arrival_rate: float = 0, std_arrival_rate: float = 0.6):
+    tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+    batched_tasks = generate_batch_tasks(tasks, batch_length, time_steps)
+    flattened_tasks = [task for _tasks in batched_tasks for task in _tasks]
+    print(f'\nIdle batches: {sum(not _tasks for _tasks in batched_tasks)} of {len(batched_tasks)}')
+
+    batch_metrics = MetricsRecorder(servers, downsample=3)
+    batch_result = online_batch_solver(batched_tasks, servers, batch_length, 'Greedy', greedy_algorithm,
+                                       metrics=batch_metrics,
+                                       task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                                       server_selection=SumResources(), resource_allocation=SumPowPercentage())
+    reset_model(flattened_tasks, servers)
+
+    # The idle batches are fast-forwarded with the results and metrics recorded in bulk
+    for online_solver in (online_batch_solver, online_event_solver):
+        skip_metrics = MetricsRecorder(servers, downsample=3)
+        skip_result = online_solver(batched_tasks, servers, batch_length, 'Greedy', greedy_algorithm,
+                                    metrics=skip_metrics, skip_idle=True,
+                                    task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                                    server_selection=SumResources(), resource_allocation=SumPowPercentage())
+        assert batch_result.social_welfare == skip_result.social_welfare
+        for key in ('server storage used', 'server computation used', 'server bandwidth used',
+                    'server num tasks allocated'):
+            assert batch_result.data[key] == skip_result.data[key], key
+        assert np.allclose(batch_metrics.metrics, skip_metrics.metrics)
+        reset_model(flattened_tasks, servers)
+
+    # The solver is only called for the batches with tasks
+    rolling_horizon_solver = RollingHorizonSolver(batch_length, greedy_algorithm,
+                                                  task_priority=UtilityDeadlinePerResourcePriority(
+                                                      SqrtResourcesPriority()),
+                                                  server_selection=SumResources(),
+                                                  resource_allocation=SumPowPercentage())
+    online_batch_solver(batched_tasks, servers, batch_length, 'Rolling Horizon', rolling_horizon_solver,
+                        skip_idle=True)
+    assert len(rolling_horizon_solver.batch_tasks_allocated) == sum(bool(_tasks) for _tasks in batched_tasks)
+    reset_model(flattened_tasks, servers)
+
+    stream_results = list(online_stream_solver(
+        batched_tasks, servers, batch_length, greedy_algorithm, skip_idle=True,
+        task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+        server_selection=SumResources(), resource_allocation=SumPowPercentage()))
+    assert sum(result['num batches'] for result in stream_results) == len(batched_tasks)
+    assert len(stream_results) < len(batched_tasks)
+
+
+def test_online_stream_solver(tmp_path, model_dist=SyntheticModelDist(num_servers=4), time_steps: int = 30,
+                              batch_length: int = 3, mean_arrival_rate: int = 4, std_arrival_rate: float = 2):
+    servers = [model_dist.generate_server(server_id) for server_id in range(model_dist.num_servers)]
+    tasks = list(model_dist.stream_online(servers, mean_arrival_rate, std_arrival_rate, time_steps))
+
+    # The streamed batches are equal to the generated batches up to the last task arrival
+    streamed_batches = list(stream_batch_tasks(iter(tasks), batch_length))
+    generated_batches = generate_batch_tasks(tasks, batch_length, time_steps)
+    assert [[task.name for task in _tasks] for _tasks in streamed_batches] == \
+        [[task.name for task in _tasks] for _tasks in generated_batches[:len(streamed_batches)]]
+
+    event_result = online_event_solver(generated_batches, servers, batch_length, 'Greedy', greedy_algorithm,
+                                       task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                                       server_selection=SumResources(), resource_allocation=SumPowPercentage())
+    reset_model([task for _tasks in generated_batches for task in _tasks], servers)
+
+    filename = tmp_path / 'stream.jsonl'
+    summary = save_stream_results(online_stream_solver(
+        stream_batch_tasks(iter(tasks), batch_length), servers, batch_length, greedy_algorithm,
+        task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+        server_selection=SumResources(), resource_allocation=SumPowPercentage()), filename)
+    print(f'\nStream summary: {summary}, event social welfare: {event_result.social_welfare}')
+    assert summary['tasks'] == len(tasks) and summary['social welfare'] == event_result.social_welfare
+    with open(filename) as file:
+        assert len(file.readlines()) == summary['batches']
+
+    # Unbounded streaming of the alibaba tasks from the csv
+    alibaba_model_dist = AlibabaModelDist(num_servers=4)
+    servers = [alibaba_model_dist.generate_server(server_id) for server_id in range(alibaba_model_dist.num_servers)]
+    task_stream = csv_task_stream('models/alibaba_cluster_tasks.csv',
+                                  lambda row, task_id: alibaba_model_dist.row_task(row, servers, task_id),
+                                  tasks_per_time_step=4)
+    batch_results = online_stream_solver(stream_batch_tasks(task_stream, batch_length), servers, batch_length,
+                                         greedy_algorithm,
+                                         task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                                         server_selection=SumResources(), resource_allocation=SumPowPercentage())
+    for batch_result in islice(batch_results, 10):
+        assert batch_result['num tasks'] == 4 * batch_length
+        json.dumps(batch_result)
+
+    # Raw traces with string columns, either kept as strings or only the converted columns
+    trace_filename = tmp_path / 'trace.csv'
+    trace_filename.write_text('name,status,size,time\na,Terminated,10,0\nb,Failed,20,3\n')
+    trace_tasks = list(csv_task_stream(str(trace_filename), lambda row, task_id: ElasticTask(
+        row['name'], required_storage=int(row['size']), required_computation=10, required_results_data=10,
+        deadline=5, value=1), auction_time_column='time'))
+    assert [(task.name, task.required_storage, task.auction_time) for task in trace_tasks] == \
+        [('a', 10, 0), ('b', 20, 3)]
+    converted_tasks = csv_task_stream(str(trace_filename), lambda row, task_id: ElasticTask(
+        f'task {task_id}', required_storage=row['size'], required_computation=10, required_results_data=10,
+        deadline=5, value=len(row)), converters={'size': int})
+    assert [(task.required_storage, task.value) for task in converted_tasks] == [(10, 1), (20, 1)]
+
+
+def test_admission_service(model_dist=SyntheticModelDist(num_tasks=60, num_servers=4)):
+    tasks, servers = model_dist.generate_oneshot()
+
+    # In-process submissions
+    async def in_process():
+        service = AdmissionService(servers, max_batch_time=0.01, max_batch_size=8, time_step_length=0.01)
+        service_future = asyncio.ensure_future(service.run())
+        await asyncio.sleep(0)
+        decisions = await asyncio.gather(*(service.submit(task) for task in tasks[:30]))
+        service_future.cancel()
+        return service, decisions
+
+    service, decisions = asyncio.run(in_process())
+    print(f'\nIn-process allocated: {sum(decision["server"] is not None for decision in decisions)}, '
+          f'batch sizes: {service.batch_sizes}, latencies: {service.latency_percentiles()}')
+    assert len(decisions) == 30 and all(batch_size <= 8 for batch_size in service.batch_sizes)
+    assert all(0 < decision['compute speed'] for decision in decisions if decision['server'] is not None)
+    assert set(service.latency_percentiles()['decision']) == {'p50', 'p90', 'p99'}
+
+    # Socket submissions with the load generator
+    reset_model(tasks, servers)
+
+    async def socket_service():
+        service = AdmissionService(servers, max_batch_time=0.01, max_batch_size=8, time_step_length=0.01)
+        service_future = asyncio.ensure_future(service.serve(port=0))
+        while service.socket_server is None:
+            await asyncio.sleep(0.01)
+        port = service.socket_server.sockets[0].getsockname()[1]
+        decisions = await load_generator('127.0.0.1', port, tasks, arrival_rate=1000, connections=3)
+        service_future.cancel()
+        return service, decisions
+
+    service, decisions = asyncio.run(socket_service())
+    print(f'Socket allocated: {sum(decision["server"] is not None for decision in decisions)}, '
+          f'latencies: {service.latency_percentiles()}')
+    assert sorted(decision['task'] for decision in decisions) == sorted(task.name for task in tasks)
+
+
+def test_solver_chain(model_dist=SyntheticModelDist(num_servers=4), time_steps: int = 10, batch_length: int = 2,
+                      mean_arrival_rate: int = 4, std_arrival_rate: float = 2, time_budget: float = 2):
+    tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+    batched_tasks = generate_batch_tasks(tasks, batch_length, time_steps)
+    flattened_tasks = [task for tasks in batched_tasks for task in tasks]
+    greedy_policies = (UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()), SumResources(), SumPowPercentage())
+
+    greedy_result = online_batch_solver(batched_tasks, servers, batch_length, 'Greedy', greedy_algorithm,
+                                        **dict(zip(('task_priority', 'server_selection', 'resource_allocation'),
+                                                   greedy_policies)))
+    reset_model(flattened_tasks, servers)
+
+    solver_chain = SolverChain(time_budget, *greedy_policies)
+    chain_result = online_batch_solver(batched_tasks, servers, batch_length, 'Chain', solver_chain)
+    print(f'\nGreedy: {greedy_result.social_welfare}, chain: {chain_result.social_welfare}, '
+          f'stages: {solver_chain.batch_stages}, latencies: {solver_chain.batch_latencies}')
+    assert len(solver_chain.batch_stages) == len(solver_chain.batch_latencies) == len(batched_tasks)
+    assert set(solver_chain.batch_stages) <= {'Greedy', 'Elastic Optimal'}
+    assert all(0 <= server.available_computation and 0 <= server.available_bandwidth for server in servers)
+
+
+def test_incremental_elastic_optimal(model_dist=SyntheticModelDist(num_servers=4), time_steps: int = 12,
+                                     batch_length: int = 3, mean_arrival_rate: int = 3, std_arrival_rate: float = 1):
+    tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+    batched_tasks = generate_batch_tasks(tasks, batch_length, time_steps)
+
+    incremental_solver = IncrementalElasticOptimal(time_limit=10)
+    for batch_tasks in batched_tasks:
+        starting_allocation, starting_speeds = incremental_solver.starting_point(batch_tasks, servers)
+        assert set(starting_allocation) == set(batch_tasks)
+        assert set(starting_speeds) == {task for task, server in starting_allocation.items() if server}
+        for server in servers:
+            server_speeds = [speeds for task, speeds in starting_speeds.items() if starting_allocation[task] is server]
+            assert sum(compute_speed for _, compute_speed, _ in server_speeds) <= server.available_computation
+            assert sum(loading_speed + sending_speed for loading_speed, _, sending_speed in server_speeds) <= \
+                server.available_bandwidth
+
+        incremental_solution = incremental_solver(batch_tasks, servers)
+        reset_model(batch_tasks, servers)
+
+        optimal_solution = elastic_optimal_solver(batch_tasks, servers, 10)
+        reset_model(batch_tasks, servers)
+        if incremental_solution and optimal_solution and \
+                incremental_solution.get_solve_status() == optimal_solution.get_solve_status() == 'Optimal':
+            assert abs(incremental_solution.get_objective_values()[0] -
+                       optimal_solution.get_objective_values()[0]) < 0.1
+
+    batch_result = online_batch_solver(batched_tasks, servers, batch_length, 'Incremental Elastic Optimal',
+                                       IncrementalElasticOptimal(time_limit=5))
+    print(f'\nIncremental elastic optimal social welfare: {batch_result.social_welfare}')
+
+
+def test_incremental_warm_start(model_dist=SyntheticModelDist(num_servers=3), time_steps: int = 20,
+                                batch_length: int = 3, mean_arrival_rate: int = 3, std_arrival_rate: float = 1):
+    tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+    batched_tasks = generate_batch_tasks(tasks, batch_length, time_steps)
+
+    warm_solver, cold_solver = IncrementalElasticOptimal(time_limit=5), IncrementalElasticOptimal(5, warm_start=False)
+    warm_branches, cold_branches, warm_time, cold_time = 0, 0, 0.0, 0.0
+    for batch_tasks in batched_tasks:
+        starting_allocation, starting_speeds = warm_solver.starting_point(batch_tasks, servers)
+        starting_value = sum(task.value for task in starting_speeds)
+
+        warm_solution = warm_solver(batch_tasks, servers)
+        reset_model(batch_tasks, servers)
+        cold_solution = cold_solver(batch_tasks, servers)
+        reset_model(batch_tasks, servers)
+        if warm_solution is None or cold_solution is None:
+            continue
+
+        warm_branches += warm_solution.get_solver_infos().get_number_of_branches()
+        cold_branches += cold_solution.get_solver_infos().get_number_of_branches()
+        warm_time += warm_solution.get_solver_infos().get_solve_time()
+        cold_time += cold_solution.get_solver_infos().get_solve_time()
+
+        # The warm started search is never worse than its starting point and both agree when solved to optimality
+        assert starting_value - 0.1 < warm_solution.get_objective_values()[0]
+        if warm_solution.get_solve_status() == cold_solution.get_solve_status() == 'Optimal':
+            assert abs(warm_solution.get_objective_values()[0] - cold_solution.get_objective_values()[0]) < 0.1
+
+    print(f'\nWarm start branches: {warm_branches}, solve time: {warm_time:.2f}s - '
+          f'cold start branches: {cold_branches}, solve time: {cold_time:.2f}s')
+
+
+def test_metrics_recorder(tmp_path, model_dist=SyntheticModelDist(num_servers=4), time_steps: int = 40,
+                          batch_length: int = 2, mean_arrival_rate: int = 4, std_arrival_rate: float = 2):
+    tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+    batched_tasks = generate_batch_tasks(tasks, batch_length, time_steps)
+
+    metrics, downsampled_metrics = MetricsRecorder(servers, num_batches=5), MetricsRecorder(servers, downsample=4)
+    result = online_batch_solver(batched_tasks, servers, batch_length, 'Greedy', greedy_algorithm, metrics=metrics,
+                                 task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                                 server_selection=SumResources(), resource_allocation=SumPowPercentage())
+    reset_model([task for _tasks in batched_tasks for task in _tasks], servers)
+    online_event_solver(batched_tasks, servers, batch_length, 'Greedy', greedy_algorithm, metrics=downsampled_metrics,
+                        task_priority=UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                        server_selection=SumResources(), resource_allocation=SumPowPercentage())
+
+    assert metrics.metrics.shape == (len(batched_tasks), len(servers), 4)
+    for pos, server in enumerate(servers):
+        assert np.allclose(metrics.metric('computation used')[:, pos],
+                           result.data['server computation used'][server.name])
+        assert np.allclose(metrics.metric('num tasks allocated')[:, pos],
+                           result.data['server num tasks allocated'][server.name])
+    assert np.allclose(downsampled_metrics.metrics[0], metrics.metrics[:4].mean(axis=0))
+    assert np.allclose(metrics.rolling('storage used', 3)[0], metrics.metric('storage used')[:3].mean(axis=0))
+    assert np.allclose(metrics.rolling('storage used', 3, 'max')[-1], metrics.metric('storage used')[-3:].max(axis=0))
+
+    metrics.save(tmp_path / 'metrics.npz')
+    loaded_metrics = MetricsRecorder.load(tmp_path / 'metrics.npz')
+    assert loaded_metrics.server_names == metrics.server_names
+    assert np.allclose(loaded_metrics.metrics, metrics.metrics, atol=1e-3)
+
+
+def test_rolling_horizon(model_dist=SyntheticModelDist(num_servers=4), time_steps: int = 20, batch_length: int = 2,
+                         mean_arrival_rate: int = 6, std_arrival_rate: float = 2):
+    tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+    batched_tasks = generate_batch_tasks(tasks, batch_length, time_steps)
+    flattened_tasks = [task for _tasks in batched_tasks for task in _tasks]
+    greedy_args = {'task_priority': UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                   'server_selection': SumResources(), 'resource_allocation': SumPowPercentage()}
+
+    static_result = online_batch_solver(batched_tasks, servers, batch_length, 'Static', greedy_algorithm,
+                                        **greedy_args)
+    static_allocated = sum(task.running_server is not None for task in flattened_tasks)
+    reset_model(flattened_tasks, servers)
+
+    rolling_horizon_solver = RollingHorizonSolver(batch_length, greedy_algorithm, **greedy_args)
+    rolling_horizon_result = online_batch_solver(batched_tasks, servers, batch_length, 'Rolling Horizon',
+                                                 rolling_horizon_solver)
+    print(f'\nStatic - tasks allocated: {static_allocated}, social welfare: {static_result.social_welfare}, '
+          f'Rolling horizon - tasks allocated: {sum(rolling_horizon_solver.batch_tasks_allocated)}, '
+          f'social welfare: {rolling_horizon_result.social_welfare}')
+
+    # The running tasks still meet their remaining deadlines
+    for task, (_, storage, computation, results_data, deadline) in rolling_horizon_solver.task_progress.items():
+        assert storage / task.loading_speed + computation / task.compute_speed + \
+            results_data / task.sending_speed <= deadline + 1e-6
+
+    # The batch time step is found from the tasks' auction time, independent of the number of batches solved
+    reset_model(flattened_tasks, servers)
+    rolling_horizon_solver = RollingHorizonSolver(batch_length, greedy_algorithm, **greedy_args)
+    rolling_horizon_solver([], servers)
+    rolling_horizon_solver([task.batch(6) for task in tasks if 4 <= task.auction_time < 6], servers)
+    assert rolling_horizon_solver.task_progress
+    assert all(time_step == 6 for time_step, *_ in rolling_horizon_solver.task_progress.values())
+
+    # Remaining work of the task stages
+    task = ElasticTask('test', required_storage=10, required_computation=20, required_results_data=10, deadline=10,
+                       value=10)
+    task.loading_speed, task.compute_speed, task.sending_speed = 5, 10, 5
+    assert running_task_remaining_work(task, 1, (10, 20, 10), 10) == (5, 20, 10, 9)
+    assert running_task_remaining_work(task, 3, (10, 20, 10), 10) == (0, 10, 10, 7)
+    assert running_task_remaining_work(task, 5, (10, 20, 10), 10) == (0, 0, 5, 5)
+    assert running_task_remaining_work(task, 6, (10, 20, 10), 10) is None
+
+
+
+def test_rolling_horizon_event_solver(model_dist=SyntheticModelDist(num_servers=4), time_steps: int = 20,
+                                      batch_length: int = 2, mean_arrival_rate: int = 6, std_arrival_rate: float = 2):
+    tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+    # The idle batches after the last arrivals until all of the tasks have departed
+    batched_tasks = generate_batch_tasks(tasks, batch_length, time_steps)
+    batched_tasks += [[] for _ in range(ceil(max(task.deadline for task in tasks) / batch_length) + 1)]
+    greedy_args = {'task_priority': UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                   'server_selection': SumResources(), 'resource_allocation': SumPowPercentage()}
+
+    # The resources used by the event solver follow the running task speeds that are lowered by the re-optimisation
+    rolling_horizon_solver, reoptimised = RollingHorizonSolver(batch_length, greedy_algorithm, **greedy_args), False
+    for batch_result in online_stream_solver(batched_tasks, servers, batch_length, rolling_horizon_solver):
+        reoptimised |= bool(rolling_horizon_solver.reoptimised_servers)
+        for server in servers:
+            assert server.available_computation == server.computation_capacity - \
+                ceil(round(sum(task.compute_speed for task in server.allocated_tasks), 6)), batch_result['batch num']
+            assert server.available_bandwidth == server.bandwidth_capacity - \
+                ceil(round(sum(task.loading_speed + task.sending_speed for task in server.allocated_tasks), 6)), \
+                batch_result['batch num']
+    assert reoptimised
+
+    # All of the server resources are released once the tasks have departed
+    assert all(not server.allocated_tasks and server.available_storage == server.storage_capacity and
+               server.available_computation == server.computation_capacity and
+               server.available_bandwidth == server.bandwidth_capacity for server in servers)
+
+def test_batch_length_sweep(tmp_path, model_dist=SyntheticModelDist(num_servers=4), batch_lengths=(1, 2, 3, 5),
+                            time_steps: int = 30, mean_arrival_rate: int = 4, std_arrival_rate: float = 2):
+    tasks, servers = model_dist.generate_online(time_steps, mean_arrival_rate, std_arrival_rate)
+    greedy_args = {'task_priority': UtilityDeadlinePerResourcePriority(SqrtResourcesPriority()),
+                   'server_selection': SumResources(), 'resource_allocation': SumPowPercentage()}
+
+    sequential_results = online_batch_length_sweep(tasks, servers, time_steps, batch_lengths, 'Greedy',
+                                                   greedy_algorithm, processes=1, scale_capacities=True,
+                                                   **greedy_args)
+    parallel_results = online_batch_length_sweep(tasks, servers, time_steps, batch_lengths, 'Greedy',
+                                                 greedy_algorithm, processes=2, scale_capacities=True, skip_idle=True,
+                                                 filename=tmp_path / 'sweep.json', **greedy_args)
+    for batch_length in batch_lengths:
+        print(f'Batch length: {batch_length}, social welfare: {parallel_results[batch_length]["social welfare"]}')
+        assert sequential_results[batch_length]['social welfare'] == parallel_results[batch_length]['social welfare']
+
+    # The tasks and servers are unchanged by the sweep
+    assert all(task.running_server is None for task in tasks)
+    assert all(server.available_computation == server.computation_capacity for server in servers)
+    with open(tmp_path / 'sweep.json') as file:
+        assert len(json.load(file)) == len(batch_lengths)
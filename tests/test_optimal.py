@@ -4,12 +4,14 @@ Tests the effectiveness of the optimality time limit for the social welfare of t
 
 from __future__ import annotations
 
+import sys
 from typing import Sequence
 
 import matplotlib.pyplot as plt
 
 from src.core.core import reset_model
 from src.core.non_elastic_task import generate_non_elastic_tasks
+from src.core.server import Server
 from src.extra.io import parse_args
 from src.extra.model import ModelDist, SyntheticModelDist
 from src.extra.pprint import print_model
@@ -18,8 +20,10 @@ from src.greedy.greedy import greedy_algorithm
 from src.greedy.resource_allocation import SumPercentage
 from src.greedy.server_selection import SumResources
 from src.greedy.task_priority import UtilityDeadlinePerResourcePriority
-from src.optimal.non_elastic_optimal import non_elastic_optimal
-from src.optimal.elastic_optimal import elastic_optimal_solver, elastic_optimal, server_relaxed_elastic_optimal
+from src.optimal.non_elastic_knapsack import knapsack_branch_bound, non_elastic_knapsack_solver
+from src.optimal.non_elastic_optimal import non_elastic_optimal, ParametricNonElasticOptimal
+from src.optimal.elastic_optimal import elastic_optimal_solver, elastic_optimal, server_relaxed_elastic_optimal, \
+    ParametricElasticOptimal
 
 
 def test_optimal_solution():
@@ -75,6 +79,72 @@ def test_minimise_resource_allocation():
     plt.show()
 
 
+def test_non_elastic_knapsack():
+    model_dist = SyntheticModelDist(num_tasks=12, num_servers=3)
+    tasks, servers = model_dist.generate_oneshot()
+    non_elastic_tasks = generate_non_elastic_tasks(tasks)
+
+    cp_result = non_elastic_optimal(non_elastic_tasks, servers, 10)
+    reset_model(non_elastic_tasks, servers)
+
+    knapsack_result = non_elastic_optimal(non_elastic_tasks, servers, 10, backend='knapsack')
+    print(f'\nCP - {cp_result.social_welfare} ({cp_result.data["solve status"]}), '
+          f'Knapsack - {knapsack_result.social_welfare} ({knapsack_result.data["solve status"]})')
+    assert knapsack_result.data['solve status'] == 'Optimal'
+    assert cp_result.social_welfare <= knapsack_result.social_welfare + 0.1
+    if cp_result.data['solve status'] == 'Optimal':
+        assert abs(cp_result.social_welfare - knapsack_result.social_welfare) < 0.1
+    reset_model(non_elastic_tasks, servers)
+
+    # The dynamic programming and branch and bound of a single small server
+    small_server = Server('small', storage_capacity=300, computation_capacity=40, bandwidth_capacity=100)
+    dynamic_program_solution = non_elastic_knapsack_solver(non_elastic_tasks, [small_server])
+    reset_model(non_elastic_tasks, [small_server])
+    branch_bound_solution = non_elastic_knapsack_solver(non_elastic_tasks, [small_server], dynamic_program_memory=0)
+    assert dynamic_program_solution.nodes_explored == 0 and 0 < branch_bound_solution.nodes_explored
+    assert abs(dynamic_program_solution.objective - branch_bound_solution.objective) < 0.1
+
+    # The search depth (the number of items taken) is greater than the recursion limit, that is unchanged
+    recursion_limit = sys.getrecursionlimit()
+    assignment, finished, _ = knapsack_branch_bound([(2, 2, 2)] * 2000, [1] * 2000,
+                                                    [(2 * recursion_limit + 401,) * 3], time_limit=1)
+    assert sum(knapsack != -1 for knapsack in assignment) == recursion_limit + 200 and not finished
+    assert sys.getrecursionlimit() == recursion_limit
+
+
+def test_parametric_optimal():
+    model_dist = SyntheticModelDist(num_tasks=8, num_servers=2)
+    tasks, servers = model_dist.generate_oneshot()
+    non_elastic_tasks = generate_non_elastic_tasks(tasks)
+
+    elastic_model = ParametricElasticOptimal(tasks, servers)
+    non_elastic_model = ParametricNonElasticOptimal(non_elastic_tasks, servers)
+    server_total_resources = {server: server.computation_capacity + server.bandwidth_capacity for server in servers}
+    for ratio in (0.3, 0.5, 0.7):
+        for server in servers:
+            server.update_capacities(int(server_total_resources[server] * ratio),
+                                     int(server_total_resources[server] * (1 - ratio)))
+
+        parametric_result = elastic_model.solve(time_limit=10)
+        reset_model(tasks, servers)
+        optimal_result = elastic_optimal(tasks, servers, time_limit=10)
+        reset_model(tasks, servers)
+        print(f'Ratio {ratio} - Elastic parametric: {parametric_result.social_welfare} '
+              f'({parametric_result.data["solve status"]}), optimal: {optimal_result.social_welfare} '
+              f'({optimal_result.data["solve status"]})')
+        if parametric_result.data['solve status'] == optimal_result.data['solve status'] == 'Optimal':
+            assert abs(parametric_result.social_welfare - optimal_result.social_welfare) < 0.1
+
+        parametric_result = non_elastic_model.solve(time_limit=10)
+        reset_model(non_elastic_tasks, servers)
+        optimal_result = non_elastic_optimal(non_elastic_tasks, servers, time_limit=10)
+        reset_model(non_elastic_tasks, servers)
+        print(f'Ratio {ratio} - Non-elastic parametric: {parametric_result.social_welfare}, '
+              f'optimal: {optimal_result.social_welfare}')
+        if parametric_result.data['solve status'] == optimal_result.data['solve status'] == 'Optimal':
+            assert abs(parametric_result.social_welfare - optimal_result.social_welfare) < 0.1
+
+
 if __name__ == "__main__":
     args = parse_args()
     test_optimal_time_limit(ModelDist(args.file, args.tasks, args.servers), args.repeat)